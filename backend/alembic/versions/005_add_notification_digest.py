@@ -0,0 +1,29 @@
+"""Add digest flag to notification_rules
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Opt-in: existing rules keep sending one reminder per event
+    op.add_column(
+        'notification_rules',
+        sa.Column('digest', sa.Boolean, server_default=sa.false(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('notification_rules', 'digest')
@@ -0,0 +1,53 @@
+"""Add send_key to notification_logs for idempotent daily dedup
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_logs', sa.Column('send_key', sa.String, nullable=True))
+
+    # Backfill "user:event:channel:YYYY-MM-DD" for sent/pending rows. If a
+    # day already has duplicates, only the earliest row gets the key so the
+    # unique index can be built; the rest stay NULL.
+    op.execute("""
+        UPDATE notification_logs AS l
+        SET send_key = k.send_key
+        FROM (
+            SELECT
+                id,
+                user_id::text || ':' || event_id::text || ':' || notification_type
+                    || ':' || to_char(sent_at, 'YYYY-MM-DD') AS send_key,
+                row_number() OVER (
+                    PARTITION BY user_id, event_id, notification_type, sent_at::date
+                    ORDER BY sent_at, id
+                ) AS rn
+            FROM notification_logs
+            WHERE status IN ('sent', 'pending') AND sent_at IS NOT NULL
+        ) AS k
+        WHERE l.id = k.id AND k.rn = 1
+    """)
+
+    op.create_index(
+        'uq_notification_logs_send_key', 'notification_logs', ['send_key'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('sent', 'pending')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_notification_logs_send_key', table_name='notification_logs')
+    op.drop_column('notification_logs', 'send_key')
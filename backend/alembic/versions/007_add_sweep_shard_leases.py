@@ -0,0 +1,34 @@
+"""Add sweep_shard_leases table for the multi-worker deadline sweep
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sweep_shard_leases',
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('shard_count', sa.Integer(), nullable=False),
+        sa.Column('worker_id', sa.String(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('run_date', 'shard')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sweep_shard_leases')
@@ -0,0 +1,41 @@
+"""Add reminder_schedule table of precomputed reminder fire dates
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Populate afterwards with: python -m backend.services.reminder_schedule rebuild
+    op.create_table('reminder_schedule',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('channel', sa.String(), nullable=False),
+        sa.Column('fire_date', sa.Date(), nullable=False),
+        sa.Column('digest', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.ForeignKeyConstraint(['event_id'], ['deadline_events.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['profiles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_reminder_schedule_fire_date', 'reminder_schedule', ['fire_date'])
+    op.create_index('idx_reminder_schedule_event_id', 'reminder_schedule', ['event_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_reminder_schedule_event_id', table_name='reminder_schedule')
+    op.drop_index('idx_reminder_schedule_fire_date', table_name='reminder_schedule')
+    op.drop_table('reminder_schedule')
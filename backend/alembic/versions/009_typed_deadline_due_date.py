@@ -0,0 +1,73 @@
+"""Convert deadline_events.due_date to DATE and index it
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('deadline_events', sa.Column('due_date_raw', sa.String, nullable=True))
+
+    # Same rules as services/dates.parse_date_text: a leading YYYY-MM-DD
+    # (or / . separated) that is a real calendar date, else NULL.
+    op.execute(r"""
+        CREATE FUNCTION pg_temp.try_date(value text) RETURNS date AS $$
+        DECLARE
+            parts text[];
+        BEGIN
+            parts := regexp_match(value, '^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})');
+            IF parts IS NULL THEN
+                RETURN NULL;
+            END IF;
+            RETURN make_date(parts[1]::int, parts[2]::int, parts[3]::int);
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+
+    # Flag unparseable values: keep the original text, leave due_date NULL
+    op.execute("""
+        UPDATE deadline_events
+        SET due_date_raw = due_date::text
+        WHERE due_date IS NOT NULL AND pg_temp.try_date(due_date::text) IS NULL
+    """)
+
+    op.alter_column('deadline_events', 'due_date', nullable=True)
+    op.execute("""
+        ALTER TABLE deadline_events
+        ALTER COLUMN due_date TYPE date USING pg_temp.try_date(due_date::text)
+    """)
+
+    op.create_index(
+        'idx_deadline_events_document_status_due', 'deadline_events',
+        ['document_id', 'status', 'due_date'],
+    )
+    op.create_index(
+        'idx_deadline_events_open_due', 'deadline_events', ['due_date'],
+        postgresql_where=sa.text("status <> 'completed'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_deadline_events_open_due', table_name='deadline_events')
+    op.drop_index('idx_deadline_events_document_status_due', table_name='deadline_events')
+    op.execute("""
+        ALTER TABLE deadline_events
+        ALTER COLUMN due_date TYPE varchar
+        USING COALESCE(to_char(due_date, 'YYYY-MM-DD'), due_date_raw, '')
+    """)
+    op.alter_column('deadline_events', 'due_date', nullable=False)
+    op.drop_column('deadline_events', 'due_date_raw')
@@ -0,0 +1,33 @@
+"""Add llm_extraction_cache table for content-addressed extraction results
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_extraction_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('prompt_version', sa.String(), nullable=False),
+        sa.Column('deployment', sa.String(), nullable=False),
+        sa.Column('events', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('llm_extraction_cache')
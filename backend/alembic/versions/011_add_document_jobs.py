@@ -0,0 +1,46 @@
+"""Add document_jobs table for the durable document-processing queue
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('document_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('document_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('storage_path', sa.String(), nullable=False),
+        sa.Column('file_type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), server_default='queued', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('worker_id', sa.String(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_document_jobs_status_run_after', 'document_jobs', ['status', 'run_after'])
+    op.create_index('idx_document_jobs_document_id', 'document_jobs', ['document_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_document_jobs_document_id', table_name='document_jobs')
+    op.drop_index('idx_document_jobs_status_run_after', table_name='document_jobs')
+    op.drop_table('document_jobs')
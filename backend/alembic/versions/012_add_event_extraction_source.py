@@ -0,0 +1,25 @@
+"""Add extraction_source to deadline_events
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('deadline_events', sa.Column('extraction_source', sa.String(), server_default='llm', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('deadline_events', 'extraction_source')
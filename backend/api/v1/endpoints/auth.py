@@ -8,6 +8,7 @@ from datetime import datetime
 from backend.core import deps
 from backend.core.config import settings
 from backend.core.cache import cache
+from backend.services.reminder_schedule import refresh_reminders
 from supabase import create_client, Client
 
 logger = logging.getLogger(__name__)
@@ -50,6 +51,7 @@ def ensure_default_notification_rules(user_id: str):
             }).execute()
 
         logger.info(f"Created default notification rules for user {user_id}")
+        refresh_reminders(user_ids=[user_id])
 
     except Exception as e:
         logger.error(f"Error creating default notification rules: {e}")
@@ -81,8 +83,9 @@ def accept_pending_invitations(user_id: str, email: str) -> bool:
                 .execute()
             logger.info(f"Auto-accepted invitation for {email} to project {inv['project_id']}")
 
-        # Invalidate dashboard cache so stats reflect the new projects
-        cache.delete(f"dashboard:stats:{user_id}")
+        # Invalidate dashboard and project list caches so they include the new projects
+        cache.invalidate_tags(f"user:{user_id}")
+        refresh_reminders(project_ids=[inv["project_id"] for inv in pending.data])
 
         return True
 
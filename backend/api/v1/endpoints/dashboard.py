@@ -8,7 +8,7 @@ from sqlalchemy import func
 from backend.core import deps
 from backend.core.config import settings
 from backend.core.database import get_db
-from backend.core.cache import cache
+from backend.core.cache import Tagged, cache
 from backend.models import Project, Document, DeadlineEvent
 # Import NotificationService for manual trigger
 from backend.services.notification import NotificationService
@@ -26,109 +26,109 @@ def get_dashboard_stats(
 ):
     """
     Get aggregated statistics for dashboard (includes member projects).
-    Cached for 60 seconds to improve performance.
+    Cached for 60 seconds to improve performance; near expiry one request
+    refreshes it while the others are served the cached copy.
     """
     if not supabase:
         raise HTTPException(status_code=500, detail="Database connection error")
 
     try:
         user_id = str(current_user.id)
+        return cache.get_or_compute(
+            f"dashboard:stats:{user_id}", lambda: compute_dashboard_stats(user_id), ttl=60,
+        )
 
-        # Try to get from cache first
-        cache_key = f"dashboard:stats:{user_id}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-
-        today = datetime.now().date().isoformat()
-
-        # Get all accessible project IDs (owned + member)
-        project_ids = get_user_project_ids(user_id)
-        projects_count = len(project_ids)
-
-        # Initialize defaults
-        doc_count = 0
-        overdue_count = 0
-        upcoming_count = 0
-        recent_events = []
-
-        if not project_ids:
-            result = {
-                "total_projects": projects_count,
-                "total_documents": 0,
-                "overdue_tasks": 0,
-                "upcoming_tasks": 0,
-                "recent_events": []
-            }
-            cache.set(cache_key, result, ttl=60)
-            return result
-
-        # 2. Get documents count
-        docs_response = supabase.table("documents")\
-            .select("id", count="exact")\
-            .in_("project_id", project_ids)\
-            .execute()
-        doc_count = docs_response.count if docs_response.count is not None else 0
-        doc_ids = [d['id'] for d in docs_response.data] if docs_response.data else []
-
-        if not doc_ids:
-            result = {
-                "total_projects": projects_count,
-                "total_documents": doc_count,
-                "overdue_tasks": 0,
-                "upcoming_tasks": 0,
-                "recent_events": []
-            }
-            cache.set(cache_key, result, ttl=60)
-            return result
-
-        # 3. Get all event counts and recent events in fewer queries
-        # Count overdue
-        overdue = supabase.table("deadline_events")\
-            .select("id", count="exact")\
-            .in_("document_id", doc_ids)\
-            .lt("due_date", today)\
-            .neq("status", "completed")\
-            .execute()
-        overdue_count = overdue.count if overdue.count is not None else 0
-
-        # Count upcoming
-        upcoming = supabase.table("deadline_events")\
-            .select("id", count="exact")\
-            .in_("document_id", doc_ids)\
-            .gte("due_date", today)\
-            .neq("status", "completed")\
-            .execute()
-        upcoming_count = upcoming.count if upcoming.count is not None else 0
-
-        # Get recent events with document and project join (optimized with specific fields)
-        recent_response = supabase.table("deadline_events")\
-            .select("id, title, due_date, status, confidence_score, document_id, documents(original_filename, project_id, projects(id, name))")\
-            .in_("document_id", doc_ids)\
-            .neq("status", "completed")\
-            .order("due_date", desc=False)\
-            .limit(50)\
-            .execute()
-        recent_events = recent_response.data if recent_response.data else []
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching dashboard stats: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch dashboard statistics")
 
+
+def compute_dashboard_stats(user_id: str) -> Tagged:
+    """The dashboard statistics, tagged with the user and their projects."""
+    today = datetime.now().date().isoformat()
+
+    # Get all accessible project IDs (owned + member)
+    project_ids = get_user_project_ids(user_id)
+    projects_count = len(project_ids)
+    # Invalidated when any of these projects, or the user's memberships, change
+    cache_tags = [f"user:{user_id}", *(f"project:{pid}" for pid in project_ids)]
+
+    # Initialize defaults
+    doc_count = 0
+    overdue_count = 0
+    upcoming_count = 0
+    recent_events = []
+
+    if not project_ids:
         result = {
             "total_projects": projects_count,
-            "total_documents": doc_count,
-            "overdue_tasks": overdue_count,
-            "upcoming_tasks": upcoming_count,
-            "recent_events": recent_events
+            "total_documents": 0,
+            "overdue_tasks": 0,
+            "upcoming_tasks": 0,
+            "recent_events": []
         }
+        return Tagged(result, cache_tags)
 
-        # Cache the result for 60 seconds
-        cache.set(cache_key, result, ttl=60)
+    # 2. Get documents count
+    docs_response = supabase.table("documents")\
+        .select("id", count="exact")\
+        .in_("project_id", project_ids)\
+        .execute()
+    doc_count = docs_response.count if docs_response.count is not None else 0
+    doc_ids = [d['id'] for d in docs_response.data] if docs_response.data else []
 
-        return result
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error fetching dashboard stats: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to fetch dashboard statistics")
+    if not doc_ids:
+        result = {
+            "total_projects": projects_count,
+            "total_documents": doc_count,
+            "overdue_tasks": 0,
+            "upcoming_tasks": 0,
+            "recent_events": []
+        }
+        return Tagged(result, cache_tags)
+
+    # 3. Get all event counts and recent events in fewer queries
+    # Count overdue
+    overdue = supabase.table("deadline_events")\
+        .select("id", count="exact")\
+        .in_("document_id", doc_ids)\
+        .lt("due_date", today)\
+        .neq("status", "completed")\
+        .execute()
+    overdue_count = overdue.count if overdue.count is not None else 0
+
+    # Count upcoming
+    upcoming = supabase.table("deadline_events")\
+        .select("id", count="exact")\
+        .in_("document_id", doc_ids)\
+        .gte("due_date", today)\
+        .neq("status", "completed")\
+        .execute()
+    upcoming_count = upcoming.count if upcoming.count is not None else 0
+
+    # Get recent events with document and project join (optimized with specific fields);
+    # events without a date have nowhere to go on the list or calendar
+    recent_response = supabase.table("deadline_events")\
+        .select("id, title, due_date, status, confidence_score, document_id, documents(original_filename, project_id, projects(id, name))")\
+        .in_("document_id", doc_ids)\
+        .neq("status", "completed")\
+        .not_.is_("due_date", "null")\
+        .order("due_date", desc=False)\
+        .limit(50)\
+        .execute()
+    recent_events = recent_response.data if recent_response.data else []
+
+    result = {
+        "total_projects": projects_count,
+        "total_documents": doc_count,
+        "overdue_tasks": overdue_count,
+        "upcoming_tasks": upcoming_count,
+        "recent_events": recent_events
+    }
+
+    return Tagged(result, cache_tags)
 
 @router.post("/notifications/trigger")
 def trigger_notifications(
@@ -139,7 +139,7 @@ def trigger_notifications(
     """
     try:
         service = NotificationService()
-        service.check_deadlines()
+        service.check_deadlines(leased=False)  # Today's leased run may already be complete
         return {"message": "Deadline check triggered successfully"}
     except Exception as e:
         logger.error(f"Error triggering notifications: {e}")
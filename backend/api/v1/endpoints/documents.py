@@ -1,14 +1,20 @@
 
 import logging
+import shutil
+import tempfile
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from starlette.concurrency import run_in_threadpool
 from typing import List
 from sqlalchemy.orm import Session
 from backend.core import deps
 from backend.core.config import settings
+from backend.core.database import get_db
 from backend.core.permissions import verify_project_access
-from backend.services.parser import parser_service
+from backend.services.document_jobs import DocumentJobQueue
+from backend.services.document_processing import remove_spooled
+from backend.services.reminder_schedule import refresh_reminders
 from backend.models import Project, Document, DeadlineEvent
 from backend.schemas.document import EventUpdate, DocumentUpdate
 from supabase import create_client, Client
@@ -20,6 +26,8 @@ supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVIC
 
 router = APIRouter()
 
+UPLOAD_COPY_CHUNK = 1024 * 1024
+
 
 def get_supabase_user_client(token: str) -> Client:
     """Helper to get a supabase client authenticated as the user"""
@@ -30,87 +38,24 @@ def get_supabase_user_client(token: str) -> Client:
     return client
 
 
-async def process_document_background(document_id: str, file_content: bytes, user_id: str, file_type: str = "pdf"):
-    """
-    Background task to process document:
-    1. Extract text from document (PDF/DOCX/DOC)
-    2. Analyze with LLM to find deadlines
-    3. Save results to database
-    """
-    if not supabase:
-        logger.error("Supabase client not initialized")
-        return
-
-    logger.info(f"Starting background processing for doc {document_id} (type: {file_type})")
-
-    try:
-        # 1. Extract text from document
-        text = parser_service.extract_text(file_content, file_type)
-
-        if not text:
-            logger.warning(f"Failed to extract text for doc {document_id}")
-            supabase.table("documents").update({
-                "status": "error",
-                "raw_content": "Failed to extract text from PDF"
-            }).eq("id", document_id).execute()
-            return
-
-        # Save extracted text
-        supabase.table("documents").update({
-            "raw_content": text[:10000]
-        }).eq("id", document_id).execute()
-
-        # 2. Analyze text with LLM to find deadlines
-        events_data = parser_service.analyze_text_with_llm(text)
-        logger.info(f"Extracted {len(events_data)} events for doc {document_id}")
-
-        # 3. Save deadline events
-        if events_data:
-            events_to_insert = []
-            for event in events_data:
-                event_data = {
-                    "id": str(uuid.uuid4()),
-                    "document_id": document_id,
-                    "title": event.get("title", "Untitled Event"),
-                    "due_date": event.get("due_date"),
-                    "status": "pending",
-                    "confidence_score": event.get("confidence_score", 0),
-                    "source_text": event.get("source_text", "")[:500],
-                    "description": event.get("description")
-                }
-                events_to_insert.append(event_data)
-
-            supabase.table("deadline_events").insert(events_to_insert).execute()
-            logger.info(f"Inserted {len(events_to_insert)} deadline events")
-
-        # Update document status to completed
-        supabase.table("documents").update({
-            "status": "completed"
-        }).eq("id", document_id).execute()
-
-        logger.info(f"Successfully completed processing for doc {document_id}")
-
-    except Exception as e:
-        logger.error(f"Error processing document {document_id}: {e}")
-        try:
-            supabase.table("documents").update({
-                "status": "error",
-                "raw_content": f"Processing error: {str(e)}"
-            }).eq("id", document_id).execute()
-        except Exception as update_error:
-            logger.error(f"Failed to update error status: {update_error}")
+def spool_upload(file: UploadFile, file_type: str) -> str:
+    """Copy an upload to a temp file on disk in chunks; returns its path."""
+    with tempfile.NamedTemporaryFile(prefix="upload-", suffix=f".{file_type}", delete=False) as tmp:
+        file.file.seek(0)
+        shutil.copyfileobj(file.file, tmp, UPLOAD_COPY_CHUNK)
+        return tmp.name
 
 
 @router.post("/upload")
 async def upload_document(
-    background_tasks: BackgroundTasks,
     project_id: str,
     file: UploadFile = File(...),
     current_user = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
-    Upload a PDF document and start processing.
-    Returns document metadata immediately while processing happens in background.
+    Upload a PDF document and queue it for processing.
+    Returns document metadata immediately; a document worker parses it.
     """
     if not supabase:
         raise HTTPException(status_code=500, detail="Database connection error")
@@ -133,7 +78,8 @@ async def upload_document(
     # Verify project access (owner or accepted member)
     verify_project_access(project_id, str(current_user.id), supabase)
 
-    file_content = await file.read()
+    # Spool to disk so the storage upload doesn't need the whole file in memory
+    file_path = await run_in_threadpool(spool_upload, file, file_type)
 
     # Generate unique storage path
     file_ext = file.filename.split(".")[-1] if "." in file.filename else file_type
@@ -143,7 +89,7 @@ async def upload_document(
     try:
         upload_response = supabase.storage.from_("documents").upload(
             path=storage_path,
-            file=file_content,
+            file=file_path,
             file_options={"content-type": file.content_type}
         )
 
@@ -155,6 +101,9 @@ async def upload_document(
     except Exception as e:
         logger.error(f"Storage upload error: {e}")
         raise HTTPException(status_code=500, detail="伺服器內部錯誤，請稍後再試")
+    finally:
+        # The worker reads the file back from storage
+        remove_spooled(file_path)
 
     # Create document record in database
     try:
@@ -175,14 +124,8 @@ async def upload_document(
         if not doc_response.data:
             raise HTTPException(status_code=500, detail="Failed to create document record")
 
-        # Start background processing
-        background_tasks.add_task(
-            process_document_background,
-            doc_id,
-            file_content,
-            str(current_user.id),
-            file_type
-        )
+        # Queue for the document worker (status follows the job from here)
+        await run_in_threadpool(DocumentJobQueue(db).enqueue, doc_id, storage_path, file_type)
 
         return {
             "id": doc_id,
@@ -194,8 +137,9 @@ async def upload_document(
     except HTTPException:
         raise
     except Exception as e:
-        # Cleanup: Try to delete uploaded file if DB insert failed
+        # Cleanup: Try to delete uploaded file and record if DB insert or enqueue failed
         try:
+            supabase.table("documents").delete().eq("id", doc_id).execute()
             supabase.storage.from_("documents").remove([storage_path])
         except:
             pass
@@ -271,12 +215,16 @@ def update_event(
         verify_project_access(project_id, str(current_user.id), supabase)
 
         # Build update dict from Pydantic model, excluding unset fields
-        update_data = event_in.model_dump(exclude_unset=True)
+        update_data = event_in.model_dump(mode="json", exclude_unset=True)
 
         if not update_data:
             return {"message": "No fields to update"}
+        if "due_date" in update_data:
+            update_data["due_date_raw"] = None  # A validated date replaces any unparsed text
 
         response = supabase.table("deadline_events").update(update_data).eq("id", str(event_id)).execute()
+        if {"due_date", "status"} & update_data.keys():
+            refresh_reminders(event_ids=[str(event_id)])
         return response.data[0] if response.data else {}
 
     except HTTPException:
@@ -4,10 +4,12 @@ import uuid
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from typing import List
 from backend.core import deps
+from backend.core.cache import cache
 from backend.core.config import settings
 from backend.core.permissions import verify_project_access, verify_project_owner
 from backend.schemas.member import MemberInvite, MemberResponse
 from backend.services.email import EmailService
+from backend.services.reminder_schedule import refresh_reminders
 from supabase import create_client, Client
 from datetime import datetime
 
@@ -117,6 +119,9 @@ def invite_member(
             result = response.data[0]
             if profile.data and len(profile.data) > 0:
                 result["full_name"] = profile.data[0].get("full_name")
+                refresh_reminders(project_ids=[pid])
+                # The new member's cached project list and dashboard lack this project
+                cache.invalidate_tags(f"user:{member_data['user_id']}")
 
             # Send invitation email synchronously for immediate feedback
             project = verify_project_owner(pid, uid, supabase)
@@ -234,6 +239,9 @@ def remove_member(
             raise HTTPException(status_code=404, detail="Member not found")
 
         supabase.table("project_members").delete().eq("id", str(member_id)).execute()
+        refresh_reminders(project_ids=[pid])
+        # The removed member's cached project list and dashboard include this project
+        cache.invalidate_tags(f"project:{pid}")
         return None
 
     except HTTPException:
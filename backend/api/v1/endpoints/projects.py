@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from backend.core import deps
 from backend.core.config import settings
-from backend.core.cache import cache
+from backend.core.cache import Tagged, cache
 from backend.core.permissions import verify_project_access
 from backend.schemas.project import Project, ProjectCreate, ProjectUpdate, ProjectWithCounts
 from supabase import create_client, Client
@@ -46,71 +46,72 @@ def read_projects(
 ):
     """
     Retrieve projects owned by or shared with current user, with doc_count and event_count.
-    Cached for 120 seconds to improve performance.
+    Cached for 120 seconds to improve performance; near expiry one request
+    refreshes it while the others are served the cached copy.
     """
     if not supabase:
         raise HTTPException(status_code=500, detail="Database connection error")
 
     try:
         user_id = str(current_user.id)
-
-        # Try to get from cache first
-        cache_key = f"projects:list:{user_id}:{skip}:{limit}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-
-        # 1. Get all accessible project IDs (owned + member)
-        all_project_ids = get_user_project_ids(user_id)
-
-        if not all_project_ids:
-            return []
-
-        # 2. Get projects
-        response = supabase.table("projects").select("*").in_("id", all_project_ids).range(skip, skip + limit - 1).execute()
-        projects = response.data or []
-
-        if not projects:
-            return []
-
-        project_ids = [p["id"] for p in projects]
-
-        # 3. Count documents per project
-        docs_response = supabase.table("documents").select("id, project_id").in_("project_id", project_ids).execute()
-        docs = docs_response.data or []
-        doc_count_map: dict[str, int] = {}
-        doc_ids: list[str] = []
-        for doc in docs:
-            pid = doc["project_id"]
-            doc_count_map[pid] = doc_count_map.get(pid, 0) + 1
-            doc_ids.append(doc["id"])
-
-        # 4. Count events per project (via documents)
-        event_count_map: dict[str, int] = {}
-        if doc_ids:
-            events_response = supabase.table("deadline_events").select("id, document_id").in_("document_id", doc_ids).execute()
-            events = events_response.data or []
-            doc_to_project = {doc["id"]: doc["project_id"] for doc in docs}
-            for event in events:
-                pid = doc_to_project.get(event["document_id"])
-                if pid:
-                    event_count_map[pid] = event_count_map.get(pid, 0) + 1
-
-        # 5. Merge counts into projects
-        result = []
-        for p in projects:
-            p["doc_count"] = doc_count_map.get(p["id"], 0)
-            p["event_count"] = event_count_map.get(p["id"], 0)
-            result.append(p)
-
-        # Cache the result for 120 seconds
-        cache.set(cache_key, result, ttl=120)
-
-        return result
+        return cache.get_or_compute(
+            f"projects:list:{user_id}:{skip}:{limit}", lambda: compute_project_list(user_id, skip, limit), ttl=120,
+        )
     except Exception as e:
         logger.error(f"Error fetching projects: {e}")
         raise HTTPException(status_code=500, detail="伺服器內部錯誤，請稍後再試")
 
+
+def compute_project_list(user_id: str, skip: int, limit: int) -> Tagged:
+    """One page of the user's projects with counts, tagged with the user and all their projects."""
+    # 1. Get all accessible project IDs (owned + member)
+    all_project_ids = get_user_project_ids(user_id)
+    # Invalidated when any of these projects, or the user's memberships, change
+    cache_tags = [f"user:{user_id}", *(f"project:{pid}" for pid in all_project_ids)]
+
+    if not all_project_ids:
+        return Tagged([], cache_tags)
+
+    # 2. Get projects
+    response = supabase.table("projects").select("*").in_("id", all_project_ids).range(skip, skip + limit - 1).execute()
+    projects = response.data or []
+
+    if not projects:
+        return Tagged([], cache_tags)
+
+    project_ids = [p["id"] for p in projects]
+
+    # 3. Count documents per project
+    docs_response = supabase.table("documents").select("id, project_id").in_("project_id", project_ids).execute()
+    docs = docs_response.data or []
+    doc_count_map: dict[str, int] = {}
+    doc_ids: list[str] = []
+    for doc in docs:
+        pid = doc["project_id"]
+        doc_count_map[pid] = doc_count_map.get(pid, 0) + 1
+        doc_ids.append(doc["id"])
+
+    # 4. Count events per project (via documents)
+    event_count_map: dict[str, int] = {}
+    if doc_ids:
+        events_response = supabase.table("deadline_events").select("id, document_id").in_("document_id", doc_ids).execute()
+        events = events_response.data or []
+        doc_to_project = {doc["id"]: doc["project_id"] for doc in docs}
+        for event in events:
+            pid = doc_to_project.get(event["document_id"])
+            if pid:
+                event_count_map[pid] = event_count_map.get(pid, 0) + 1
+
+    # 5. Merge counts into projects
+    result = []
+    for p in projects:
+        p["doc_count"] = doc_count_map.get(p["id"], 0)
+        p["event_count"] = event_count_map.get(p["id"], 0)
+        result.append(p)
+
+    return Tagged(result, cache_tags)
+
+
 @router.post("", response_model=Project)
 def create_project(
     *,
@@ -132,8 +133,7 @@ def create_project(
 
         if response.data and len(response.data) > 0:
             # Invalidate cache
-            cache.delete_pattern(f"projects:list:{current_user.id}:*")
-            cache.delete_pattern(f"dashboard:stats:{current_user.id}")
+            cache.invalidate_tags(f"user:{current_user.id}")
             return response.data[0]
         else:
             raise HTTPException(status_code=500, detail="Failed to create project")
@@ -186,9 +186,8 @@ def update_project(
         response = supabase.table("projects").update(update_data).eq("id", str(id)).execute()
 
         if response.data and len(response.data) > 0:
-            # Invalidate cache
-            cache.delete_pattern(f"projects:list:{current_user.id}:*")
-            cache.delete_pattern(f"dashboard:stats:{current_user.id}")
+            # Invalidate cache (the owner's and every member's)
+            cache.invalidate_tags(f"project:{id}")
             return response.data[0]
         else:
             raise HTTPException(status_code=500, detail="Failed to update project")
@@ -218,9 +217,8 @@ def delete_project(
 
         supabase.table("projects").delete().eq("id", str(id)).execute()
 
-        # Invalidate cache
-        cache.delete_pattern(f"projects:list:{current_user.id}:*")
-        cache.delete_pattern(f"dashboard:stats:{current_user.id}")
+        # Invalidate cache (the owner's and every member's)
+        cache.invalidate_tags(f"project:{id}")
 
         return None
 
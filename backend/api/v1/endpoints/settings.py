@@ -12,6 +12,7 @@ from backend.core.database import get_db
 from backend.core.config import settings
 from backend.models import NotificationRule, NotificationLog, Profile
 from backend.core import deps
+from backend.services.reminder_schedule import refresh_reminders
 
 router = APIRouter()
 
@@ -57,6 +58,7 @@ class NotificationRuleBase(BaseModel):
     severity: str = "info"
     is_active: bool = True
     channels: list[str] = ["line", "email"]
+    digest: bool = False  # One consolidated reminder per day instead of one per event
 
 class NotificationRuleCreate(NotificationRuleBase):
     pass
@@ -104,6 +106,7 @@ def create_notification_rule(
     db.add(db_rule)
     db.commit()
     db.refresh(db_rule)
+    refresh_reminders(user_ids=[current_user.id], db=db)
     return db_rule
 
 @router.delete("/rules/{rule_id}")
@@ -122,6 +125,7 @@ def delete_notification_rule(
 
     db.delete(db_rule)
     db.commit()
+    refresh_reminders(user_ids=[current_user.id], db=db)
     return {"status": "success", "message": "Rule deleted"}
 
 @router.get("/email-config", response_model=EmailConfigResponse)
@@ -0,0 +1,94 @@
+"""
+In-process verification of Supabase access tokens (AUTH_VERIFY_MODE=local).
+
+The signature, expiry and audience are checked locally: HS256 tokens
+against SUPABASE_JWT_SECRET, asymmetric ones (RS256/ES256) against the
+project's JWKS, which is fetched once and cached. That takes microseconds
+instead of a round-trip to the Supabase Auth API.
+
+A valid signature does not tell us the session was not signed out since the
+token was issued. RevocationCache remembers which sessions Supabase
+confirmed recently, so get_current_user asks Supabase at most once per
+session every AUTH_REVOCATION_CHECK_TTL seconds.
+"""
+import threading
+import time
+
+import jwt
+from jwt import PyJWKClient
+from backend.core.config import settings
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+
+class TokenVerifier:
+    def __init__(self, secret: str = None, audience: str = None, jwks_url: str = None, jwks_ttl: float = None,
+                 leeway: float = 30):
+        self.secret = secret if secret is not None else settings.SUPABASE_JWT_SECRET
+        self.audience = audience if audience is not None else settings.SUPABASE_JWT_AUDIENCE
+        if jwks_url is None and settings.SUPABASE_URL:
+            jwks_url = f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        self.jwks_url = jwks_url
+        self.jwks_ttl = jwks_ttl if jwks_ttl is not None else settings.SUPABASE_JWKS_TTL
+        self.leeway = leeway  # Seconds of clock skew allowed on exp/iat
+        self._jwks: PyJWKClient | None = None
+
+    def _jwks_client(self) -> PyJWKClient:
+        if self._jwks is None:
+            if not self.jwks_url:
+                raise jwt.InvalidTokenError("No JWKS URL configured for asymmetric tokens")
+            # Keys are refetched after jwks_ttl, or at once for an unknown kid (key rotation)
+            self._jwks = PyJWKClient(self.jwks_url, lifespan=self.jwks_ttl, timeout=5)
+        return self._jwks
+
+    def verify(self, token: str) -> dict:
+        """The token's claims; raises jwt.InvalidTokenError if it is not valid."""
+        algorithm = jwt.get_unverified_header(token).get("alg")
+        if algorithm == "HS256":
+            if not self.secret:
+                raise jwt.InvalidTokenError("SUPABASE_JWT_SECRET is not set")
+            key = self.secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = self._jwks_client().get_signing_key_from_jwt(token).key
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience or None,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub"], "verify_aud": bool(self.audience)},
+        )
+
+
+class RevocationCache:
+    """Sessions Supabase confirmed as active, each for `ttl` seconds."""
+
+    def __init__(self, ttl: float = None, max_entries: int = 10000):
+        self.ttl = ttl if ttl is not None else settings.AUTH_REVOCATION_CHECK_TTL
+        self.max_entries = max_entries
+        self._checked: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def is_fresh(self, session_key: str) -> bool:
+        expires = self._checked.get(session_key)
+        return expires is not None and expires > time.monotonic()
+
+    def mark(self, session_key: str):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._checked) >= self.max_entries:
+                self._checked = {k: v for k, v in self._checked.items() if v > now}
+                if len(self._checked) >= self.max_entries:
+                    self._checked.clear()
+            self._checked[session_key] = now + self.ttl
+
+
+def session_key(claims: dict, token: str) -> str:
+    """Supabase tokens carry their session id; older ones are keyed by the token itself."""
+    return claims.get("session_id") or token
+
+
+token_verifier = TokenVerifier()
+revocation_cache = RevocationCache()
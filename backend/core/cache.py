@@ -1,76 +1,441 @@
 """
 Redis Cache Service
 Provides caching functionality for high-frequency API endpoints.
+
+Entries can be tagged (user:{id}, project:{id}); each tag is a Redis set
+of the keys under it, and invalidate_tags() deletes exactly those keys, at
+a cost proportional to them rather than to the whole keyspace.
+
+get_or_compute() protects expensive entries from stampedes: one caller
+recomputes a missing entry while the others wait for it, hot entries are
+refreshed shortly before they expire (probabilistic early expiration),
+and an expired entry is served for a while longer as it is refreshed in
+the background.
+
+With CACHE_L1_ENABLED, a size-bounded in-process LRU (LocalCache) sits in
+front of Redis, so hot keys are served without a round-trip or
+decoding. Every set/delete is published on a Redis channel and each
+worker evicts the affected keys from its own L1.
+
+Values are stored as bytes by CacheCodec (see cache_codec), which picks
+the serializer and compression; entries in older formats stay readable.
 """
+import fnmatch
 import json
 import logging
-from typing import Optional, Any, Callable
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Any, Callable, NamedTuple
 from functools import wraps
 import redis
 from redis.exceptions import RedisError
+from backend.core.cache_codec import CacheCodec
 from backend.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+INVALIDATION_CHANNEL = "cache:invalidate"
+TAG_PREFIX = "tag:"
+_MISSING = object()
+# Marks values stored by get_or_compute, which carry their own expiry
+ENTRY_MARKER = "__cache_entry__"
+
+
+class Tagged(NamedTuple):
+    """What a get_or_compute() function returns when its tags depend on the result."""
+    value: Any
+    tags: list[str]
+
+
+def _untag(result) -> tuple[Any, list[str]]:
+    return (result.value, list(result.tags)) if isinstance(result, Tagged) else (result, [])
+
+
+def _is_entry(value) -> bool:
+    return isinstance(value, dict) and value.get(ENTRY_MARKER) == 1
+
+
+class LocalCache:
+    """
+    In-process LRU of decoded values with a TTL per entry (the L1 tier).
+    Values are shared between callers and must be treated as read-only.
+    Bounded by entry count and by total size, counted as the length of
+    each entry's serialized form.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, max_ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl  # Bounds staleness if an invalidation message is lost
+        self.bytes = 0
+        # Bumped by every invalidation; a fill that raced one is dropped
+        self.generation = 0
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Any:
+        """The cached value, or _MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self._counts["misses"] += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return entry[2]
+
+    def set(self, key: str, value: Any, ttl: float, size: int, generation: int = None):
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return  # Invalidated while the value was being fetched
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counts["evictions"] += 1
+
+    def _remove(self, key: str):
+        self.bytes -= self._entries.pop(key)[1]
+
+    def delete(self, keys) -> int:
+        with self._lock:
+            self.generation += 1
+            removed = [key for key in keys if key in self._entries]
+            for key in removed:
+                self._remove(key)
+            self._counts["invalidations"] += len(removed)
+            return len(removed)
+
+    def delete_pattern(self, pattern: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        return self.delete(keys)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counts, "entries": len(self._entries), "bytes": self.bytes}
+
 
 class RedisCache:
     """Redis cache manager with connection pooling"""
 
-    def __init__(self):
+    def __init__(self, host: str = None, port: int = None, local_cache: bool = None):
         self.client: Optional[redis.Redis] = None
-        self._connect()
-
-    def _connect(self):
+        self.local: Optional[LocalCache] = None
+        self._instance_id = uuid.uuid4().hex
+        self._listening = threading.Event()
+        self._closed = threading.Event()
+        self._inflight: dict[str, tuple[Future, bool]] = {}  # key: (result, whether the owner waits for the lock)
+        self._inflight_lock = threading.Lock()
+        self._refresher: Optional[ThreadPoolExecutor] = None
+        self.codec = CacheCodec()
+        self._connect(host or settings.REDIS_HOST, port or settings.REDIS_PORT)
+
+        if local_cache is None:
+            local_cache = settings.CACHE_L1_ENABLED
+        if self.client and local_cache:
+            self.local = LocalCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_MAX_BYTES, settings.CACHE_L1_MAX_TTL)
+            threading.Thread(target=self._listen, name="cache-invalidation", daemon=True).start()
+
+    def _connect(self, host: str, port: int):
         """Establish Redis connection"""
         try:
             self.client = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
+                host=host,
+                port=port,
                 db=settings.REDIS_DB,
                 password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-                decode_responses=True,
+                decode_responses=False,  # Values are binary; see cache_codec
                 socket_connect_timeout=5,
                 socket_keepalive=True,
                 health_check_interval=30,
             )
             # Test connection
             self.client.ping()
-            logger.info(f"✅ Redis connected: {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+            logger.info(f"✅ Redis connected: {host}:{port}")
         except RedisError as e:
             logger.warning(f"⚠️ Redis connection failed: {e}. Caching disabled.")
             self.client = None
 
+    def _l1(self) -> Optional[LocalCache]:
+        """The L1 tier, while invalidations are being received."""
+        return self.local if self._listening.is_set() else None
+
+    def _listen(self):
+        """Apply other workers' invalidations to the L1 tier; runs in a daemon thread."""
+        while not self._closed.is_set():
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                while not self._closed.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message:
+                        continue
+                    if message["type"] == "subscribe":
+                        # Anything published while unsubscribed was missed
+                        self.local.clear()
+                        self._listening.set()
+                    elif message["type"] == "message":
+                        self._apply_invalidation(message["data"])
+            except RedisError as e:
+                logger.warning(f"Cache invalidation channel lost: {e}. Local cache off until resubscribed.")
+                self._listening.clear()
+                self.local.clear()
+                self._closed.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except RedisError:
+                        pass
+        self._listening.clear()
+
+    def _apply_invalidation(self, data: str):
+        try:
+            message = json.loads(data)
+        except json.JSONDecodeError:
+            return
+        if message.get("origin") == self._instance_id:
+            return  # Already applied locally
+        if "pattern" in message:
+            self.local.delete_pattern(message["pattern"])
+        else:
+            self.local.delete(message.get("keys", []))
+
+    def _publish_invalidation(self, **message):
+        if not self.local:
+            return
+        try:
+            self.client.publish(INVALIDATION_CHANNEL, json.dumps({"origin": self._instance_id, **message}))
+        except RedisError as e:
+            logger.error(f"Cache invalidation publish error: {e}")
+
+    def close(self):
+        """Stop the invalidation listener (tests and shutdown)."""
+        self._closed.set()
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         if not self.client:
             return None
 
+        local = self._l1()
+        if local:
+            value = local.get(key)
+            if value is not _MISSING:
+                return value
+            generation = local.generation
+
         try:
-            value = self.client.get(key)
+            if local:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.pttl(key)
+                value, ttl_ms = pipe.execute()
+            else:
+                value = self.client.get(key)
             if value:
                 logger.debug(f"🎯 Cache HIT: {key}")
-                return json.loads(value)
+                decoded = self.codec.decode(value)
+                if local and ttl_ms > 0:
+                    local.set(key, decoded, ttl_ms / 1000, len(value), generation)
+                return decoded
             logger.debug(f"❌ Cache MISS: {key}")
             return None
-        except (RedisError, json.JSONDecodeError) as e:
+        except (RedisError, ValueError) as e:
             logger.error(f"Cache get error: {e}")
             return None
 
-    def set(self, key: str, value: Any, ttl: int = None) -> bool:
-        """Set value in cache with TTL"""
+    def set(self, key: str, value: Any, ttl: int = None, tags: list[str] = ()) -> bool:
+        """Set value in cache with TTL, registered under each of `tags`"""
         if not self.client:
             return False
 
         try:
             ttl = ttl or settings.CACHE_TTL
-            serialized = json.dumps(value, default=str)
-            self.client.setex(key, ttl, serialized)
+            serialized = self.codec.encode(value)
+            if tags:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.set(key, serialized, ex=ttl)
+                for tag in tags:
+                    tag_key = f"{TAG_PREFIX}{tag}"
+                    pipe.sadd(tag_key, key)
+                    # The index lives as long as its longest-lived entry
+                    pipe.expire(tag_key, ttl, nx=True)
+                    pipe.expire(tag_key, ttl, gt=True)
+                pipe.execute()
+            else:
+                self.client.set(key, serialized, ex=ttl)
             logger.debug(f"💾 Cache SET: {key} (TTL: {ttl}s)")
-            return True
         except (RedisError, TypeError) as e:
             logger.error(f"Cache set error: {e}")
             return False
 
+        if self.local:
+            self.local.delete([key])
+            self._publish_invalidation(keys=[key])
+            local = self._l1()
+            if local:
+                # The round-tripped form, as other readers get it
+                local.set(key, self.codec.decode(serialized), ttl, len(serialized), local.generation)
+        return True
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: int = None, tags: list[str] = (),
+                       stale_ttl: float = None) -> Any:
+        """
+        Cached result of compute(), which runs once per key at a time.
+
+        An entry records when it goes stale and how long compute() took.
+        Each read may refresh it early with a probability that rises as
+        expiry nears and with compute time (XFetch, CACHE_XFETCH_BETA).
+        After expiry it is served for stale_ttl more seconds while one
+        background thread refreshes it. On a miss, callers in this process
+        share one computation and other processes wait for it under a
+        Redis lock. compute() may return Tagged(value, tags) to add tags it
+        only learns while computing.
+        """
+        if not self.client:
+            return _untag(compute())[0]
+        ttl = ttl or settings.CACHE_TTL
+        stale_ttl = settings.CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+
+        entry = self.get(key)
+        if _is_entry(entry):
+            # XFetch: -log(u) for u in (0, 1] is exponentially distributed
+            early = entry["delta"] * settings.CACHE_XFETCH_BETA * -math.log(1.0 - random.random())
+            if time.time() + early < entry["expires"]:
+                return entry["value"]
+            # Expired or picked for early refresh: serve it, refresh once in the background
+            self._refresh_later(key, compute, ttl, tags, stale_ttl)
+            return entry["value"]
+        return self._single_flight(key, compute, ttl, tags, stale_ttl, wait=True)
+
+    def _refresh_later(self, key, compute, ttl, tags, stale_ttl):
+        with self._inflight_lock:
+            if key in self._inflight:
+                return
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+        def refresh():
+            try:
+                self._single_flight(key, compute, ttl, tags, stale_ttl, wait=False)
+            except Exception as e:
+                logger.error(f"Cache refresh of {key} failed: {e}")
+
+        self._refresher.submit(refresh)
+
+    def _single_flight(self, key, compute, ttl, tags, stale_ttl, wait: bool):
+        """Recompute `key` unless this process already is; waiters share the result."""
+        with self._inflight_lock:
+            running = self._inflight.get(key)
+            if running is None:
+                future = Future()
+                self._inflight[key] = (future, wait)
+        if running is not None:
+            future, owner_waits = running
+            if not wait:
+                return None
+            if owner_waits:
+                try:
+                    return future.result(timeout=settings.CACHE_LOCK_TIMEOUT)
+                except FutureTimeoutError:
+                    return _untag(compute())[0]
+            # A background refresh may give up without a value; compute on our own
+            return self._recompute(key, compute, ttl, tags, stale_ttl, wait)
+
+        try:
+            value = self._recompute(key, compute, ttl, tags, stale_ttl, wait)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _recompute(self, key, compute, ttl, tags, stale_ttl, wait: bool):
+        lock_key, token = f"lock:{key}", uuid.uuid4().hex
+        locked = self._acquire_lock(lock_key, token)
+        if not locked:
+            if not wait:
+                return None  # Another process is refreshing it
+            entry = self._wait_for_entry(key, lock_key)
+            if entry is not None:
+                return entry["value"]
+            # The lock holder failed or is too slow; the lock is only advisory
+
+        try:
+            start = time.monotonic()
+            value, extra_tags = _untag(compute())
+            entry = {
+                ENTRY_MARKER: 1,
+                "value": value,
+                "expires": time.time() + ttl,
+                "delta": round(time.monotonic() - start, 4),
+            }
+            # Kept past expiry so it can be served stale while refreshing
+            self.set(key, entry, ttl=ttl + math.ceil(stale_ttl), tags=[*tags, *extra_tags])
+            return value
+        finally:
+            if locked:
+                self._release_lock(lock_key, token)
+
+    def _acquire_lock(self, lock_key: str, token: str) -> bool:
+        try:
+            return bool(self.client.set(lock_key, token, nx=True, px=int(settings.CACHE_LOCK_TIMEOUT * 1000)))
+        except RedisError as e:
+            logger.error(f"Cache lock error: {e}")
+            return True  # Compute without it
+
+    def _release_lock(self, lock_key: str, token: str):
+        """Delete the lock only if it is still ours (it may have expired and been taken)."""
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(lock_key)
+                if pipe.get(lock_key) == token.encode():
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+        except RedisError as e:
+            logger.debug(f"Cache lock release error: {e}")
+
+    def _wait_for_entry(self, key: str, lock_key: str) -> Optional[dict]:
+        """The entry another process is computing, once stored; None if its lock goes away first."""
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.get(key)
+            if _is_entry(entry):
+                return entry
+            try:
+                if not self.client.exists(lock_key):
+                    return None
+            except RedisError:
+                return None
+        return None
+
     def delete(self, *keys: str) -> int:
         """Delete one or more keys from cache"""
         if not self.client or not keys:
@@ -79,37 +444,82 @@ class RedisCache:
         try:
             deleted = self.client.delete(*keys)
             logger.debug(f"🗑️ Cache DELETE: {keys} ({deleted} keys)")
-            return deleted
         except RedisError as e:
             logger.error(f"Cache delete error: {e}")
-            return 0
+            deleted = 0
+        if self.local:
+            self.local.delete(keys)
+            self._publish_invalidation(keys=list(keys))
+        return deleted
 
     def delete_pattern(self, pattern: str) -> int:
-        """Delete all keys matching pattern"""
+        """Delete all keys matching pattern (scans the whole keyspace; prefer invalidate_tags)"""
         if not self.client:
             return 0
 
+        deleted = 0
         try:
             keys = list(self.client.scan_iter(match=pattern))
             if keys:
                 deleted = self.client.delete(*keys)
                 logger.debug(f"🗑️ Cache DELETE pattern '{pattern}': {deleted} keys")
-                return deleted
-            return 0
         except RedisError as e:
             logger.error(f"Cache delete pattern error: {e}")
+        if self.local:
+            self.local.delete_pattern(pattern)
+            self._publish_invalidation(pattern=pattern)
+        return deleted
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry registered under any of `tags`; returns how many existed"""
+        if not self.client or not tags:
             return 0
 
+        tag_keys = [f"{TAG_PREFIX}{tag}" for tag in tags]
+        keys = []
+        deleted = 0
+        try:
+            # Read and drop the index atomically; entries set after this start a new one
+            pipe = self.client.pipeline(transaction=True)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            *members, _ = pipe.execute()
+            keys = sorted(key.decode() for key in set().union(*members))
+            if keys:
+                deleted = self.client.delete(*keys)
+            logger.debug(f"🗑️ Cache INVALIDATE tags {tags}: {deleted} keys")
+        except RedisError as e:
+            logger.error(f"Cache invalidate tags error: {e}")
+        if self.local and keys:
+            self.local.delete(keys)
+            self._publish_invalidation(keys=keys)
+        return deleted
+
+    def incr(self, key: str) -> Optional[int]:
+        """Increment a shared integer counter (not a cache entry); None without Redis"""
+        if not self.client:
+            return None
+        try:
+            return self.client.incr(key)
+        except RedisError as e:
+            logger.error(f"Cache incr error: {e}")
+            return None
+
+    def counters(self, *keys: str) -> Optional[dict[str, int]]:
+        """Current values of counters set by incr (0 if never incremented); None without Redis"""
+        if not self.client:
+            return None
+        try:
+            values = self.client.mget(keys) if keys else []
+        except RedisError as e:
+            logger.error(f"Cache counters error: {e}")
+            return None
+        return {key: int(value or 0) for key, value in zip(keys, values)}
+
     def clear_user_cache(self, user_id: str):
         """Clear all cache for a specific user"""
-        patterns = [
-            f"dashboard:stats:{user_id}",
-            f"projects:list:{user_id}:*",
-            f"documents:list:*:{user_id}",
-            f"user:profile:{user_id}",
-        ]
-        for pattern in patterns:
-            self.delete_pattern(pattern)
+        self.invalidate_tags(f"user:{user_id}")
         logger.info(f"🧹 Cleared cache for user: {user_id}")
 
     def health_check(self) -> bool:
@@ -126,17 +536,29 @@ class RedisCache:
 cache = RedisCache()
 
 
-def cached(key_prefix: str, ttl: int = None):
+def _format_all(templates, kwargs: dict) -> list[str]:
+    """Templates formatted with the call's keyword arguments; ones that do not fit are skipped."""
+    formatted = []
+    for template in templates or ():
+        try:
+            formatted.append(template.format(**kwargs))
+        except (KeyError, AttributeError, IndexError):
+            logger.warning(f"Cache tag {template!r} does not match the call's arguments")
+    return formatted
+
+
+def cached(key_prefix: str, ttl: int = None, tags: list[str] = None):
     """
     Decorator for caching function results.
 
     Usage:
-        @cached(key_prefix="my_function", ttl=60)
+        @cached(key_prefix="my_function", ttl=60, tags=["user:{user_id}"])
         def my_function(user_id: str):
             # expensive operation
             return result
 
     The cache key will be: {key_prefix}:{arg1}:{arg2}:...
+    Tags are formatted with the keyword arguments.
     """
     def decorator(func: Callable):
         @wraps(func)
@@ -157,37 +579,36 @@ def cached(key_prefix: str, ttl: int = None):
 
             cache_key = ":".join(key_parts)
 
-            # Try to get from cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl=ttl)
-            return result
+            # Computed once at a time, refreshed early or served stale near expiry
+            return cache.get_or_compute(
+                cache_key, lambda: func(*args, **kwargs), ttl=ttl, tags=_format_all(tags, kwargs),
+            )
 
         return wrapper
     return decorator
 
 
-def invalidate_on_change(patterns: list[str]):
+def invalidate_on_change(patterns: list[str] = None, tags: list[str] = None):
     """
-    Decorator to invalidate cache patterns after a mutation.
+    Decorator to invalidate cache tags (or patterns) after a mutation.
 
     Usage:
-        @invalidate_on_change(patterns=["projects:list:{user_id}:*"])
+        @invalidate_on_change(tags=["user:{user_id}"])
         def create_project(user_id: str, ...):
             # create project
             return project
+
+    Prefer tags: a pattern is matched by scanning the whole keyspace.
     """
     def decorator(func: Callable):
         @wraps(func)
         def wrapper(*args, **kwargs):
             result = func(*args, **kwargs)
 
+            cache.invalidate_tags(*_format_all(tags, kwargs))
+
             # Invalidate cache patterns
-            for pattern in patterns:
+            for pattern in patterns or ():
                 # Try to format pattern with function args if possible
                 try:
                     formatted_pattern = pattern.format(**kwargs)
@@ -22,19 +22,54 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY", "") # Anon Key for auth verification
     SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "") # Service Role Key bypasses RLS
     
-    # JWT Settings (If verifying locally without API call, need JWT_SECRET)
-    # But for now we will trust Supabase client based verification or simple decoding if secret provided
-    SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET", "") 
+    # JWT Settings: "remote" asks the Supabase Auth API on every request; "local" (opt-in) verifies
+    # access tokens in-process (HS256 with SUPABASE_JWT_SECRET, RS256/ES256 with the project's JWKS)
+    SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET", "")
+    AUTH_VERIFY_MODE: str = os.getenv("AUTH_VERIFY_MODE", "remote")
+    SUPABASE_JWT_AUDIENCE: str = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+    SUPABASE_JWKS_TTL: int = int(os.getenv("SUPABASE_JWKS_TTL", "600"))  # Seconds before signing keys are refetched
+    # Local mode: seconds a session confirmed by Supabase stays trusted (catches sign-outs; 0 = never ask)
+    AUTH_REVOCATION_CHECK_TTL: int = int(os.getenv("AUTH_REVOCATION_CHECK_TTL", "60"))
 
     # Azure OpenAI Settings
     AZURE_OPENAI_API_KEY: str = os.getenv("AZURE_OPENAI_API_KEY", "")
     AZURE_OPENAI_ENDPOINT: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
     AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
     AZURE_OPENAI_DEPLOYMENT: str = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4")
+    # Long documents are split into overlapping chunks that are analyzed concurrently
+    LLM_CHUNK_CHARS: int = int(os.getenv("LLM_CHUNK_CHARS", "12000"))
+    LLM_CHUNK_OVERLAP: int = int(os.getenv("LLM_CHUNK_OVERLAP", "500"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))  # Seconds per chunk request
+    # Stream completions so the worker can save each event as the model writes it
+    LLM_STREAMING: bool = os.getenv("LLM_STREAMING", "true").lower() == "true"
+    # Long documents are reduced to date/deadline lines plus context before they are sent
+    LLM_PREFILTER_ENABLED: bool = os.getenv("LLM_PREFILTER_ENABLED", "true").lower() == "true"
+    LLM_PREFILTER_CONTEXT_LINES: int = int(os.getenv("LLM_PREFILTER_CONTEXT_LINES", "2"))
+    LLM_PREFILTER_MIN_CHARS: int = int(os.getenv("LLM_PREFILTER_MIN_CHARS", "4000"))  # Shorter text is sent whole
+    # Rule-based events are saved before the LLM pass and stand in when the model is unavailable
+    RULE_EXTRACTION_ENABLED: bool = os.getenv("RULE_EXTRACTION_ENABLED", "true").lower() == "true"
+    # Extraction results are cached by content hash (Redis, backed by the llm_extraction_cache table)
+    EXTRACTION_CACHE_ENABLED: bool = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_TTL: int = int(os.getenv("EXTRACTION_CACHE_TTL", "604800"))  # Redis copy; 7 days
+    # Text extraction runs in a process pool off the event loop (0 = use a thread instead);
+    # the pool size is also how many ranges of one large PDF are extracted at once
+    EXTRACTION_POOL_SIZE: int = int(os.getenv("EXTRACTION_POOL_SIZE", "2"))
+    EXTRACTION_TIMEOUT: float = float(os.getenv("EXTRACTION_TIMEOUT", "300"))  # Seconds per document
+    # PDFs with at least this many pages are split into page ranges across the pool (0 = never)
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "100"))
+    # Uploads are queued in document_jobs and processed by `python -m backend.worker`
+    DOCUMENT_WORKER_CONCURRENCY: int = int(os.getenv("DOCUMENT_WORKER_CONCURRENCY", "2"))  # Documents at once per worker process
+    DOCUMENT_JOB_MAX_ATTEMPTS: int = int(os.getenv("DOCUMENT_JOB_MAX_ATTEMPTS", "3"))
+    DOCUMENT_JOB_VISIBILITY_TIMEOUT: int = int(os.getenv("DOCUMENT_JOB_VISIBILITY_TIMEOUT", "600"))  # Seconds a claim lasts without a heartbeat
+    DOCUMENT_JOB_RETRY_BASE_SECONDS: float = float(os.getenv("DOCUMENT_JOB_RETRY_BASE_SECONDS", "30"))  # Doubles per failed attempt
+    DOCUMENT_JOB_RETRY_MAX_SECONDS: float = float(os.getenv("DOCUMENT_JOB_RETRY_MAX_SECONDS", "1800"))
+    DOCUMENT_JOB_POLL_INTERVAL: float = float(os.getenv("DOCUMENT_JOB_POLL_INTERVAL", "2"))  # Seconds between polls of an empty queue
 
     # Line Messaging API
     LINE_CHANNEL_ACCESS_TOKEN: str = os.getenv("LINE_CHANNEL_ACCESS_TOKEN", "")
     LINE_CHANNEL_SECRET: str = os.getenv("LINE_CHANNEL_SECRET", "")
+    LINE_API_ENDPOINT: str = os.getenv("LINE_API_ENDPOINT", "https://api.line.me")
 
     # Email — supports "smtp" (Gmail) or "resend"
     EMAIL_PROVIDER: str = os.getenv("EMAIL_PROVIDER", "smtp")  # "smtp" or "resend"
@@ -45,10 +80,33 @@ class Settings(BaseSettings):
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")  # Gmail App Password
     SMTP_FROM_NAME: str = os.getenv("SMTP_FROM_NAME", "Smart Doc Tracker")
+    SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "true").lower() == "true"  # STARTTLS; disable only for local relays
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "2"))  # Reused authenticated sessions per account
+    SMTP_IDLE_TIMEOUT: float = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))  # Seconds before idle sessions close
 
     # Resend (alternative)
     RESEND_API_KEY: str = os.getenv("RESEND_API_KEY", "")
     RESEND_FROM_EMAIL: str = os.getenv("RESEND_FROM_EMAIL", "")
+    RESEND_BATCH_SIZE: int = int(os.getenv("RESEND_BATCH_SIZE", "100"))  # Provider max per batch call
+
+    # Deadline notifications
+    NOTIFICATION_SWEEP_MODE: str = os.getenv("NOTIFICATION_SWEEP_MODE", "sweep")  # "sweep" or "per_event"
+    # "rules" evaluates every open event daily; "schedule" reads precomputed reminder_schedule rows
+    # (run `python -m backend.services.reminder_schedule rebuild` once before switching)
+    NOTIFICATION_SWEEP_SOURCE: str = os.getenv("NOTIFICATION_SWEEP_SOURCE", "rules")
+    # Per-provider fan-out limits for the sweep dispatcher (rate = sends/sec, 0 = unlimited)
+    LINE_MAX_CONCURRENCY: int = int(os.getenv("LINE_MAX_CONCURRENCY", "4"))
+    LINE_RATE_LIMIT: float = float(os.getenv("LINE_RATE_LIMIT", "20"))
+    EMAIL_MAX_CONCURRENCY: int = int(os.getenv("EMAIL_MAX_CONCURRENCY", "2"))
+    EMAIL_RATE_LIMIT: float = float(os.getenv("EMAIL_RATE_LIMIT", "5"))
+    # Sweep log rows are claimed as "pending" before sending, then confirmed in batches
+    NOTIFICATION_LOG_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_LOG_BATCH_SIZE", "500"))
+    NOTIFICATION_LOG_FLUSH_INTERVAL: float = float(os.getenv("NOTIFICATION_LOG_FLUSH_INTERVAL", "2"))  # Seconds
+    NOTIFICATION_PENDING_TIMEOUT: int = int(os.getenv("NOTIFICATION_PENDING_TIMEOUT", "900"))  # Seconds a claim may go unrenewed before it counts as abandoned
+    # Multi-worker sweep: shards are leased per day so each process can run the job
+    NOTIFICATION_SWEEP_SHARDS: int = int(os.getenv("NOTIFICATION_SWEEP_SHARDS", "16"))
+    NOTIFICATION_SHARD_LEASE_SECONDS: int = int(os.getenv("NOTIFICATION_SHARD_LEASE_SECONDS", "600"))
+    NOTIFICATION_SWEEP_RECOVERY_MINUTES: int = int(os.getenv("NOTIFICATION_SWEEP_RECOVERY_MINUTES", "15"))  # Retry expired shards
 
     # Redis Settings
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
@@ -56,6 +114,20 @@ class Settings(BaseSettings):
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "300"))  # Default 5 minutes
+    # Stampede protection for computed entries (dashboard stats, project lists, @cached)
+    CACHE_STALE_TTL: int = int(os.getenv("CACHE_STALE_TTL", "60"))  # Seconds an expired entry is served while it refreshes
+    CACHE_XFETCH_BETA: float = float(os.getenv("CACHE_XFETCH_BETA", "1.0"))  # Early-refresh eagerness; 0 = refresh at expiry
+    CACHE_LOCK_TIMEOUT: float = float(os.getenv("CACHE_LOCK_TIMEOUT", "10"))  # Seconds a recompute lock is held / waited for
+    # Value encoding; entries written with other settings stay readable (see core/cache_codec.py)
+    # json, or opt in to orjson (faster; datetimes come back as "2026-10-17T09:00:00") or msgpack
+    CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "json")
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "none")  # none, zlib, zstd or lz4
+    CACHE_COMPRESS_MIN_BYTES: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "16384"))  # Smaller values are stored as is
+    # Optional in-process LRU in front of Redis, invalidated across workers over Redis pub/sub
+    CACHE_L1_ENABLED: bool = os.getenv("CACHE_L1_ENABLED", "false").lower() == "true"
+    CACHE_L1_MAX_ENTRIES: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "2000"))
+    CACHE_L1_MAX_BYTES: int = int(os.getenv("CACHE_L1_MAX_BYTES", str(64 * 1024 * 1024)))  # By serialized size
+    CACHE_L1_MAX_TTL: float = float(os.getenv("CACHE_L1_MAX_TTL", "30"))  # Seconds; bounds staleness if an invalidation is lost
 
     # App URL (used in emails, invitations, etc.)
     APP_URL: str = os.getenv("APP_URL", "https://5-78-118-41.sslip.io")
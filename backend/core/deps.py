@@ -1,9 +1,12 @@
 
 import logging
 from typing import Annotated
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from supabase import create_client, Client
+from backend.core.auth_tokens import revocation_cache, session_key, token_verifier
 from backend.core.config import settings
 from backend.schemas.user import CurrentUser
 
@@ -16,42 +19,82 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 # Note: For production, better to use a singleton
 supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY) if settings.SUPABASE_URL and settings.SUPABASE_KEY else None
 
+def _credentials_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _fetch_user(token: str) -> CurrentUser:
+    """Ask the Supabase Auth API who the token belongs to; it also rejects signed-out sessions."""
+    # Verify token by getting user from Supabase using the token
+    user_response = supabase.auth.get_user(token)
+    if not user_response or not user_response.user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    # Convert Supabase User to our CurrentUser schema
+    user_data = user_response.user
+    return CurrentUser(
+        id=user_data.id,
+        email=user_data.email or "",
+        phone=getattr(user_data, "phone", None),
+        email_confirmed_at=getattr(user_data, "email_confirmed_at", None),
+        created_at=getattr(user_data, "created_at", None),
+    )
+
+
+async def _verify_locally(token: str) -> CurrentUser:
+    try:
+        claims = token_verifier.verify(token)
+    except jwt.InvalidTokenError as e:
+        logger.info(f"Rejected token: {e}")
+        raise _credentials_error()
+
+    if revocation_cache.ttl > 0:
+        key = session_key(claims, token)
+        if not revocation_cache.is_fresh(key):
+            if not supabase:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service unavailable",
+                )
+            await run_in_threadpool(_fetch_user, token)
+            revocation_cache.mark(key)
+
+    return CurrentUser(
+        id=claims["sub"],
+        email=claims.get("email") or "",
+        phone=claims.get("phone") or None,
+    )
+
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> CurrentUser:
     """
     Validates the JWT token and returns the user object.
-    Uses Supabase Auth API to verify token and check revocation.
+
+    With AUTH_VERIFY_MODE=local the token is verified in-process
+    (core/auth_tokens.py) and Supabase is only asked every
+    AUTH_REVOCATION_CHECK_TTL seconds per session whether it was signed out.
+    Otherwise every request asks the Supabase Auth API.
     Returns a standardized CurrentUser schema.
     """
-    if not supabase:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Authentication service unavailable",
-        )
-
     try:
-        # Verify token by getting user from Supabase using the token
-        user_response = supabase.auth.get_user(token)
-        if not user_response or not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-
-        # Convert Supabase User to our CurrentUser schema
-        user_data = user_response.user
-        return CurrentUser(
-            id=user_data.id,
-            email=user_data.email or "",
-            phone=getattr(user_data, "phone", None),
-            email_confirmed_at=getattr(user_data, "email_confirmed_at", None),
-            created_at=getattr(user_data, "created_at", None),
-        )
+        if settings.AUTH_VERIFY_MODE == "local":
+            return await _verify_locally(token)
+
+        if not supabase:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service unavailable",
+            )
+        return await run_in_threadpool(_fetch_user, token)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Auth Error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_error()
 
 
 async def require_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
@@ -5,6 +5,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from backend.api.v1.api import api_router
 from backend.core.config import settings
 from backend.core.cache import cache
+from backend.services.extraction_cache import chunk_cache, extraction_cache
 from backend.services.notification import NotificationService
 
 # Initialize Scheduler
@@ -22,6 +23,11 @@ async def lifespan(app: FastAPI):
 
     # Schedule deadline check daily at 09:00
     scheduler.add_job(notification_service.check_deadlines, 'cron', hour=9, minute=0)
+    # Re-run shards of today's sweep left behind by a crashed worker
+    scheduler.add_job(
+        notification_service.resume_deadline_sweep, 'interval',
+        minutes=settings.NOTIFICATION_SWEEP_RECOVERY_MINUTES,
+    )
     # For testing: run every minute? No.
     scheduler.start()
     print("Scheduler started!")
@@ -58,5 +64,10 @@ def health_check():
     return {
         "status": "ok",
         "redis": redis_status,
-        "cache_enabled": cache.client is not None
+        "cache_enabled": cache.client is not None,
+        "local_cache": cache.local.stats() if cache.local else None,
+        "extraction_cache": {
+            "documents": extraction_cache.stats(),
+            "chunks": chunk_cache.stats(),
+        },
     }
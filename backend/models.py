@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, Integer, Date, DateTime, Boolean, ForeignKey, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -57,15 +57,28 @@ class DeadlineEvent(Base):
     document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id"), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    due_date = Column(String, nullable=False) # ISO 8601 Date String (YYYY-MM-DD)
+    due_date = Column(Date, nullable=True) # NULL when the source date could not be parsed
+    due_date_raw = Column(String, nullable=True) # Original text of an unparseable due date
     status = Column(String, default="pending") # pending, completed
     confidence_score = Column(Integer, default=0) # AI confidence (0-100)
     source_text = Column(Text, nullable=True) # Text snippet justifying this event
+    extraction_source = Column(String, nullable=False, default="llm", server_default="llm") # llm, rules (replaced once the LLM pass finishes)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     document = relationship("Document", backref="events")
 
+    __table_args__ = (
+        # Dashboard overdue/upcoming counts: document_id IN (...) + status + due_date range
+        Index("idx_deadline_events_document_status_due", "document_id", "status", "due_date"),
+        # Deadline sweep: open events in a due_date window
+        Index(
+            "idx_deadline_events_open_due", "due_date",
+            postgresql_where=text("status <> 'completed'"),
+            sqlite_where=text("status <> 'completed'"),
+        ),
+    )
+
 # Notification Rule
 class NotificationRule(Base):
     __tablename__ = "notification_rules"
@@ -76,6 +89,7 @@ class NotificationRule(Base):
     severity = Column(String, default="info") # info, warning, critical
     is_active = Column(Boolean, default=True)
     channels = Column(JSONB, server_default='["line", "email"]', nullable=False)  # ["line"], ["email"], ["line", "email"]
+    digest = Column(Boolean, default=False, nullable=False)  # Fold matches into one reminder per user per day
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -111,7 +125,78 @@ class NotificationLog(Base):
     message = Column(Text, nullable=True)  # The actual message content
     error_message = Column(Text, nullable=True)  # Error if failed
     sent_at = Column(DateTime(timezone=True), server_default=func.now())
+    send_key = Column(String, nullable=True)  # "user:event:channel:date", unique while sent/pending
+    claim_renewed_at = Column(DateTime(timezone=True), nullable=True)  # Heartbeat of the run holding a pending claim
 
     # Relationships
     user = relationship("Profile", backref="notification_logs")
     event = relationship("DeadlineEvent", backref="notification_logs")
+
+    __table_args__ = (
+        Index(
+            "uq_notification_logs_send_key", "send_key", unique=True,
+            postgresql_where=text("status IN ('sent', 'pending')"),
+            sqlite_where=text("status IN ('sent', 'pending')"),
+        ),
+    )
+
+# Precomputed reminder fire dates, one row per (event, user, channel, day)
+class ReminderSchedule(Base):
+    __tablename__ = "reminder_schedule"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_id = Column(UUID(as_uuid=True), ForeignKey("deadline_events.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    channel = Column(String, nullable=False)  # 'line' or 'email'
+    fire_date = Column(Date, nullable=False)
+    digest = Column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("idx_reminder_schedule_fire_date", "fire_date"),
+        Index("idx_reminder_schedule_event_id", "event_id"),
+    )
+
+# Per-day shard leases for the multi-worker deadline sweep
+class SweepShardLease(Base):
+    __tablename__ = "sweep_shard_leases"
+
+    run_date = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    shard_count = Column(Integer, nullable=False)
+    worker_id = Column(String, nullable=True)  # "hostname:pid" of the current holder
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+# Cached LLM extraction results, keyed by content hash (see services/extraction_cache.py)
+class LLMExtractionCache(Base):
+    __tablename__ = "llm_extraction_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of prompt version, deployment and normalized text
+    prompt_version = Column(String, nullable=False)
+    deployment = Column(String, nullable=False)
+    events = Column(JSONB, nullable=False)  # Parsed event list as returned by the model
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Durable document-processing queue, drained by `python -m backend.worker` (see services/document_jobs.py)
+class DocumentJob(Base):
+    __tablename__ = "document_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    storage_path = Column(String, nullable=False)  # Uploaded file in the "documents" bucket
+    file_type = Column(String, nullable=False)  # pdf, docx, doc
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime(timezone=True), nullable=False)  # Not claimable before this (retry backoff)
+    worker_id = Column(String, nullable=True)  # "hostname:pid/slot" of the current holder
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # Visibility timeout of a running job
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_document_jobs_status_run_after", "status", "run_after"),
+        Index("idx_document_jobs_document_id", "document_id"),
+    )
@@ -1,17 +1,26 @@
 
+from datetime import date
 from typing import Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class EventUpdate(BaseModel):
     """Schema for updating a deadline event."""
     title: Optional[str] = None
-    due_date: Optional[str] = None
+    due_date: Optional[date] = None  # YYYY-MM-DD
     status: Optional[Literal["pending", "confirmed", "completed"]] = None
     description: Optional[str] = None
     source_text: Optional[str] = None
     confidence_score: Optional[int] = Field(None, ge=0, le=100)
 
+    @field_validator("due_date", mode="before")
+    @classmethod
+    def blank_due_date_is_none(cls, value):
+        # The event editor sends "" for events without a date
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
 
 class DocumentUpdate(BaseModel):
     """Schema for updating a document's metadata."""
@@ -0,0 +1,157 @@
+"""
+Chunking for LLM extraction.
+
+Long documents are split into overlapping chunks so each can be analyzed by
+its own request. Chunk boundaries are content-defined: a chunk ends at a
+page break or line chosen by hashing the text before it, never at a fixed
+offset. An amendment on one page therefore changes only the
+chunks around it, and every other chunk keeps the same text (and cache key)
+as in the previous revision. Events found in several chunks, typically in
+the overlap, are merged back into one.
+"""
+import re
+import zlib
+from backend.services.dates import parse_date_text
+
+PAGE_BREAK = "\f"
+# Fallback split points for a single line longer than a chunk, strongest first
+BOUNDARIES = ["。", ". ", " "]
+_LINE_END = re.compile(r"[\n\f]")
+
+
+def _chunk_end(text: str, start: int, limit: int) -> int:
+    if limit >= len(text):
+        return len(text)
+    floor = start + (limit - start) // 2
+    for boundary in BOUNDARIES:
+        idx = text.rfind(boundary, floor, limit)
+        if idx != -1:
+            return idx + len(boundary)
+    return limit
+
+
+def _is_anchor(content: str, weight: int, average: int) -> bool:
+    """
+    Content-defined cut: a boundary qualifies when the hash of the content
+    before it falls in a 1-in-N bucket, N chosen so that about one boundary
+    per `average` characters of `weight` qualifies. N is at least 2 so the
+    choice always depends on content, never only on position.
+    """
+    content = content.strip()
+    if not content:
+        return False
+    period = max(2, average // max(weight, 1))
+    return zlib.crc32(content.encode("utf-8")) % period == 0
+
+
+def _cut_points(text: str, limit: int) -> list[int]:
+    """
+    End offsets of chunks of at most `limit` characters. Once a chunk is a
+    quarter full it ends at the next anchor: a page break or line picked by
+    _is_anchor, with page breaks weighted double so they are preferred. If
+    no anchor comes before the limit it ends after the last whole line that
+    fits.
+    """
+    # Small minimum relative to the average so boundaries realign soon after an edit
+    floor = limit // 4
+    average = limit // 4
+    cuts = []
+    start = pos = page_start = 0
+    fallback = None
+    while pos < len(text):
+        match = _LINE_END.search(text, pos)
+        end = match.end() if match else len(text)
+        if end - start > limit:
+            cut = fallback or _chunk_end(text, start, start + limit)
+            cuts.append(cut)
+            start = pos = cut
+            fallback = None
+            continue
+        is_page_end = text[end - 1] == PAGE_BREAK
+        if end - start >= floor:
+            if is_page_end:
+                anchor = _is_anchor(text[max(page_start, end - 256):end], 2 * (end - page_start), average)
+            else:
+                anchor = _is_anchor(text[pos:end], end - pos, average)
+            if anchor:
+                cuts.append(end)
+                start = end
+                fallback = None
+            else:
+                fallback = end
+        if is_page_end:
+            page_start = end
+        pos = end
+    if start < len(text):
+        cuts.append(len(text))
+    return cuts
+
+
+def _line_start(text: str, low: int, high: int) -> int:
+    """First line start in [low, high), or low if there is none."""
+    match = _LINE_END.search(text, low, high)
+    return match.end() if match and match.end() < high else low
+
+
+def split_text(text: str, max_chars: int, overlap: int = 0) -> list[str]:
+    """
+    Split text into chunks of at most max_chars characters. Each chunk also
+    repeats roughly the last `overlap` characters of the previous one so an
+    event straddling a boundary is seen whole by at least one of them.
+    """
+    if not text or not text.strip():
+        return []
+    overlap = min(overlap, max_chars // 4)
+    chunks = []
+    prev = 0
+    for cut in _cut_points(text, max_chars - overlap):
+        if text[prev:cut].strip():
+            start = _line_start(text, prev - overlap, prev) if prev and overlap else prev
+            chunks.append(text[start:cut])
+        prev = cut
+    return chunks
+
+
+def _normalize(value) -> str:
+    """Case-, whitespace- and punctuation-insensitive form for comparisons."""
+    return re.sub(r"[\W_]+", "", str(value or "").casefold())
+
+
+def _date_key(value) -> str:
+    parsed = parse_date_text(value)
+    return parsed.isoformat() if parsed else _normalize(value)
+
+
+def event_key(event: dict) -> str:
+    """Stable identity of an event across requests: normalized title and date."""
+    return f"{_normalize(event.get('title'))}|{_date_key(event.get('due_date'))}"
+
+
+def merge_events(chunk_events: list[list[dict]]) -> list[dict]:
+    """
+    Flatten per-chunk results, dropping duplicates: events with the same
+    normalized title and date, or the same source text and date, are one
+    event. The copy with the highest confidence_score is kept, in the
+    position where the event was first seen.
+    """
+    merged: list[dict] = []
+    index: dict = {}
+    for events in chunk_events:
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            date_key = _date_key(event.get("due_date"))
+            keys = [("title", _normalize(event.get("title")), date_key)]
+            source = _normalize(event.get("source_text"))
+            if source:
+                keys.append(("source", source, date_key))
+
+            position = next((index[k] for k in keys if k in index), None)
+            if position is None:
+                position = len(merged)
+                merged.append(event)
+            elif (event.get("confidence_score") or 0) > (merged[position].get("confidence_score") or 0):
+                merged[position] = event
+            for key in keys:
+                index.setdefault(key, position)
+    return merged
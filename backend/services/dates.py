@@ -0,0 +1,45 @@
+"""
+Due date normalization.
+
+deadline_events.due_date is a DATE column. Dates arrive as text (LLM output,
+API payloads), so they are normalized here before they are written; text
+that is not a recognizable calendar date is kept in due_date_raw instead and
+the event is left without a due date until someone fixes it.
+"""
+import re
+from datetime import date, datetime
+
+_DATE_PREFIX = re.compile(r"^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})")
+
+
+def parse_date_text(value) -> date | None:
+    """
+    Read a calendar date from YYYY-MM-DD text (also "/" or "." separated,
+    optionally followed by a time). Returns None if it is not a valid date.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+    match = _DATE_PREFIX.match(value)
+    if not match:
+        return None
+    try:
+        return date(*(int(part) for part in match.groups()))
+    except ValueError:  # e.g. 2026-02-30
+        return None
+
+
+def normalize_due_date(value) -> tuple[date | None, str | None]:
+    """
+    Split an incoming due date into (due_date, due_date_raw): the parsed
+    date, or None plus the original text when it cannot be parsed.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None, None
+    parsed = parse_date_text(value)
+    if parsed is None:
+        return None, str(value)
+    return parsed, None
@@ -0,0 +1,125 @@
+"""
+Concurrent, rate-limited fan-out for outbound notifications.
+
+Each provider (LINE, email) gets its own bounded worker pool and token bucket,
+so a slow SMTP server never holds up LINE pushes and provider quotas are
+respected while sends overlap.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket. rate <= 0 disables limiting."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class ProviderLimit:
+    concurrency: int = 1
+    rate: float = 0  # sends per second, 0 = unlimited
+    burst: Optional[float] = None
+
+
+@dataclass
+class DispatchJob:
+    provider: str
+    send: Callable[[], Any]
+    context: Any = None  # Opaque data handed back with the result
+
+
+@dataclass
+class DispatchResult:
+    job: DispatchJob
+    value: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def default_limits() -> dict[str, ProviderLimit]:
+    return {
+        "line": ProviderLimit(settings.LINE_MAX_CONCURRENCY, settings.LINE_RATE_LIMIT),
+        "email": ProviderLimit(settings.EMAIL_MAX_CONCURRENCY, settings.EMAIL_RATE_LIMIT),
+    }
+
+
+class NotificationDispatcher:
+    """Runs send jobs on per-provider worker pools with token-bucket rate limits."""
+
+    def __init__(self, limits: dict[str, ProviderLimit] = None):
+        self.limits = limits or default_limits()
+        self._buckets = {
+            name: TokenBucket(limit.rate, limit.burst) for name, limit in self.limits.items()
+        }
+
+    def _run_one(self, job: DispatchJob) -> DispatchResult:
+        bucket = self._buckets.get(job.provider)
+        if bucket:
+            bucket.acquire()
+        try:
+            return DispatchResult(job=job, value=job.send())
+        except Exception as e:
+            return DispatchResult(job=job, error=e)
+
+    def run(self, jobs: list[DispatchJob]) -> list[DispatchResult]:
+        """Run all jobs and return their results in the same order."""
+        order = {id(job): i for i, job in enumerate(jobs)}
+        return sorted(self.iter_results(jobs), key=lambda r: order[id(r.job)])
+
+    def iter_results(self, jobs: list[DispatchJob]) -> Iterator[DispatchResult]:
+        """Run all jobs, yielding each result as soon as it completes."""
+        if not jobs:
+            return
+
+        providers = {job.provider for job in jobs}
+        pools = {
+            name: ThreadPoolExecutor(
+                max_workers=max(1, self.limits.get(name, ProviderLimit()).concurrency),
+                thread_name_prefix=f"dispatch-{name}",
+            )
+            for name in providers
+        }
+        failed = 0
+        try:
+            futures = [pools[job.provider].submit(self._run_one, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                failed += not result.ok
+                yield result
+        finally:
+            # Closing the iterator early cancels the jobs that have not started
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        logger.info(f"Dispatched {len(jobs)} jobs ({failed} failed) across {sorted(providers)}")
@@ -0,0 +1,184 @@
+"""
+Durable queue for document processing (the document_jobs table).
+
+upload_document stores the file and enqueues a job instead of running a
+FastAPI background task, so a restart of the API process loses nothing and
+parse throughput scales by adding worker processes (`python -m
+backend.worker`), not web replicas.
+
+Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+workers take different jobs without waiting on each other. A claim is a
+lease of DOCUMENT_JOB_VISIBILITY_TIMEOUT seconds that the worker renews
+while it runs; if the worker crashes or hangs, the job becomes visible again
+when the lease expires. A failed attempt is retried after an exponential
+backoff until DOCUMENT_JOB_MAX_ATTEMPTS is reached.
+
+documents.status follows the job: "processing" while it is queued, running
+or waiting to retry, then "completed" or "error".
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.models import Document, DocumentJob
+from backend.services.sweep_leases import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class PermanentJobError(Exception):
+    """A failure that retrying cannot fix, e.g. a file with no extractable text."""
+
+
+class ClaimedJob(NamedTuple):
+    id: uuid.UUID
+    document_id: uuid.UUID
+    storage_path: str
+    file_type: str
+    attempts: int
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next try after `attempts` failed attempts."""
+    delay = settings.DOCUMENT_JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1)
+    return min(delay, settings.DOCUMENT_JOB_RETRY_MAX_SECONDS)
+
+
+class DocumentJobQueue:
+    """Enqueues, claims and settles document jobs for one worker."""
+
+    def __init__(self, db: Session, worker_id: str = None, visibility_timeout: float = None):
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+        self.visibility_timeout = visibility_timeout if visibility_timeout is not None else settings.DOCUMENT_JOB_VISIBILITY_TIMEOUT
+
+    def enqueue(self, document_id, storage_path: str, file_type: str) -> uuid.UUID:
+        job = DocumentJob(
+            id=uuid.uuid4(),
+            document_id=uuid.UUID(str(document_id)),
+            storage_path=storage_path,
+            file_type=file_type,
+            status=QUEUED,
+            attempts=0,
+            max_attempts=settings.DOCUMENT_JOB_MAX_ATTEMPTS,
+            run_after=datetime.now(timezone.utc),
+        )
+        self.db.add(job)
+        self.db.commit()
+        return job.id
+
+    def claim(self) -> ClaimedJob | None:
+        """
+        Lease the oldest job that is due, or whose previous holder's lease
+        expired. Returns None when nothing is claimable.
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            job = self.db.query(DocumentJob) \
+                .filter(or_(
+                    and_(DocumentJob.status == QUEUED, DocumentJob.run_after <= now),
+                    and_(DocumentJob.status == RUNNING, DocumentJob.lease_expires_at < now),
+                )) \
+                .order_by(DocumentJob.run_after) \
+                .with_for_update(skip_locked=True) \
+                .first()
+            if job is None:
+                self.db.commit()
+                return None
+
+            if job.status == RUNNING:
+                logger.warning(f"Reclaiming document job {job.id} from {job.worker_id} (lease expired)")
+                if job.attempts >= job.max_attempts:
+                    # The last attempt never reported back; don't let one file take down workers forever
+                    self._settle(job, FAILED, "Worker lost the job on its final attempt")
+                    self.db.commit()
+                    continue
+
+            job.status = RUNNING
+            job.worker_id = self.worker_id
+            job.lease_expires_at = now + timedelta(seconds=self.visibility_timeout)
+            job.attempts += 1
+            claimed = ClaimedJob(job.id, job.document_id, job.storage_path, job.file_type, job.attempts)
+            self.db.commit()
+            return claimed
+
+    def _held(self, job_id):
+        """The job row, locked, if this worker still holds its lease."""
+        return self.db.query(DocumentJob) \
+            .filter(
+                DocumentJob.id == job_id,
+                DocumentJob.status == RUNNING,
+                DocumentJob.worker_id == self.worker_id,
+            ) \
+            .with_for_update() \
+            .first()
+
+    def heartbeat(self, job_id) -> bool:
+        """Extend the lease. False means the lease was lost to another worker."""
+        updated = self.db.query(DocumentJob) \
+            .filter(
+                DocumentJob.id == job_id,
+                DocumentJob.status == RUNNING,
+                DocumentJob.worker_id == self.worker_id,
+            ) \
+            .update(
+                {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.visibility_timeout)},
+                synchronize_session=False,
+            )
+        self.db.commit()
+        return bool(updated)
+
+    def complete(self, job_id) -> bool:
+        job = self._held(job_id)
+        if job is None:
+            self.db.commit()
+            return False
+        self._settle(job, SUCCEEDED)
+        self.db.commit()
+        return True
+
+    def fail(self, job_id, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed attempt: requeue it with backoff, or fail the job
+        (and its document) when retry is False or attempts are used up.
+        """
+        job = self._held(job_id)
+        if job is None:
+            self.db.commit()
+            return False
+        if retry and job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            job.status = QUEUED
+            job.worker_id = None
+            job.lease_expires_at = None
+            job.last_error = error
+            job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            logger.warning(f"Document job {job.id} attempt {job.attempts} failed; retrying in {delay:.0f}s: {error}")
+        else:
+            self._settle(job, FAILED, error)
+            logger.error(f"Document job {job.id} failed after {job.attempts} attempts: {error}")
+        self.db.commit()
+        return True
+
+    def _settle(self, job: DocumentJob, status: str, error: str = None):
+        job.status = status
+        job.worker_id = None
+        job.lease_expires_at = None
+        job.finished_at = datetime.now(timezone.utc)
+        if error:
+            job.last_error = error
+        document = {"status": "completed"} if status == SUCCEEDED else {
+            "status": "error",
+            "raw_content": f"Processing error: {error}",
+        }
+        self.db.query(Document) \
+            .filter(Document.id == job.document_id) \
+            .update(document, synchronize_session=False)
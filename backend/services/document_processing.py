@@ -0,0 +1,156 @@
+"""
+Processing of one uploaded document, run by the document worker:
+
+1. Download the file from storage to a temp file
+2. Extract its text (PDF/DOCX/DOC) in the extraction pool
+3. Save rule-based events right away (services/rule_extractor.py)
+4. Analyze the text with the LLM, saving each event as it streams in
+5. Reconcile with the final, merged result: events it does not contain
+   are deleted
+
+Status bookkeeping belongs to the job queue (services/document_jobs.py):
+process_document raises on failure and the queue decides whether to retry.
+"""
+import logging
+import os
+import tempfile
+import threading
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+from supabase import create_client, Client
+from backend.core.config import settings
+from backend.services.chunking import event_key
+from backend.services.dates import normalize_due_date
+from backend.services.document_jobs import ClaimedJob, PermanentJobError
+from backend.services.extraction_pool import extraction_pool
+from backend.services.parser import parser_service
+from backend.services.reminder_schedule import refresh_reminders
+from backend.services.rule_extractor import extract_events
+
+logger = logging.getLogger(__name__)
+
+# Service Role Key bypasses RLS for backend operations
+supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY) if settings.SUPABASE_URL and settings.SUPABASE_SERVICE_ROLE_KEY else None
+
+
+def remove_spooled(path: str):
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Failed to remove spooled upload {path}: {e}")
+
+
+def download_upload(storage_path: str, file_type: str) -> str:
+    """Fetch an uploaded file from storage into a temp file; returns its path."""
+    content = supabase.storage.from_("documents").download(storage_path)
+    with tempfile.NamedTemporaryFile(prefix="job-", suffix=f".{file_type}", delete=False) as tmp:
+        tmp.write(content)
+        return tmp.name
+
+
+class EventWriter:
+    """
+    Saves one document's events as they are found. Row ids are derived from
+    the document and the event's title and date, so the same event reported
+    twice (streamed, then in the final result) is upserted onto one row.
+    """
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self.saved: set[str] = set()
+        self._lock = threading.Lock()
+
+    def event_id(self, event: dict) -> str:
+        source = event.get("extraction_source", "llm")
+        return str(uuid.uuid5(uuid.UUID(self.document_id), f"{source}|{event_key(event)}"))
+
+    def save(self, events_data: list[dict]) -> list[str]:
+        """Insert events not saved yet; returns the ids of all of them."""
+        rows = {}
+        for event in events_data:
+            event_id = self.event_id(event)
+            if event_id in rows:
+                continue
+            due_date, due_date_raw = normalize_due_date(event.get("due_date"))
+            rows[event_id] = {
+                "id": event_id,
+                "document_id": self.document_id,
+                "title": event.get("title", "Untitled Event"),
+                "due_date": due_date.isoformat() if due_date else None,
+                "due_date_raw": due_date_raw,
+                "status": "pending",
+                "confidence_score": event.get("confidence_score", 0),
+                "source_text": (event.get("source_text") or "")[:500],
+                "description": event.get("description"),
+                "extraction_source": event.get("extraction_source", "llm"),
+            }
+
+        with self._lock:
+            new_rows = [row for event_id, row in rows.items() if event_id not in self.saved]
+            self.saved.update(row["id"] for row in new_rows)
+        if new_rows:
+            try:
+                # Ids are deterministic: a row left by an earlier attempt is kept as is
+                supabase.table("deadline_events").upsert(new_rows, ignore_duplicates=True).execute()
+            except Exception:
+                with self._lock:
+                    self.saved.difference_update(row["id"] for row in new_rows)
+                raise
+            logger.info(f"Saved {len(new_rows)} deadline events for doc {self.document_id}")
+        return list(rows)
+
+    def add(self, event: dict):
+        """Streaming callback: save one event the moment the model has written it."""
+        try:
+            self.save([event])
+        except Exception as e:
+            # The final save retries it
+            logger.warning(f"Failed to save streamed event for doc {self.document_id}: {e}")
+
+
+async def process_document(job: ClaimedJob):
+    if not supabase:
+        raise RuntimeError("Supabase client not initialized")
+
+    document_id = str(job.document_id)
+    logger.info(f"Processing doc {document_id} (type: {job.file_type}, attempt {job.attempts})")
+
+    file_path = await run_in_threadpool(download_upload, job.storage_path, job.file_type)
+    try:
+        # Read page by page from disk, in the extraction pool
+        text = await extraction_pool.extract_text(file_path, job.file_type)
+    finally:
+        remove_spooled(file_path)
+
+    if not text:
+        raise PermanentJobError("Failed to extract text from document")
+
+    # Save extracted text
+    supabase.table("documents").update({
+        "raw_content": text[:10000]
+    }).eq("id", document_id).execute()
+
+    if job.attempts > 1:
+        # An earlier attempt may have saved its events before failing
+        supabase.table("deadline_events").delete().eq("document_id", document_id).execute()
+
+    writer = EventWriter(document_id)
+    # Instant rule-based first pass, so events show up before the LLM finishes
+    if settings.RULE_EXTRACTION_ENABLED:
+        writer.save(await run_in_threadpool(extract_events, text))
+
+    # Streamed events are saved as the model writes them
+    events_data = await run_in_threadpool(parser_service.analyze_text_with_llm, text, writer.add)
+    logger.info(f"Extracted {len(events_data)} events for doc {document_id}")
+    final_ids = set(writer.save(events_data))
+
+    superseded = list(writer.saved - final_ids)
+    if superseded:
+        # First-pass and streamed events the final result merged or dropped;
+        # ones a user already acted on are kept
+        supabase.table("deadline_events").delete() \
+            .in_("id", superseded).eq("status", "pending").execute()
+
+    # Once per document, not per streamed batch
+    await run_in_threadpool(refresh_reminders, event_ids=list(writer.saved))
@@ -1,6 +1,8 @@
 import json
 import logging
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from backend.core.config import settings
@@ -8,6 +10,150 @@ from backend.core.config import settings
 logger = logging.getLogger(__name__)
 
 
+class SmtpConnectionPool:
+    """
+    Small pool of authenticated SMTP sessions reused across messages.
+
+    Sessions are health-checked with RSET on checkout and replaced when the
+    server has dropped them. Sessions idle longer than idle_timeout are closed
+    by a background reaper.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        use_tls: bool = True,
+        max_size: int = 2,
+        idle_timeout: float = 60,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.handshakes = 0  # Connect + STARTTLS + login sequences performed
+
+        self._idle: list[tuple[smtplib.SMTP, float]] = []  # (session, last_used)
+        self._slots = threading.BoundedSemaphore(max(1, max_size))
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.user, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            self.handshakes += 1
+        logger.debug(f"[SMTP] Opened session to {self.host}:{self.port}")
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self) -> smtplib.SMTP:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+            if now - last_used > self.idle_timeout:
+                self._close(server)
+                continue
+            try:
+                server.rset()
+                return server
+            except (smtplib.SMTPException, OSError) as e:
+                logger.info(f"[SMTP] Pooled session unusable ({e}), reconnecting")
+                self._close(server)
+        return self._connect()
+
+    def _checkin(self, server: smtplib.SMTP):
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="smtp-pool-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 0.05))
+            cutoff = time.monotonic() - self.idle_timeout
+            with self._lock:
+                expired = [s for s, used in self._idle if used < cutoff]
+                self._idle = [(s, used) for s, used in self._idle if used >= cutoff]
+            for server in expired:
+                self._close(server)
+                logger.debug(f"[SMTP] Closed idle session to {self.host}:{self.port}")
+
+    def sendmail(self, from_addr: str, to_addrs, msg: str):
+        """Send one message on a pooled session, reconnecting once if it was dropped."""
+        with self._slots:
+            server = self._checkout()
+            try:
+                server.sendmail(from_addr, to_addrs, msg)
+            except smtplib.SMTPServerDisconnected:
+                self._close(server)
+                server = self._connect()
+                try:
+                    server.sendmail(from_addr, to_addrs, msg)
+                except Exception:
+                    self._close(server)
+                    raise
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # Message rejected, but the session itself is still fine
+                self._checkin(server)
+                raise
+            except Exception:
+                self._close(server)
+                raise
+            self._checkin(server)
+
+    def close(self):
+        """Close all idle sessions."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+
+_smtp_pools: dict[tuple, SmtpConnectionPool] = {}
+_smtp_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(host: str, port: int, user: str, password: str, use_tls: bool = True) -> SmtpConnectionPool:
+    """Shared pool per SMTP account, so short-lived EmailService instances reuse sessions."""
+    key = (host, port, user, password, use_tls)
+    with _smtp_pools_lock:
+        pool = _smtp_pools.get(key)
+        if pool is None:
+            pool = SmtpConnectionPool(
+                host, port, user, password, use_tls,
+                max_size=settings.SMTP_POOL_SIZE,
+                idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+            )
+            _smtp_pools[key] = pool
+        return pool
+
+
 class EmailService:
     """Email service that reads config from system_settings DB table, with .env fallback."""
 
@@ -18,6 +164,7 @@ class EmailService:
         self._smtp_user = settings.SMTP_USER
         self._smtp_password = settings.SMTP_PASSWORD
         self._smtp_from_name = settings.SMTP_FROM_NAME
+        self._smtp_use_tls = settings.SMTP_USE_TLS
         self._resend_api_key = settings.RESEND_API_KEY
         self._resend_from_email = settings.RESEND_FROM_EMAIL
 
@@ -96,6 +243,17 @@ class EmailService:
             logger.info(f"[Email SKIP] {self.provider} not configured. Would send to {to_email}: {task_title}")
             return False
 
+        subject, html = self.render_deadline_reminder(project_name, task_title, due_date, days_left)
+        return self._send(to_email, subject, html)
+
+    def render_deadline_reminder(
+        self,
+        project_name: str,
+        task_title: str,
+        due_date: str,
+        days_left: int,
+    ) -> tuple[str, str]:
+        """Build (subject, html) for a deadline reminder."""
         if days_left > 0:
             subject = f"[提醒] {task_title} — 還有 {days_left} 天到期"
             urgency_text = f"距離截止日還有 <strong>{days_left} 天</strong>"
@@ -135,8 +293,61 @@ class EmailService:
             </p>
         </div>
         """
+        return subject, html
+
+    def send_deadline_digest(self, to_email: str, entries: list[dict]) -> bool:
+        """One email covering several reminders (dicts with project_name, task_title, due_date, days_left)."""
+        if not self.enabled:
+            logger.info(f"[Email SKIP] {self.provider} not configured. Would send digest of {len(entries)} to {to_email}")
+            return False
+
+        subject, html = self.render_deadline_digest(entries)
         return self._send(to_email, subject, html)
 
+    def render_deadline_digest(self, entries: list[dict]) -> tuple[str, str]:
+        """Build (subject, html) for a daily digest, rows in the given order."""
+        overdue = sum(1 for entry in entries if entry["days_left"] < 0)
+        subject = f"[每日提醒] {len(entries)} 項截止事項" + (f"（逾期 {overdue} 項）" if overdue else "")
+
+        rows = []
+        for entry in entries:
+            days_left = entry["days_left"]
+            if days_left > 0:
+                status_text = f"還有 {days_left} 天"
+                color = "#f59e0b" if days_left <= 3 else "#3b82f6"
+            elif days_left == 0:
+                status_text = "今天到期"
+                color = "#ef4444"
+            else:
+                status_text = f"逾期 {abs(days_left)} 天"
+                color = "#dc2626"
+            rows.append(f"""
+                    <tr>
+                        <td style="padding: 8px 0; border-bottom: 1px solid #f3f4f6;">
+                            <div style="color: #111827; font-weight: 500;">{entry["task_title"]}</div>
+                            <div style="color: #6b7280; font-size: 12px;">{entry["project_name"]} · {entry["due_date"]}</div>
+                        </td>
+                        <td style="text-align: right; color: {color}; font-weight: 600; white-space: nowrap; border-bottom: 1px solid #f3f4f6;">{status_text}</td>
+                    </tr>""")
+
+        header_color = "#dc2626" if overdue else "#3b82f6"
+        html = f"""
+        <div style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; max-width: 560px; margin: 0 auto; padding: 24px;">
+            <div style="background: {header_color}; color: white; padding: 16px 20px; border-radius: 8px 8px 0 0;">
+                <h2 style="margin: 0; font-size: 16px;">每日截止日提醒</h2>
+            </div>
+            <div style="border: 1px solid #e5e7eb; border-top: none; padding: 20px; border-radius: 0 0 8px 8px;">
+                <p style="margin: 0 0 12px 0; color: #374151; font-size: 14px;">今天有 <strong>{len(entries)}</strong> 項事項需要注意：</p>
+                <table style="width: 100%; font-size: 14px; border-collapse: collapse;">{"".join(rows)}
+                </table>
+            </div>
+            <p style="text-align: center; margin-top: 16px; font-size: 12px; color: #9ca3af;">
+                Smart Doc Tracker — 智能文件期限追蹤系統
+            </p>
+        </div>
+        """
+        return subject, html
+
     def send_invitation(
         self,
         to_email: str,
@@ -198,6 +409,33 @@ class EmailService:
         """
         return self._send(to_email, subject, html)
 
+    @property
+    def supports_batch(self) -> bool:
+        """Whether send_batch maps to a provider-side batch API."""
+        return self.provider == "resend"
+
+    def send_batch(self, messages: list[tuple[str, str, str]]) -> list[tuple[bool, str | None]]:
+        """
+        Send many (to_email, subject, html) messages.
+        Returns one (sent, error) per message, in order; (False, None) means skipped.
+        Resend uses its batch endpoint; SMTP sends one by one over pooled sessions.
+        """
+        if not self.enabled:
+            logger.info(f"[Email SKIP] {self.provider} not configured. Would send {len(messages)} emails")
+            return [(False, None)] * len(messages)
+
+        if self.provider == "resend":
+            results = []
+            size = max(1, settings.RESEND_BATCH_SIZE)
+            for start in range(0, len(messages), size):
+                results.extend(self._send_resend_batch(messages[start:start + size]))
+            return results
+
+        return [
+            (True, None) if self._send(to_email, subject, html) else (False, "send failed")
+            for to_email, subject, html in messages
+        ]
+
     def _send(self, to_email: str, subject: str, html: str) -> bool:
         if self.provider == "smtp":
             return self._send_smtp(to_email, subject, html)
@@ -213,10 +451,10 @@ class EmailService:
             msg["To"] = to_email
             msg.attach(MIMEText(html, "html", "utf-8"))
 
-            with smtplib.SMTP(self._smtp_host, self._smtp_port) as server:
-                server.starttls()
-                server.login(self._smtp_user, self._smtp_password)
-                server.sendmail(self._smtp_user, to_email, msg.as_string())
+            pool = get_smtp_pool(
+                self._smtp_host, self._smtp_port, self._smtp_user, self._smtp_password, self._smtp_use_tls,
+            )
+            pool.sendmail(self._smtp_user, to_email, msg.as_string())
 
             logger.info(f"[SMTP] Email sent to {to_email}: {subject}")
             return True
@@ -238,3 +476,22 @@ class EmailService:
         except Exception as e:
             logger.error(f"[Resend] Failed to send to {to_email}: {e}")
             return False
+
+    def _send_resend_batch(self, messages: list[tuple[str, str, str]]) -> list[tuple[bool, str | None]]:
+        """One Resend batch call. Permissive validation reports failures per message."""
+        try:
+            import resend
+            response = resend.Batch.send(
+                [
+                    {"from": self._resend_from_email, "to": [to_email], "subject": subject, "html": html}
+                    for to_email, subject, html in messages
+                ],
+                {"batch_validation": "permissive"},
+            )
+        except Exception as e:
+            logger.error(f"[Resend] Batch of {len(messages)} failed: {e}")
+            return [(False, str(e))] * len(messages)
+
+        errors = {err.get("index"): err.get("message", "rejected") for err in (response.get("errors") or [])}
+        logger.info(f"[Resend] Batch sent: {len(messages) - len(errors)} ok, {len(errors)} rejected")
+        return [(i not in errors, errors.get(i)) for i in range(len(messages))]
@@ -0,0 +1,112 @@
+"""
+Content-addressed cache for LLM extraction results.
+
+The key is a hash of the normalized document text, the extraction prompt
+version and the deployment name, so the same document uploaded again (or
+into another project) reuses the stored events instead of calling Azure
+OpenAI. Entries live in Redis for EXTRACTION_CACHE_TTL and durably in the
+llm_extraction_cache table, which refills Redis on a hit.
+
+The same store is used per chunk (chunk_cache): when a revised document
+misses as a whole, its unchanged chunks are still answered from cache and
+only the changed ones are sent to the model.
+
+Hit/miss counters are kept in Redis next to the entries, so stats() adds
+up lookups from every API process and worker.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Optional
+from sqlalchemy.exc import SQLAlchemyError
+from backend.core.cache import cache as redis_cache
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.models import LLMExtractionCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Unicode- and whitespace-insensitive form of extracted document text."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def extraction_key(text: str, prompt_version: str, deployment: str) -> str:
+    digest = hashlib.sha256()
+    for part in (prompt_version, deployment, normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Two-level (Redis, then database) store of event lists by extraction key."""
+
+    def __init__(self, key_prefix: str = "llm:extraction", redis=redis_cache, session_factory=SessionLocal):
+        self.key_prefix = key_prefix  # Redis namespace; database keys are already content hashes
+        self.redis = redis
+        self.session_factory = session_factory
+
+    def _counter_key(self, name: str) -> str:
+        return f"{self.key_prefix}:stats:{name}"  # Entry keys are hex digests, so no clash
+
+    def _count(self, name: str):
+        self.redis.incr(self._counter_key(name))
+
+    def get(self, key: str) -> Optional[list[dict]]:
+        """Cached events for a key, or None on a miss."""
+        events = self.redis.get(f"{self.key_prefix}:{key}")
+        if events is not None:
+            self._count("redis_hits")
+            return events
+
+        db = self.session_factory()
+        try:
+            row = db.get(LLMExtractionCache, key)
+            events = row.events if row else None
+        except SQLAlchemyError as e:
+            logger.error(f"Extraction cache lookup failed: {e}")
+            events = None
+        finally:
+            db.close()
+
+        if events is None:
+            self._count("misses")
+            return None
+        self._count("db_hits")
+        self.redis.set(f"{self.key_prefix}:{key}", events, ttl=settings.EXTRACTION_CACHE_TTL)
+        return events
+
+    def put(self, key: str, events: list[dict], prompt_version: str, deployment: str):
+        """Store events in Redis and the database. Failures are logged, not raised."""
+        self.redis.set(f"{self.key_prefix}:{key}", events, ttl=settings.EXTRACTION_CACHE_TTL)
+        db = self.session_factory()
+        try:
+            db.merge(LLMExtractionCache(
+                key=key, prompt_version=prompt_version, deployment=deployment, events=events,
+            ))
+            db.commit()
+            self._count("stores")
+        except SQLAlchemyError as e:
+            logger.error(f"Extraction cache store failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def stats(self) -> Optional[dict]:
+        """Counts across all processes; None while Redis is unavailable."""
+        names = ("redis_hits", "db_hits", "misses", "stores")
+        values = self.redis.counters(*map(self._counter_key, names))
+        if values is None:
+            return None
+        counts = {name: values[self._counter_key(name)] for name in names}
+        lookups = counts["redis_hits"] + counts["db_hits"] + counts["misses"]
+        counts["hits"] = counts["redis_hits"] + counts["db_hits"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 3) if lookups else None
+        return counts
+
+
+extraction_cache = ExtractionCache()
+chunk_cache = ExtractionCache(key_prefix="llm:chunk")
@@ -0,0 +1,120 @@
+"""
+Process pool for CPU-bound text extraction.
+
+pypdf and python-docx are pure Python and hold the GIL, so extracting a
+large document on the API process stalls every other request. Extraction
+jobs are sent to a dedicated ProcessPoolExecutor (EXTRACTION_POOL_SIZE
+workers) and awaited from the event loop. A job that exceeds
+EXTRACTION_TIMEOUT raises TimeoutError, and the pool is replaced so the
+stuck worker cannot hold a slot.
+
+Large PDFs given by path are split further: with at least
+PDF_PARALLEL_MIN_PAGES pages, the page range is cut into contiguous ranges
+that workers extract side by side, and the texts are joined in page order.
+Time-to-text then drops roughly with the number of pool workers.
+
+Sources must be picklable: pass a file path (preferred) or bytes, not an
+open file object.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from backend.core.config import settings
+from backend.services.text_extraction import extract_pdf_page_range, extract_text, pdf_page_count
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionPool:
+    """Lazily started process pool with a per-job timeout."""
+
+    def __init__(self, max_workers: int = None, timeout: float = None):
+        self.max_workers = max_workers if max_workers is not None else settings.EXTRACTION_POOL_SIZE
+        self.timeout = timeout if timeout is not None else settings.EXTRACTION_TIMEOUT
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the API process runs scheduler and dispatcher threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        """Kill the workers of a pool (e.g. one stuck on a timed-out job) and start fresh next time."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) in a worker process. With EXTRACTION_POOL_SIZE=0 it
+        runs in a thread instead (no isolation, but the loop stays free).
+        """
+        if self.max_workers <= 0:
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args), self.timeout)
+
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._executor()
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(pool, fn, *args), self.timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Extraction job exceeded {self.timeout}s; restarting the pool")
+                self._discard(pool)
+                raise TimeoutError(f"Text extraction timed out after {self.timeout}s")
+            except BrokenProcessPool:
+                # A worker died, or the pool was discarded because of another job's timeout
+                self._discard(pool)
+                if attempt:
+                    raise
+                logger.warning("Extraction pool broke; retrying job on a new pool")
+
+    async def extract_text(self, source, file_type: str) -> str:
+        if file_type.lower() == "pdf" and isinstance(source, (str, os.PathLike)) and self._splits_pdfs():
+            pages = await self.run(pdf_page_count, source)
+            if pages >= settings.PDF_PARALLEL_MIN_PAGES:
+                return await self._extract_pdf_parallel(source, pages)
+        return await self.run(extract_text, source, file_type)
+
+    def _splits_pdfs(self) -> bool:
+        return self.max_workers > 1 and settings.PDF_PARALLEL_MIN_PAGES > 0
+
+    async def _extract_pdf_parallel(self, path, pages: int) -> str:
+        """Extract contiguous page ranges in parallel; each worker opens the file itself."""
+        # Two ranges per worker so one slow (e.g. scanned) stretch doesn't leave the others idle
+        count = min(self.max_workers * 2, pages)
+        bounds = [pages * i // count for i in range(count + 1)]
+        tasks = [
+            asyncio.ensure_future(self.run(extract_pdf_page_range, path, start, stop))
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+        try:
+            parts = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:  # e.g. one range timed out: don't keep extracting the rest
+                task.cancel()
+            raise
+        if any(part is None for part in parts):
+            return ""  # Same as a failed serial extraction
+        return "".join(parts)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+extraction_pool = ExtractionPool()
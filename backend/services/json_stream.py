@@ -0,0 +1,67 @@
+"""
+Incremental parsing of a JSON array of objects that arrives in pieces, as a
+streamed completion does. Each object is returned as soon as its closing
+brace arrives, without waiting for the rest of the document.
+"""
+import json
+
+
+class JsonArrayStream:
+    """
+    feed() text pieces; it returns the objects of the first JSON array that
+    each piece completes. The array may be the top-level value or nested in
+    an object, e.g. {"events": [...]}. Elements that are not objects, or
+    fail to parse, are skipped. Text without an array yields nothing; the
+    caller parses the complete reply instead.
+    """
+
+    def __init__(self):
+        self._array_depth = None  # Nesting depth of the array once found
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element: list[str] | None = None
+        self.done = False
+
+    def feed(self, piece: str) -> list[dict]:
+        completed = []
+        for ch in piece:
+            if self.done:
+                break
+            if self._element is not None:
+                self._element.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+                if self._array_depth is None:
+                    # Objects before the array (the wrapper, other keys) are not elements
+                    if ch == "[":
+                        self._array_depth = self._depth
+                elif self._depth == self._array_depth + 1 and ch == "{":
+                    self._element = [ch]
+            elif ch in "]}":
+                if self._array_depth is None:
+                    pass
+                elif self._element is not None and self._depth == self._array_depth + 1:
+                    try:
+                        value = json.loads("".join(self._element))
+                        if isinstance(value, dict):
+                            completed.append(value)
+                    except json.JSONDecodeError:
+                        pass
+                    self._element = None
+                elif self._depth == self._array_depth:
+                    self.done = True
+                self._depth -= 1
+        return completed
@@ -1,6 +1,6 @@
 
 import logging
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy.orm import Session
 from backend.core.config import settings
 from backend.models import (
@@ -8,60 +8,169 @@ from backend.models import (
     NotificationLog, NotificationRule, ProjectMember,
 )
 from backend.core.database import SessionLocal
+from backend.services.dispatcher import DispatchJob, DispatchResult, NotificationDispatcher
 from backend.services.email import EmailService
+from backend.services.notification_log import PENDING, NotificationLogWriter, send_key
+from backend.services.sweep import (
+    DeadlineSweep, PendingNotification, notify_window_start, parse_due_date,
+    resolve_channels, shard_bounds,
+)
+from backend.services.reminder_schedule import ReminderScheduler, ScheduledSweep
+from backend.services.sweep_leases import ShardLeases
 import uuid
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+LINE_CAROUSEL_MAX_BUBBLES = 12  # LINE Flex carousel limit
+
 
 class NotificationService:
-    def __init__(self):
+    def __init__(self, dispatcher: NotificationDispatcher = None):
         self.email_service = None  # Initialized with DB session in check_deadlines
+        self.dispatcher = dispatcher or NotificationDispatcher()
 
-    def check_deadlines(self):
+    def check_deadlines(self, leased: bool = True):
         """
         Check all pending deadline events and notify relevant users.
         Notifies project owner + all accepted members.
         Overdue events are notified daily until completed.
+
+        NOTIFICATION_SWEEP_MODE selects the engine: "sweep" (default) resolves
+        all recipients with a few set-based queries, "per_event" walks events
+        one by one. The sweep is split into leased shards so every backend
+        process can run this job and work is shared instead of repeated.
+
+        Leases cover one run per day, so a later run the same day (the
+        admin's manual trigger) passes leased=False and sweeps everything
+        itself; send keys keep it from repeating reminders already sent.
         """
         logger.info(f"Starting deadline check at {datetime.now()}")
 
         db = SessionLocal()
         self.email_service = EmailService(db=db)
         try:
-            events = db.query(DeadlineEvent).filter(
-                DeadlineEvent.status != "completed"
-            ).all()
-
-            for event in events:
-                try:
-                    self._process_event(db, event)
-                except Exception as e:
-                    logger.error(f"Error processing event {event.id}: {e}")
-                    db.rollback()
-
+            if settings.NOTIFICATION_SWEEP_MODE == "per_event":
+                self._check_per_event(db)
+            elif not leased:
+                self._check_sweep(db)
+            else:
+                self._run_shards(db, create=True)
         except Exception as e:
             logger.error(f"Scheduler failed: {e}")
         finally:
             db.close()
 
-    def _process_event(self, db: Session, event: DeadlineEvent):
-        if not event.due_date:
+    def resume_deadline_sweep(self):
+        """
+        Pick up shards of today's run whose worker died or hung. Runs on an
+        interval; a no-op once every shard is complete or if no run started.
+        """
+        if settings.NOTIFICATION_SWEEP_MODE == "per_event":
             return
 
+        db = SessionLocal()
+        self.email_service = EmailService(db=db)
         try:
-            if isinstance(event.due_date, datetime):
-                due_date = event.due_date.date()
-            elif isinstance(event.due_date, str):
-                due_date = datetime.strptime(event.due_date, "%Y-%m-%d").date()
-            elif hasattr(event.due_date, "year"):
-                due_date = event.due_date
+            self._run_shards(db, create=False)
+        except Exception as e:
+            logger.error(f"Sweep recovery failed: {e}")
+        finally:
+            db.close()
+
+    def _run_shards(self, db: Session, create: bool, today: date = None, leases: ShardLeases = None):
+        """Lease and sweep shards of today's run until none are left to claim."""
+        today = today or datetime.now().date()
+        leases = leases or ShardLeases(db)
+        if create:
+            leases.ensure_run(today, max(1, settings.NOTIFICATION_SWEEP_SHARDS))
+            if settings.NOTIFICATION_SWEEP_SOURCE == "schedule":
+                ReminderScheduler(db, today).prune()
+
+        while (claimed := leases.acquire(today)) is not None:
+            shard, shard_count = claimed
+            try:
+                finished = self._check_sweep(
+                    db, shard=shard_bounds(shard, shard_count),
+                    keep_lease=lambda: leases.renew_if_due(today, shard),
+                )
+            except Exception as e:
+                # Leave the lease to expire so another pass retries the shard
+                logger.error(f"Sweep shard {shard}/{shard_count} failed: {e}")
+                db.rollback()
+                continue
+            if not finished:
+                # The new holder finishes it; our unconfirmed claims stay pending until reaped
+                logger.warning(f"Sweep shard {shard}/{shard_count} stopped: lease lost")
+                continue
+            leases.complete(today, shard)
+            logger.info(f"Sweep shard {shard}/{shard_count} done by {leases.worker_id}")
+
+    def _check_sweep(self, db: Session, shard=None, keep_lease=None) -> bool:
+        """
+        Resolve every pending (user, event, channels) up front, then fan the
+        sends out through the dispatcher. Logs are written on this thread.
+        Events matched by digest rules are folded into one reminder per user.
+
+        Every delivery is claimed as a pending log row before sending and
+        confirmed in batches as results arrive, so a crash mid-run never
+        leads to the same reminder being sent twice in one day.
+
+        keep_lease() is called before and during dispatch to renew the
+        shard's lease; once it returns False the remaining sends are
+        cancelled and this returns False.
+        """
+        NotificationLogWriter.reap_abandoned(db)
+        sweep_cls = ScheduledSweep if settings.NOTIFICATION_SWEEP_SOURCE == "schedule" else DeadlineSweep
+        pending = sweep_cls(db, shard=shard).collect()
+        # Work on a detached snapshot: log commits must not expire rows that
+        # the dispatcher threads are still reading
+        db.expunge_all()
+
+        jobs = []
+        digests: dict = {}
+        for item in pending:
+            if item.digest:
+                digests.setdefault(item.user.id, []).append(item)
             else:
-                logger.warning(f"Unknown date type for event {event.id}: {type(event.due_date)}")
-                return
-        except (ValueError, TypeError) as e:
-            logger.warning(f"Invalid date for event {event.id}: {event.due_date} ({e})")
+                jobs.extend(self._build_jobs(item.user, item.event, item.project, item.days_left, item.channels))
+        for items in digests.values():
+            jobs.extend(self._build_digest_jobs(items))
+
+        with NotificationLogWriter(db) as writer:
+            jobs = self._claim(writer, jobs)
+
+            if self.email_service and self.email_service.supports_batch:
+                jobs = self._batch_email_jobs(jobs)
+
+            if keep_lease and not keep_lease():
+                return False
+            results = self.dispatcher.iter_results(jobs)
+            try:
+                for result in results:
+                    self._record_result(writer, result)
+                    if keep_lease and not keep_lease():
+                        return False
+            finally:
+                results.close()  # Cancels sends not yet started
+        return True
+
+    def _check_per_event(self, db: Session):
+        events = db.query(DeadlineEvent).filter(
+            DeadlineEvent.status != "completed",
+            DeadlineEvent.due_date >= notify_window_start(datetime.now().date()),
+        ).all()
+
+        for event in events:
+            try:
+                self._process_event(db, event)
+            except Exception as e:
+                logger.error(f"Error processing event {event.id}: {e}")
+                db.rollback()
+
+    def _process_event(self, db: Session, event: DeadlineEvent):
+        due_date = parse_due_date(event)
+        if due_date is None:
             return
 
         today = datetime.now().date()
@@ -97,7 +206,7 @@ class NotificationService:
             ProjectMember.project_id == project.id,
             ProjectMember.status == "accepted",
             ProjectMember.user_id.isnot(None),
-        ).all()
+        ).order_by(ProjectMember.invited_at, ProjectMember.id).all()
 
         for member in members:
             uid = str(member.user_id)
@@ -122,46 +231,16 @@ class NotificationService:
         rules = db.query(NotificationRule).filter(
             NotificationRule.user_id == user.id,
             NotificationRule.is_active == True,
-        ).all()
-
-        # Collect channels from matched rules
-        channels = set()
-
-        for rule in rules:
-            if days_left == rule.days_before:
-                rule_channels = rule.channels if rule.channels else ["line", "email"]
-                channels.update(rule_channels)
-                break
-
-        # Overdue: notify daily via all channels from any active rule
-        # Stop notifying if overdue more than 30 days
-        if days_left < 0:
-            if days_left < -30:
-                return
-            for rule in rules:
-                rule_channels = rule.channels if rule.channels else ["line", "email"]
-                channels.update(rule_channels)
-            if not channels:
-                channels = {"line", "email"}  # Default if no rules exist
+        ).order_by(NotificationRule.created_at, NotificationRule.id).all()
 
+        # Collect channels from matched rules (overdue: all active rules, up to 30 days)
+        channels = resolve_channels(rules, days_left)
         if not channels:
             return
 
-        # Deduplicate per channel: check which channels already sent today
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        already_sent_channels = set()
-        for ch in channels:
-            existing = db.query(NotificationLog).filter(
-                NotificationLog.user_id == user.id,
-                NotificationLog.event_id == event.id,
-                NotificationLog.notification_type == ch,
-                NotificationLog.sent_at >= today_start,
-                NotificationLog.status == "sent",
-            ).first()
-            if existing:
-                already_sent_channels.add(ch)
-
-        remaining_channels = channels - already_sent_channels
+        # Deduplicate per channel: claim today's send keys in one insert;
+        # channels already sent (or in flight) today are not claimed
+        remaining_channels = self._claim_channels(db, user, event, project, days_left, channels)
         if not remaining_channels:
             logger.debug(f"Already notified {user.email} for event {event.id} today on all channels")
             return
@@ -169,6 +248,25 @@ class NotificationService:
         # Send notifications via remaining channels only
         self._send_to_user(db, user, event, project, days_left, remaining_channels)
 
+    def _deliverable_channels(self, user: Profile, channels: set[str]) -> set[str]:
+        """Channels the user can actually be reached on."""
+        deliverable = set()
+        if "line" in channels and user.line_user_id and settings.LINE_CHANNEL_ACCESS_TOKEN:
+            deliverable.add("line")
+        if "email" in channels and user.email:
+            deliverable.add("email")
+        return deliverable
+
+    def _claim_channels(self, db, user, event, project, days_left, channels) -> set[str]:
+        """Claim a pending log row per deliverable channel; returns the claimed channels."""
+        channels = sorted(self._deliverable_channels(user, channels))
+        due_date_str = str(event.due_date)[:10] if event.due_date else "unknown"
+        message_content = self._message_content(event, project, days_left, due_date_str)
+        log_ids = NotificationLogWriter(db).claim([
+            (user.id, event.id, ch, message_content) for ch in channels
+        ])
+        return {ch for ch, log_id in zip(channels, log_ids) if log_id}
+
     def _send_to_user(
         self,
         db: Session,
@@ -184,38 +282,190 @@ class NotificationService:
 
         # Ensure due_date is a string for serialization
         due_date_str = str(event.due_date)[:10] if event.due_date else "unknown"
+        message_content = self._message_content(event, project, days_left, due_date_str)
+
+        # 1. LINE notification
+        if "line" in channels and user.line_user_id and settings.LINE_CHANNEL_ACCESS_TOKEN:
+            self._send_line(db, user, event, project, days_left, message_content, due_date_str)
+
+        # 2. Email notification
+        if "email" in channels and user.email:
+            self._send_email(db, user, event, project, days_left, message_content, due_date_str)
 
-        message_content = (
+    def _message_content(self, event, project, days_left, due_date_str) -> str:
+        return (
             f"事項：{event.title}\n"
             f"專案：{project.name}\n"
             f"截止：{due_date_str}\n"
             f"剩餘：{days_left} 天"
         )
 
-        # 1. LINE notification
-        if "line" in channels and user.line_user_id and settings.LINE_CHANNEL_ACCESS_TOKEN:
-            self._send_line(db, user, event, project, days_left, message_content, due_date_str)
+    def _delivery(self, event, project, days_left, due_date_str) -> dict:
+        return {
+            "event_id": event.id,
+            "title": event.title,
+            "message": self._message_content(event, project, days_left, due_date_str),
+        }
 
-        # 2. Email notification
+    def _build_jobs(self, user, event, project, days_left, channels) -> list[DispatchJob]:
+        """Dispatcher jobs for one user/event, mirroring _send_to_user's channel checks."""
+        due_date_str = str(event.due_date)[:10] if event.due_date else "unknown"
+        delivery = self._delivery(event, project, days_left, due_date_str)
+        recipient = {"user_id": user.id, "email": user.email}
+
+        jobs = []
+        if "line" in channels and user.line_user_id and settings.LINE_CHANNEL_ACCESS_TOKEN:
+            jobs.append(DispatchJob(
+                provider="line",
+                send=lambda: self._push_line(user, event, project, days_left, due_date_str),
+                context={**recipient, "channel": "line", "deliveries": [dict(delivery)]},
+            ))
         if "email" in channels and user.email:
-            self._send_email(db, user, event, project, days_left, message_content, due_date_str)
+            jobs.append(DispatchJob(
+                provider="email",
+                send=lambda: self._deliver_email(user, event, project, days_left, due_date_str),
+                context={
+                    **recipient, "channel": "email", "deliveries": [dict(delivery)],
+                    "render": lambda: self.email_service.render_deadline_reminder(
+                        project.name, event.title, due_date_str, days_left,
+                    ),
+                },
+            ))
+        return jobs
+
+    def _build_digest_jobs(self, items: list[PendingNotification]) -> list[DispatchJob]:
+        """One LINE carousel and one email per user, covering all their matched events."""
+        user = items[0].user
+        items = sorted(items, key=lambda i: (i.days_left, i.event.title))
+
+        jobs = []
+        for channel in ("line", "email"):
+            selected = [i for i in items if channel in i.channels]
+            if not selected:
+                continue
+            if channel == "line" and not (user.line_user_id and settings.LINE_CHANNEL_ACCESS_TOKEN):
+                continue
+            if channel == "email" and not user.email:
+                continue
+
+            entries, deliveries = [], []
+            for item in selected:
+                due_date_str = str(item.event.due_date)[:10] if item.event.due_date else "unknown"
+                entries.append({
+                    "project_name": item.project.name,
+                    "task_title": item.event.title,
+                    "due_date": due_date_str,
+                    "days_left": item.days_left,
+                    "event_id": str(item.event.id),
+                })
+                deliveries.append(self._delivery(item.event, item.project, item.days_left, due_date_str))
+
+            context = {"user_id": user.id, "email": user.email, "channel": channel, "deliveries": deliveries}
+            if channel == "line":
+                send = lambda entries=entries: self._line_api().push_message(
+                    user.line_user_id, self._create_digest_message(entries)
+                )
+            else:
+                send = lambda entries=entries: self.email_service.send_deadline_digest(user.email, entries)
+                context["render"] = lambda entries=entries: self.email_service.render_deadline_digest(entries)
+            jobs.append(DispatchJob(provider=channel, send=send, context=context))
+        return jobs
+
+    def _batch_email_jobs(self, jobs: list[DispatchJob]) -> list[DispatchJob]:
+        """Replace single email jobs with provider batch calls of up to RESEND_BATCH_SIZE."""
+        email_ctxs = [job.context for job in jobs if job.provider == "email"]
+        jobs = [job for job in jobs if job.provider != "email"]
+
+        size = max(1, settings.RESEND_BATCH_SIZE)
+        for start in range(0, len(email_ctxs), size):
+            batch = email_ctxs[start:start + size]
+            messages = [(ctx["email"], *ctx["render"]()) for ctx in batch]
+            jobs.append(DispatchJob(
+                provider="email",
+                send=lambda messages=messages: self.email_service.send_batch(messages),
+                context={"channel": "email", "batch": batch},
+            ))
+        return jobs
+
+    def _claim(self, writer: NotificationLogWriter, jobs: list[DispatchJob]) -> list[DispatchJob]:
+        """
+        Write one pending log row per delivery and remember its id. Deliveries
+        whose send key is already taken today are dropped, and so are jobs
+        left with nothing to deliver.
+        """
+        deliveries = [(job.context, d) for job in jobs for d in job.context["deliveries"]]
+        log_ids = writer.claim([
+            (ctx["user_id"], d["event_id"], ctx["channel"], d["message"]) for ctx, d in deliveries
+        ])
+        for (_, d), log_id in zip(deliveries, log_ids):
+            d["log_id"] = log_id
+
+        claimed = []
+        for job in jobs:
+            job.context["deliveries"] = [d for d in job.context["deliveries"] if d["log_id"]]
+            if job.context["deliveries"]:
+                claimed.append(job)
+        return claimed
+
+    def _record_result(self, writer: NotificationLogWriter, result: DispatchResult):
+        ctx = result.job.context
+
+        if "batch" in ctx:
+            # One provider call, one outcome per message
+            outcomes = result.value if result.ok else [(False, str(result.error))] * len(ctx["batch"])
+            for job_ctx, (sent, error) in zip(ctx["batch"], outcomes):
+                status = "sent" if sent else ("failed" if error else "skipped")
+                self._record(writer, job_ctx, status, error)
+            return
+
+        if not result.ok:
+            self._record(writer, ctx, "failed", str(result.error))
+            return
+
+        # LINE raises on failure; email returns False when the provider is not configured
+        self._record(writer, ctx, "sent" if result.value is not False else "skipped")
+
+    def _record(self, writer: NotificationLogWriter, ctx: dict, status: str, error: str = None):
+        """Confirm the outcome of one message on every event it covered."""
+        channel, deliveries = ctx["channel"], ctx["deliveries"]
+        label = "LINE" if channel == "line" else "Email"
+        subject = f"'{deliveries[0]['title']}'" if len(deliveries) == 1 else f"{len(deliveries)} events"
+        if status == "failed":
+            logger.error(f"{label} failed for {ctx['email']}: {error}")
+        elif status == "sent":
+            logger.info(f"{label} sent to {ctx['email']} for {subject}")
+        for d in deliveries:
+            writer.confirm(d["log_id"], status, error)
+
+    def _line_api(self):
+        from linebot import LineBotApi
+        return LineBotApi(settings.LINE_CHANNEL_ACCESS_TOKEN, endpoint=settings.LINE_API_ENDPOINT)
+
+    def _push_line(self, user, event, project, days_left, due_date_str=None):
+        flex_message = self._create_flex_message(
+            project_name=project.name,
+            task_title=event.title,
+            due_date=due_date_str or str(event.due_date)[:10],
+            days_left=days_left,
+            event_id=str(event.id),
+        )
+        self._line_api().push_message(user.line_user_id, flex_message)
+
+    def _deliver_email(self, user, event, project, days_left, due_date_str=None) -> bool:
+        return self.email_service.send_deadline_reminder(
+            to_email=user.email,
+            project_name=project.name,
+            task_title=event.title,
+            due_date=due_date_str or str(event.due_date)[:10],
+            days_left=days_left,
+            project_id=str(project.id),
+        )
 
     def _send_line(
         self, db, user, event, project, days_left, message_content, due_date_str=None
     ):
         try:
-            from linebot import LineBotApi
-            line_bot_api = LineBotApi(settings.LINE_CHANNEL_ACCESS_TOKEN)
-
-            flex_message = self._create_flex_message(
-                project_name=project.name,
-                task_title=event.title,
-                due_date=due_date_str or str(event.due_date)[:10],
-                days_left=days_left,
-                event_id=str(event.id),
-            )
-            line_bot_api.push_message(user.line_user_id, flex_message)
-
+            self._push_line(user, event, project, days_left, due_date_str)
             logger.info(f"LINE sent to {user.email} for '{event.title}'")
             self._log(db, user.id, event.id, "line", "sent", message_content)
 
@@ -227,14 +477,7 @@ class NotificationService:
         self, db, user, event, project, days_left, message_content, due_date_str=None
     ):
         try:
-            success = self.email_service.send_deadline_reminder(
-                to_email=user.email,
-                project_name=project.name,
-                task_title=event.title,
-                due_date=due_date_str or str(event.due_date)[:10],
-                days_left=days_left,
-                project_id=str(project.id),
-            )
+            success = self._deliver_email(user, event, project, days_left, due_date_str)
             status = "sent" if success else "skipped"
             if success:
                 logger.info(f"Email sent to {user.email} for '{event.title}'")
@@ -249,8 +492,54 @@ class NotificationService:
     def _create_flex_message(
         self, project_name, task_title, due_date, days_left, event_id
     ):
+        from linebot.models import FlexSendMessage
+
+        bubble, status_text = self._create_bubble(project_name, task_title, due_date, days_left, event_id)
+        alt = f"{'[逾期]' if days_left < 0 else '[提醒]'} {task_title} — {status_text}"
+        return FlexSendMessage(alt_text=alt, contents=bubble)
+
+    def _create_digest_message(self, entries: list[dict]):
+        """Carousel of reminder bubbles, most urgent first, within LINE's bubble limit."""
         from linebot.models import (
-            FlexSendMessage, BubbleContainer, BoxComponent, TextComponent,
+            FlexSendMessage, CarouselContainer, BubbleContainer, BoxComponent,
+            TextComponent, ButtonComponent, URIAction,
+        )
+
+        shown = entries if len(entries) <= LINE_CAROUSEL_MAX_BUBBLES else entries[:LINE_CAROUSEL_MAX_BUBBLES - 1]
+        bubbles = [self._create_bubble(**entry)[0] for entry in shown]
+
+        hidden = len(entries) - len(shown)
+        if hidden:
+            bubbles.append(BubbleContainer(
+                body=BoxComponent(
+                    layout="vertical",
+                    spacing="md",
+                    contents=[
+                        TextComponent(text=f"還有 {hidden} 項", weight="bold", size="xl"),
+                        TextComponent(text="其餘截止事項請至系統查看", size="sm", color="#666666", wrap=True),
+                    ],
+                ),
+                footer=BoxComponent(
+                    layout="vertical",
+                    contents=[
+                        ButtonComponent(
+                            style="primary",
+                            height="sm",
+                            action=URIAction(label="查看全部", uri=f"{settings.APP_URL}/dashboard"),
+                        ),
+                    ],
+                ),
+            ))
+
+        overdue = sum(1 for entry in entries if entry["days_left"] < 0)
+        alt = f"[每日提醒] {len(entries)} 項截止事項" + (f"（逾期 {overdue} 項）" if overdue else "")
+        return FlexSendMessage(alt_text=alt, contents=CarouselContainer(contents=bubbles))
+
+    def _create_bubble(
+        self, project_name, task_title, due_date, days_left, event_id
+    ):
+        from linebot.models import (
+            BubbleContainer, BoxComponent, TextComponent,
             ButtonComponent, PostbackAction, SeparatorComponent,
         )
 
@@ -353,8 +642,7 @@ class NotificationService:
             ),
         )
 
-        alt = f"{'[逾期]' if days_left < 0 else '[提醒]'} {task_title} — {status_text}"
-        return FlexSendMessage(alt_text=alt, contents=bubble)
+        return bubble, status_text
 
     # ── Logging ─────────────────────────────────────────────────────────
 
@@ -362,17 +650,23 @@ class NotificationService:
         self, db, user_id, event_id, notification_type, status, message,
         error_message=None,
     ):
+        """Confirm today's pending claim for this send, or insert a new row."""
+        key = send_key(user_id, event_id, notification_type)
         try:
-            log = NotificationLog(
-                id=uuid.uuid4(),
-                user_id=user_id,
-                event_id=event_id,
-                notification_type=notification_type,
-                status=status,
-                message=message,
-                error_message=error_message,
-            )
-            db.add(log)
+            claimed = db.query(NotificationLog).filter(
+                NotificationLog.send_key == key,
+                NotificationLog.status == PENDING,
+            ).update({"status": status, "error_message": error_message}, synchronize_session=False)
+            if not claimed:
+                db.add(NotificationLog(
+                    id=uuid.uuid4(),
+                    user_id=user_id,
+                    event_id=event_id,
+                    notification_type=notification_type,
+                    status=status,
+                    message=message,
+                    error_message=error_message,
+                ))
             db.commit()
         except Exception as e:
             logger.error(f"Failed to log notification: {e}")
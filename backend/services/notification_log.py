@@ -0,0 +1,201 @@
+"""
+Buffered NotificationLog writer for the deadline sweep.
+
+Rows are claimed as "pending" in one multi-row insert before anything is
+sent, then confirmed ("sent" / "failed" / "skipped") in batched updates.
+Because the claim is committed first, a process that dies mid-run leaves
+pending rows behind and the next sweep will not send those reminders again
+until they are abandoned. While a run is alive its writer keeps renewing
+claim_renewed_at on the claims it has not confirmed yet, so a claim is
+only abandoned once its run stopped renewing it for
+NOTIFICATION_PENDING_TIMEOUT, however long the run itself takes.
+
+Each claim carries a send key (user:event:channel:date). A partial unique
+index over keys of sent/pending rows makes the claim insert-on-conflict:
+a reminder that was already sent or is in flight today is simply not
+claimed again, even by a concurrent worker.
+"""
+import logging
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, func, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.models import NotificationLog
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+ABANDONED = "abandoned"
+
+
+def send_key(user_id, event_id, channel: str, day: date = None) -> str:
+    """Daily dedup key; matches the backfill in migration 006."""
+    day = day or datetime.now().date()
+    return f"{user_id}:{event_id}:{channel}:{day.isoformat()}"
+
+
+def _insert_on_conflict(db: Session):
+    """INSERT ... ON CONFLICT (send_key) DO NOTHING for the session's dialect."""
+    dialect = db.get_bind().dialect.name
+    insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}[dialect]
+    return insert(NotificationLog).on_conflict_do_nothing(
+        index_elements=[NotificationLog.send_key],
+        index_where=text("status IN ('sent', 'pending')"),
+    )
+
+
+def pending_cutoff(now: datetime = None) -> datetime:
+    """Pending rows last renewed before this are treated as abandoned."""
+    now = now or datetime.now()
+    return now - timedelta(seconds=settings.NOTIFICATION_PENDING_TIMEOUT)
+
+
+def _last_renewed():
+    # Rows claimed before renewals existed only have their claim time
+    return func.coalesce(NotificationLog.claim_renewed_at, NotificationLog.sent_at)
+
+
+def claim_is_live(now: datetime = None):
+    """SQL criterion for pending rows whose run is still renewing them."""
+    return and_(NotificationLog.status == PENDING, _last_renewed() >= pending_cutoff(now))
+
+
+class NotificationLogWriter:
+    """
+    Collects log outcomes during a sweep and writes them in batches.
+
+    Usage:
+        with NotificationLogWriter(db) as writer:
+            ids = writer.claim(rows)
+            ...
+            writer.confirm(ids[0], "sent")
+        # Remaining confirmations are flushed on exit, even on error.
+    """
+
+    def __init__(self, db: Session, batch_size: int = None, flush_interval: float = None):
+        self.db = db
+        self.batch_size = batch_size or settings.NOTIFICATION_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.NOTIFICATION_LOG_FLUSH_INTERVAL
+        self._buffer: list[dict] = []
+        self._last_flush = time.monotonic()
+        self._unconfirmed: set[uuid.UUID] = set()  # Claims not yet written as confirmed; renewed until then
+        self._last_renewal = time.monotonic()
+        self.flushes = 0
+
+    def claim(self, rows: list[tuple], day: date = None) -> list[Optional[uuid.UUID]]:
+        """
+        Insert (user_id, event_id, type, message) rows as pending and commit.
+        Returns the new log ids in the same order, with None for rows whose
+        send key was already sent or claimed today.
+        """
+        ids = [uuid.uuid4() for _ in rows]
+        if not rows:
+            return ids
+        day = day or datetime.now().date()
+        now = datetime.now()
+        values = [
+            {
+                "id": log_id,
+                "user_id": user_id,
+                "event_id": event_id,
+                "notification_type": notification_type,
+                "status": PENDING,
+                "message": message,
+                "send_key": send_key(user_id, event_id, notification_type, day),
+                "claim_renewed_at": now,
+            }
+            for log_id, (user_id, event_id, notification_type, message) in zip(ids, rows)
+        ]
+        stmt = _insert_on_conflict(self.db).returning(NotificationLog.id)
+        claimed = set()
+        try:
+            for i in range(0, len(values), self.batch_size):
+                claimed.update(self.db.execute(stmt, values[i:i + self.batch_size]).scalars())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self._unconfirmed.update(claimed)
+        self._last_renewal = time.monotonic()
+        if len(claimed) < len(ids):
+            logger.info(f"Skipped {len(ids) - len(claimed)} notifications already sent or claimed today")
+        return [log_id if log_id in claimed else None for log_id in ids]
+
+    def confirm(self, log_id: uuid.UUID, status: str, error_message: str = None):
+        """Queue the final status of a claimed row; flushes on size or age."""
+        self._buffer.append({"id": log_id, "status": status, "error_message": error_message})
+        self.renew_if_due()
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write buffered confirmations with one executemany UPDATE."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            self.db.execute(update(NotificationLog), batch)
+            self.db.commit()
+            self.flushes += 1
+            self._unconfirmed.difference_update(row["id"] for row in batch)
+        except Exception as e:
+            # Rows stay pending and are retried once they go stale
+            logger.error(f"Failed to confirm {len(batch)} notification logs: {e}")
+            self.db.rollback()
+
+    def renew_if_due(self):
+        """
+        Renew this run's unconfirmed claims a few times per
+        NOTIFICATION_PENDING_TIMEOUT, so reap_abandoned() leaves them alone
+        for as long as the run keeps making progress.
+        """
+        if not self._unconfirmed:
+            return
+        if time.monotonic() - self._last_renewal < settings.NOTIFICATION_PENDING_TIMEOUT / 3:
+            return
+        self._last_renewal = time.monotonic()
+        ids = list(self._unconfirmed)
+        try:
+            for i in range(0, len(ids), self.batch_size):
+                self.db.execute(
+                    update(NotificationLog)
+                    .where(NotificationLog.id.in_(ids[i:i + self.batch_size]), NotificationLog.status == PENDING)
+                    .values(claim_renewed_at=datetime.now())
+                )
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Failed to renew {len(ids)} notification claims: {e}")
+            self.db.rollback()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def reap_abandoned(db: Session, now: datetime = None) -> int:
+        """Mark pending rows whose run stopped renewing them (it crashed or hung) as abandoned."""
+        try:
+            result = db.execute(
+                update(NotificationLog)
+                .where(NotificationLog.status == PENDING, _last_renewed() < pending_cutoff(now))
+                .values(status=ABANDONED)
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to reap abandoned notification logs: {e}")
+            db.rollback()
+            return 0
+        if result.rowcount:
+            logger.warning(f"Marked {result.rowcount} stale pending notification logs as abandoned")
+        return result.rowcount
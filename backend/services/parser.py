@@ -2,163 +2,221 @@
 import os
 from openai import AzureOpenAI
 from backend.core.config import settings
+import hashlib
 import json
-from pypdf import PdfReader
-from docx import Document
-import docx2txt
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+from backend.services import text_extraction
+from backend.services.chunking import merge_events, split_text
+from backend.services.extraction_cache import chunk_cache, extraction_cache, extraction_key
+from backend.services.json_stream import JsonArrayStream
+from backend.services.prefilter import select_candidates
+from backend.services.rule_extractor import extract_events
+from backend.services.text_extraction import DocumentSource
+
+EXTRACTION_PROMPT = """
+        You are an expert legal document analyzer. Your task is to extract all deadline events, payment dates, deliverables, and important milestones from the provided text.
+
+        IMPORTANT: Keep the ORIGINAL LANGUAGE of the document. If the document is in Chinese, use Chinese for titles and descriptions. If in English, use English. DO NOT translate.
+
+        Return the result as a JSON list of objects. Each object should have:
+        - "title": A short descriptive title of the event in the SAME LANGUAGE as the source document (string)
+        - "due_date": The deadline date in ISO 8601 format (YYYY-MM-DD) or null if relative/unknown (string or null)
+        - "description": Context or details about the event in the SAME LANGUAGE as the source document (string)
+        - "confidence_score": Your confidence in this extraction (0-100 integer)
+        - "source_text": The snippet from the text where you found this information (string)
+
+        If no events are found, return an empty list.
+        Just return the JSON array, no markdown formatting or other text.
+        """
+
+# Part of the extraction cache key: editing the prompt invalidates cached results
+PROMPT_VERSION = hashlib.sha256(EXTRACTION_PROMPT.encode("utf-8")).hexdigest()[:12]
+
 
 class DocumentParserService:
     def __init__(self):
         self.client = None
+        self.cache = extraction_cache if settings.EXTRACTION_CACHE_ENABLED else None
+        self.chunk_cache = chunk_cache if settings.EXTRACTION_CACHE_ENABLED else None
+        self.prefilter = settings.LLM_PREFILTER_ENABLED
+        self.rule_fallback = settings.RULE_EXTRACTION_ENABLED
         if settings.AZURE_OPENAI_API_KEY and settings.AZURE_OPENAI_ENDPOINT:
             self.client = AzureOpenAI(
                 api_key=settings.AZURE_OPENAI_API_KEY,
                 api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                timeout=settings.LLM_REQUEST_TIMEOUT,
             )
 
-    def extract_text_from_pdf(self, file_content: bytes) -> str:
-        """
-        Extract text from PDF bytes using pypdf.
-        """
-        try:
-            reader = PdfReader(BytesIO(file_content))
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        except Exception as e:
-            print(f"PDF Extraction Error: {e}")
-            return ""
+    # Text extraction lives in services/text_extraction.py so worker processes can use it alone
 
-    def extract_text_from_docx(self, file_content: bytes) -> str:
-        """
-        Extract text from DOCX bytes using python-docx.
-        """
-        try:
-            # Method 1: Using python-docx (better for structured content)
-            doc = Document(BytesIO(file_content))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-
-            # Also extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        text += cell.text + " "
-                    text += "\n"
-
-            return text
-        except Exception as e:
-            print(f"DOCX Extraction Error (python-docx): {e}")
-            # Fallback to docx2txt
-            try:
-                text = docx2txt.process(BytesIO(file_content))
-                return text
-            except Exception as e2:
-                print(f"DOCX Extraction Error (docx2txt): {e2}")
-                return ""
-
-    def extract_text_from_doc(self, file_content: bytes) -> str:
-        """
-        Extract text from DOC (legacy Word format).
-        Note: .doc format is complex and requires external tools.
-        This is a basic implementation that may not work for all .doc files.
-        """
-        try:
-            # Try to use docx2txt (works for some .doc files)
-            text = docx2txt.process(BytesIO(file_content))
-            if text:
-                return text
-
-            # For production, consider using:
-            # - LibreOffice (via subprocess)
-            # - antiword (via subprocess)
-            # - Online conversion service
-            print("Warning: .doc format support is limited. Consider converting to .docx for best results.")
-            return ""
-        except Exception as e:
-            print(f"DOC Extraction Error: {e}")
-            print("Note: .doc format requires external tools. Please convert to .docx or .pdf")
-            return ""
+    def iter_pdf_pages(self, source: DocumentSource) -> Iterator[str]:
+        return text_extraction.iter_pdf_pages(source)
 
-    def extract_text(self, file_content: bytes, file_type: str) -> str:
-        """
-        Universal text extraction method that handles multiple formats.
-        """
-        file_type = file_type.lower()
-
-        if file_type == "pdf":
-            return self.extract_text_from_pdf(file_content)
-        elif file_type == "docx":
-            return self.extract_text_from_docx(file_content)
-        elif file_type == "doc":
-            return self.extract_text_from_doc(file_content)
-        else:
-            print(f"Unsupported file type: {file_type}")
-            return ""
+    def extract_text_from_pdf(self, source: DocumentSource) -> str:
+        return text_extraction.extract_text_from_pdf(source)
 
-    def analyze_text_with_llm(self, text: str) -> list[dict]:
+    def extract_text_from_docx(self, source: DocumentSource) -> str:
+        return text_extraction.extract_text_from_docx(source)
+
+    def extract_text_from_doc(self, source: DocumentSource) -> str:
+        return text_extraction.extract_text_from_doc(source)
+
+    def extract_text(self, source: DocumentSource, file_type: str) -> str:
+        return text_extraction.extract_text(source, file_type)
+
+    def analyze_text_with_llm(self, text: str, on_event: Callable[[dict], None] | None = None) -> list[dict]:
         """
         Analyze text using Azure OpenAI to extract deadlines and events.
-        """
-        if not self.client:
-            print("Azure OpenAI client not initialized.")
-            return []
 
-        # Truncate text if too long (simple approach for MVP)
-        # Ideally we should chunk it, but for most docs < 50 pages, full context is better if token limit allows.
-        # GPT-4o has 128k context, so usually fine.
-        truncated_text = text[:100000] 
+        Long text is split into overlapping chunks on page/section boundaries
+        and the chunks are analyzed concurrently (LLM_MAX_CONCURRENCY at a
+        time), so latency follows the slowest chunk rather than the length
+        of the document. Events repeated across chunks are merged.
 
-        prompt = """
-        You are an expert legal document analyzer. Your task is to extract all deadline events, payment dates, deliverables, and important milestones from the provided text.
+        Results are cached by content hash, so identical text is only sent
+        to the model once per prompt version and deployment. Chunks are
+        cached too: re-analyzing a revised document only sends the chunks
+        whose text changed.
 
-        IMPORTANT: Keep the ORIGINAL LANGUAGE of the document. If the document is in Chinese, use Chinese for titles and descriptions. If in English, use English. DO NOT translate.
+        Long documents are first reduced to the lines that look like
+        deadlines, with some context (services/prefilter.py).
 
-        Return the result as a JSON list of objects. Each object should have:
-        - "title": A short descriptive title of the event in the SAME LANGUAGE as the source document (string)
-        - "due_date": The deadline date in ISO 8601 format (YYYY-MM-DD) or null if relative/unknown (string or null)
-        - "description": Context or details about the event in the SAME LANGUAGE as the source document (string)
-        - "confidence_score": Your confidence in this extraction (0-100 integer)
-        - "source_text": The snippet from the text where you found this information (string)
+        Without a configured client, or for chunks whose request fails, the
+        rule-based extractor's events are used instead.
 
-        If no events are found, return an empty list.
-        Just return the JSON array, no markdown formatting or other text.
+        With `on_event`, completions are streamed (LLM_STREAMING) and each
+        event is passed to it as soon as the model has written it, before
+        its chunk is finished. Those are provisional: a chunk that fails
+        later has already reported some events, and duplicates across chunks
+        are not merged yet. The returned list is the final result.
         """
+        if not self.client:
+            print("Azure OpenAI client not initialized.")
+            return extract_events(text) if self.rule_fallback else []
+
+        if self.prefilter and len(text) > settings.LLM_PREFILTER_MIN_CHARS:
+            candidates = select_candidates(text, settings.LLM_PREFILTER_CONTEXT_LINES)
+            if len(candidates) < len(text) * 0.8:  # Not worth dropping context for less
+                print(f"LLM prefilter kept {len(candidates)} of {len(text)} characters")
+                text = candidates
+
+        chunks = split_text(text, settings.LLM_CHUNK_CHARS, settings.LLM_CHUNK_OVERLAP)
+        if not chunks:
+            return []
+
+        deployment = settings.AZURE_OPENAI_DEPLOYMENT
+        cache_key = None
+        if self.cache:
+            cache_key = extraction_key(text, PROMPT_VERSION, deployment)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"LLM extraction cache hit ({len(cached)} events)")
+                return cached
+
+        results: list = [None] * len(chunks)
+        chunk_keys: list = [None] * len(chunks)
+        if self.chunk_cache:
+            for i, chunk in enumerate(chunks):
+                chunk_keys[i] = extraction_key(chunk, PROMPT_VERSION, deployment)
+                results[i] = self.chunk_cache.get(chunk_keys[i])
+
+        todo = [i for i, r in enumerate(results) if r is None]
+        if todo:
+            workers = max(1, min(settings.LLM_MAX_CONCURRENCY, len(todo)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-chunk") as pool:
+                fresh = list(pool.map(lambda i: self._analyze_chunk(chunks[i], i + 1, len(chunks), on_event), todo))
+            for i, events in zip(todo, fresh):
+                results[i] = events
+                if events is not None and chunk_keys[i]:
+                    self.chunk_cache.put(chunk_keys[i], events, PROMPT_VERSION, deployment)
+        if len(todo) < len(chunks):
+            print(f"LLM reused cached results for {len(chunks) - len(todo)} of {len(chunks)} chunks")
+
+        failed = sum(1 for r in results if r is None)
+        if failed and self.rule_fallback:
+            print(f"LLM failed on {failed} of {len(chunks)} chunks; using rule-based events for them")
+            results = [extract_events(chunks[i]) if r is None else r for i, r in enumerate(results)]
+        events = merge_events([r for r in results if r])
+        if len(chunks) > 1:
+            found = sum(len(r) for r in results if r)
+            print(f"LLM extracted {found} events from {len(chunks)} chunks, {len(events)} after merging")
+
+        # Partial results (a chunk failed) are not cached so a re-upload retries
+        if cache_key and not failed:
+            self.cache.put(cache_key, events, PROMPT_VERSION, deployment)
+        return events
+
+    def _analyze_chunk(self, chunk: str, part: int, parts: int, on_event=None) -> list[dict] | None:
+        """Send one chunk to the model. Returns None on error, dropping only this chunk's events."""
+        if parts > 1:
+            user_content = f"Here is part {part} of {parts} of the document text:\n\n{chunk}"
+        else:
+            user_content = f"Here is the document text:\n\n{chunk}"
+        stream = bool(on_event) and settings.LLM_STREAMING
 
         try:
             response = self.client.chat.completions.create(
                 model=settings.AZURE_OPENAI_DEPLOYMENT,
                 messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": f"Here is the document text:\n\n{truncated_text}"}
+                    {"role": "system", "content": EXTRACTION_PROMPT},
+                    {"role": "user", "content": user_content}
                 ],
                 temperature=0,
-                response_format={"type": "json_object"} # or just standard if model doesn't support json_object mode perfectly yet, but gpt-4 usually does. Azure deployment gpt-4.1 might act like gpt-4-turbo.
+                response_format={"type": "json_object"}, # or just standard if model doesn't support json_object mode perfectly yet, but gpt-4 usually does. Azure deployment gpt-4.1 might act like gpt-4-turbo.
+                stream=stream,
             )
-            
-            content = response.choices[0].message.content
-            # Parse JSON
-            # The model might return {"events": [...]} or just [...]
-            # We asked for a list, but sometimes it wraps.
-            data = json.loads(content)
-            
-            if isinstance(data, list):
-                return data
-            elif isinstance(data, dict) and "events" in data:
-                return data["events"]
-            elif isinstance(data, dict):
-                 # Try to find any list in the dict values
-                 for val in data.values():
-                     if isinstance(val, list):
-                         return val
-            return []
+
+            if stream:
+                content = self._consume_stream(response, on_event)
+            else:
+                content = response.choices[0].message.content
+            return _parse_events(content)
 
         except Exception as e:
-            print(f"LLM Analysis Error: {e}")
-            return []
+            print(f"LLM Analysis Error (part {part}/{parts}): {e}")
+            return None
+
+    def _consume_stream(self, response, on_event) -> str:
+        """
+        Read a streamed completion, reporting each event as it closes; returns
+        the full content. The caller parses that as a non-streamed reply, so
+        events in a shape the stream parser does not pick up are still kept.
+        """
+        parser = JsonArrayStream()
+        pieces = []
+        for update in response:
+            # Azure sends an initial update with only content filter results
+            if not update.choices:
+                continue
+            piece = update.choices[0].delta.content
+            if not piece:
+                continue
+            pieces.append(piece)
+            for event in parser.feed(piece):
+                try:
+                    on_event(event)
+                except Exception as e:
+                    print(f"LLM streamed event callback failed: {e}")
+        return "".join(pieces)
+
+
+def _parse_events(content: str) -> list:
+    # The model might return {"events": [...]} or just [...]
+    # We asked for a list, but sometimes it wraps.
+    data = json.loads(content)
+
+    if isinstance(data, list):
+        return data
+    elif isinstance(data, dict) and "events" in data:
+        return data["events"]
+    elif isinstance(data, dict):
+         # Try to find any list in the dict values
+         for val in data.values():
+             if isinstance(val, list):
+                 return val
+    return []
+
 
 parser_service = DocumentParserService()
@@ -0,0 +1,222 @@
+"""
+Precomputed reminder schedule.
+
+An event's reminder dates are fixed once its due_date and its recipients'
+NotificationRules are known, so they are materialized into reminder_schedule
+as (event, user, channel, fire_date) rows whenever events, rules or project
+membership change. The daily job then reads today's rows with one indexed
+query instead of re-evaluating every open event against every rule.
+
+Overdue reminders repeat daily, so each overdue day up to
+OVERDUE_NOTIFY_DAYS gets its own row.
+
+Writes only maintain the table while NOTIFICATION_SWEEP_SOURCE is
+"schedule", the one sweep that reads it. Rebuild everything after
+deploying the table or switching the source to "schedule":
+    python -m backend.services.reminder_schedule rebuild
+"""
+import argparse
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, exists, insert, select, union
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.models import (
+    DeadlineEvent, Document, NotificationLog, NotificationRule,
+    Profile, Project, ProjectMember, ReminderSchedule,
+)
+from backend.services.sweep import (
+    OVERDUE_NOTIFY_DAYS, DeadlineSweep, PendingNotification,
+    claimed_on, in_shard, notify_window_start, parse_due_date, resolve_channels, wants_digest,
+)
+
+logger = logging.getLogger(__name__)
+
+INSERT_CHUNK = 1000
+
+
+def schedule_for(due_date: date, rules: list[NotificationRule], today: date) -> list[tuple[str, date, bool]]:
+    """
+    (channel, fire_date, digest) for every remaining reminder of one user on
+    one event, using the same channel resolution as the live sweep.
+    """
+    offsets = {rule.days_before for rule in rules} | set(range(-1, -OVERDUE_NOTIFY_DAYS - 1, -1))
+    entries = []
+    for days_left in sorted(offsets, reverse=True):
+        fire_date = due_date - timedelta(days=days_left)
+        if fire_date < today:
+            continue
+        digest = wants_digest(rules, days_left)
+        for channel in sorted(resolve_channels(rules, days_left)):
+            entries.append((channel, fire_date, digest))
+    return entries
+
+
+def _uuids(values) -> list[uuid.UUID]:
+    """Endpoints pass ids as strings; the columns bind uuid.UUID."""
+    return [v if isinstance(v, uuid.UUID) else uuid.UUID(str(v)) for v in values]
+
+
+class ReminderScheduler:
+    """Rebuilds reminder_schedule rows for the events affected by a change."""
+
+    def __init__(self, db: Session, today: date = None):
+        self.db = db
+        self.today = today or datetime.now().date()
+
+    def rebuild(self, scope=None) -> int:
+        """
+        Replace the schedule of every event matching `scope` (a criterion on
+        DeadlineEvent/Document; None means all events). Returns rows written.
+        """
+        db = self.db
+        rows = []
+        for event, _, user, rules in DeadlineSweep(db, scope=scope).recipients(notify_window_start(self.today)):
+            due_date = parse_due_date(event)
+            if due_date is None:
+                continue
+            for channel, fire_date, digest in schedule_for(due_date, rules, self.today):
+                rows.append({
+                    "event_id": event.id,
+                    "user_id": user.id,
+                    "channel": channel,
+                    "fire_date": fire_date,
+                    "digest": digest,
+                })
+
+        try:
+            stmt = delete(ReminderSchedule)
+            if scope is not None:
+                stmt = stmt.where(ReminderSchedule.event_id.in_(
+                    select(DeadlineEvent.id)
+                    .join(Document, Document.id == DeadlineEvent.document_id)
+                    .where(scope)
+                ))
+            db.execute(stmt)
+            for i in range(0, len(rows), INSERT_CHUNK):
+                db.execute(insert(ReminderSchedule), rows[i:i + INSERT_CHUNK])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(rows)
+
+    def rebuild_events(self, event_ids) -> int:
+        return self.rebuild(DeadlineEvent.id.in_(_uuids(event_ids)))
+
+    def rebuild_projects(self, project_ids) -> int:
+        return self.rebuild(Document.project_id.in_(_uuids(project_ids)))
+
+    def rebuild_users(self, user_ids) -> int:
+        """Events of every project the users own or have joined."""
+        user_ids = _uuids(user_ids)
+        projects = union(
+            select(Project.id).where(Project.owner_id.in_(user_ids)),
+            select(ProjectMember.project_id).where(
+                ProjectMember.user_id.in_(user_ids),
+                ProjectMember.status == "accepted",
+            ),
+        ).subquery()
+        return self.rebuild(Document.project_id.in_(select(projects)))
+
+    def prune(self) -> int:
+        """Drop rows whose day has passed."""
+        result = self.db.execute(delete(ReminderSchedule).where(ReminderSchedule.fire_date < self.today))
+        self.db.commit()
+        return result.rowcount
+
+
+def refresh_reminders(event_ids=None, project_ids=None, user_ids=None, db: Session = None):
+    """
+    Keep the schedule in step with a write made elsewhere. Failures are
+    logged, not raised: the caller's change has already been saved. A
+    no-op unless the sweep reads the schedule.
+    """
+    if settings.NOTIFICATION_SWEEP_SOURCE != "schedule":
+        return
+    if not (event_ids or project_ids or user_ids):
+        return
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        scheduler = ReminderScheduler(db)
+        if event_ids:
+            scheduler.rebuild_events(event_ids)
+        if project_ids:
+            scheduler.rebuild_projects(project_ids)
+        if user_ids:
+            scheduler.rebuild_users(user_ids)
+    except Exception as e:
+        logger.error(f"Failed to refresh reminder schedule: {e}")
+        db.rollback()
+    finally:
+        if own_session:
+            db.close()
+
+
+class ScheduledSweep:
+    """
+    Drop-in for DeadlineSweep that reads today's reminder_schedule rows
+    (one query) instead of evaluating rules.
+    """
+
+    def __init__(self, db: Session, shard=None):
+        self.db = db
+        self.shard = shard
+
+    def collect(self, today: date = None) -> list[PendingNotification]:
+        today = today or datetime.now().date()
+
+        already_claimed = exists().where(
+            NotificationLog.user_id == ReminderSchedule.user_id,
+            NotificationLog.event_id == ReminderSchedule.event_id,
+            NotificationLog.notification_type == ReminderSchedule.channel,
+            claimed_on(today),
+        )
+        rows = self.db.query(ReminderSchedule.channel, ReminderSchedule.digest, DeadlineEvent, Project, Profile) \
+            .join(DeadlineEvent, DeadlineEvent.id == ReminderSchedule.event_id) \
+            .join(Document, Document.id == DeadlineEvent.document_id) \
+            .join(Project, Project.id == Document.project_id) \
+            .join(Profile, Profile.id == ReminderSchedule.user_id) \
+            .filter(
+                ReminderSchedule.fire_date == today,
+                DeadlineEvent.status != "completed",
+                in_shard(Document.project_id, self.shard),
+                ~already_claimed,
+            ) \
+            .all()
+
+        pending: dict = {}
+        for channel, digest, event, project, user in rows:
+            item = pending.get((user.id, event.id))
+            if item is None:
+                due_date = parse_due_date(event)
+                if due_date is None:
+                    continue
+                item = pending[(user.id, event.id)] = PendingNotification(
+                    user=user, event=event, project=project, days_left=(due_date - today).days,
+                )
+            item.channels.add(channel)
+            item.digest = item.digest or digest
+
+        logger.info(f"Schedule has {len(pending)} pending notifications for {today}")
+        return list(pending.values())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    arg_parser = argparse.ArgumentParser(description="Maintain the reminder_schedule table")
+    arg_parser.add_argument("command", choices=["rebuild", "prune"])
+    args = arg_parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        scheduler = ReminderScheduler(session)
+        if args.command == "rebuild":
+            print(f"Wrote {scheduler.rebuild()} reminder rows")
+        else:
+            print(f"Pruned {scheduler.prune()} past reminder rows")
+    finally:
+        session.close()
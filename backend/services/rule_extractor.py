@@ -0,0 +1,239 @@
+"""
+Rule-based deadline extraction, no LLM involved.
+
+Finds absolute dates (ISO and other numeric forms, 民國 years, Chinese
+年月日 dates with Arabic, full-width or Chinese numerals, English month
+names) and relative periods ("決標次日起14日內", "within 30 days") and turns
+each into an event dict shaped like the LLM's output, with the enclosing
+clause as source_text. Relative periods are resolved only against a date in
+the same clause; otherwise the phrase is kept as the raw due date.
+
+Used as an instant first pass while a document waits for the LLM, and as the
+fallback when the model is not configured or a chunk request fails. Events
+are tagged extraction_source="rules" so the LLM pass can replace them.
+"""
+import calendar
+import re
+from datetime import date, timedelta
+from backend.services.chunking import merge_events
+from backend.services.prefilter import DEADLINE_KEYWORDS
+
+SOURCE = "rules"
+
+# Full-width ASCII and the ideographic space map to ASCII one-for-one, so
+# offsets in the normalized text are offsets in the original
+_WIDTH = {cp: cp - 0xFEE0 for cp in range(0xFF01, 0xFF5F)}
+_WIDTH[0x3000] = 0x20
+
+_CN_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "兩": 2, "两": 2, "三": 3, "四": 4,
+              "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_NUM = "[0-9零〇一二三四五六七八九十百兩两]"
+_MONTHS = {name: i for i, names in enumerate(
+    ["", "jan january", "feb february", "mar march", "apr april", "may", "jun june",
+     "jul july", "aug august", "sep sept september", "oct october", "nov november", "dec december"]
+) for name in names.split()}
+_MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+
+# (pattern, group order): year, month, day
+_DATE_PATTERNS = [
+    (re.compile(r"(?:中華)?(?:民國)?\s*(" + _NUM + r"{2,4})\s*年\s*(" + _NUM + r"{1,3})\s*月\s*(" + _NUM + r"{1,3})\s*[日號号]"), "ymd"),
+    (re.compile(r"(?<!\d)(?<!\d\.)(\d{4}|\d{3})\s*([-/.])\s*(\d{1,2})\s*\2\s*(\d{1,2})(?!\.?\d)"), "y-md"),
+    (re.compile(_MONTH + r"\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b", re.IGNORECASE), "mdy"),
+    (re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+" + _MONTH + r",?\s+(\d{4})\b", re.IGNORECASE), "dmy"),
+]
+
+_ZH_UNIT = r"(日曆天|工作天|營業日|天|日|週|星期|月|年)"
+_RELATIVE_ZH = re.compile(
+    r"(" + _NUM + r"+)\s*個?\s*" + _ZH_UNIT + r"\s*(內|内|以內|以内|之內|之内|前|以前)"
+    r"|(前)\s*(" + _NUM + r"+)\s*個?\s*" + _ZH_UNIT  # 屆滿前二個月
+)
+_RELATIVE_EN = re.compile(
+    r"\b(within|no later than|not later than|at least|after)\s+(?:(\w+)\s+)?(?:\((\d+)\)\s+)?"
+    r"(business |calendar |working )?(days?|weeks?|months?|years?)\b"
+    r"|\b(\d+)\s+(business |calendar |working )?(days?|weeks?|months?)\s+(after|before|prior to|of|from)\b",
+    re.IGNORECASE,
+)
+_EN_NUMBERS = {word: i for i, word in enumerate(
+    "zero one two three four five six seven eight nine ten eleven twelve".split()
+)}
+_EN_NUMBERS.update({"fourteen": 14, "fifteen": 15, "twenty": 20, "thirty": 30, "sixty": 60, "ninety": 90})
+
+_CLAUSE_END = re.compile(r"[。；;！？!?]|\.(?=\s|$)")
+# Words whose trailing period does not end a sentence
+_ABBREVIATIONS = {"no", "co", "inc", "ltd", "corp", "art", "sec", "mr", "ms", "dr", "st", "vs", "e.g", "i.e"} | set(_MONTHS)
+_HEADING = re.compile(
+    r"^\s*(?:第\s*" + _NUM + r"+\s*[條章節款]|\d{1,2}\.(?!\d))\s*(.{1,40}?)\s*$"
+)
+_LABEL = re.compile(r"^\s*([^\s:：]{2,20})\s*[:：]")
+
+
+def _to_int(numeral: str) -> int | None:
+    """Arabic digits, digit-by-digit Chinese (一一三 = 113) or positional Chinese (二十一 = 21)."""
+    if numeral.isdigit():
+        return int(numeral)
+    if "十" not in numeral and "百" not in numeral:
+        digits = [_CN_DIGITS.get(ch) for ch in numeral]
+        return None if None in digits else int("".join(map(str, digits)))
+    total = current = 0
+    for ch in numeral:
+        if ch == "百":
+            total += (current or 1) * 100
+            current = 0
+        elif ch == "十":
+            total += (current or 1) * 10
+            current = 0
+        elif ch in _CN_DIGITS:
+            current = _CN_DIGITS[ch]
+        else:
+            return None
+    return total + current
+
+
+def _make_date(year: int, month: int, day: int) -> date | None:
+    if year < 1000:
+        year += 1911  # 民國 (ROC) year
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _absolute_dates(clause: str) -> list[tuple[int, int, date]]:
+    """(start, end, date) of every absolute date in a width-normalized clause."""
+    found = {}
+    for pattern, order in _DATE_PATTERNS:
+        for match in pattern.finditer(clause):
+            if any(start <= match.start() < end for start, end in found):
+                continue  # Already read by an earlier pattern
+            if order == "ymd":
+                parts = [_to_int(g) for g in match.groups()]
+            elif order == "y-md":
+                parts = [int(match.group(1)), int(match.group(3)), int(match.group(4))]
+            elif order == "mdy":
+                parts = [int(match.group(3)), _MONTHS[match.group(1).lower().rstrip(".")], int(match.group(2))]
+            else:
+                parts = [int(match.group(3)), _MONTHS[match.group(2).lower().rstrip(".")], int(match.group(1))]
+            if None in parts:
+                continue
+            parsed = _make_date(*parts)
+            if parsed:
+                found[(match.start(), match.end())] = parsed
+    return sorted((start, end, parsed) for (start, end), parsed in found.items())
+
+
+def _add(anchor: date, amount: int, unit: str) -> date:
+    if unit in ("day", "days", "天", "日", "日曆天"):
+        return anchor + timedelta(days=amount)
+    if unit in ("week", "weeks", "週", "星期"):
+        return anchor + timedelta(weeks=amount)
+    months = amount * (12 if unit in ("year", "years", "年") else 1)
+    month_index = anchor.month - 1 + months
+    year, month = anchor.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def _relative(clause: str, dates) -> tuple[str, int | None, str | None, int] | None:
+    """(phrase, amount, unit, offset) of the first relative period in a clause."""
+    inside_date = lambda m: any(start <= m.start() < end for start, end, _ in dates)  # "3月1日前" is absolute
+    match = next((m for m in _RELATIVE_ZH.finditer(clause) if not inside_date(m)), None)
+    if match and match.group(1):
+        return match.group(0), _to_int(match.group(1)), match.group(2), match.start()
+    if match:
+        return match.group(0), _to_int(match.group(5)), match.group(6), match.start()
+    match = next((m for m in _RELATIVE_EN.finditer(clause) if not inside_date(m)), None)
+    if not match:
+        return None
+    if match.group(1):
+        word, digits, business, unit = match.group(2), match.group(3), match.group(4), match.group(5)
+        amount = int(digits) if digits else (int(word) if word and word.isdigit() else _EN_NUMBERS.get((word or "").lower()))
+    else:
+        amount, business, unit = int(match.group(6)), match.group(7), match.group(8)
+    if business and business.strip().lower() != "calendar":
+        unit = None  # Business days depend on a holiday calendar; keep the phrase raw
+    return match.group(0), amount, unit and unit.lower(), match.start()
+
+
+def _clauses(text: str):
+    """Yield (clause, original clause, heading) in document order."""
+    normalized = text.translate(_WIDTH)
+    heading = None
+    offset = 0
+    for line in normalized.split("\n"):
+        original_line = text[offset:offset + len(line)]
+        offset += len(line) + 1
+        heading_match = _HEADING.match(line)
+        if heading_match and not _absolute_dates(line):
+            heading = heading_match.group(1) or heading
+            continue
+        start = 0
+        for end_match in list(_CLAUSE_END.finditer(line)) + [None]:
+            if end_match and end_match.group() == "." and _abbreviation(line, end_match.start()):
+                continue
+            end = end_match.end() if end_match else len(line)
+            if line[start:end].strip():
+                yield line[start:end].strip(), original_line[start:end].strip(), heading
+            start = end
+
+
+def _abbreviation(line: str, period: int) -> bool:
+    word = re.search(r"([A-Za-z.]+)$", line[:period])
+    return bool(word) and (word.group(1).lower() in _ABBREVIATIONS or len(word.group(1)) == 1)
+
+
+def _title(clause: str, heading: str | None) -> str:
+    label = _LABEL.match(clause)
+    if label and not _absolute_dates(label.group(1)):
+        return label.group(1)
+    if heading:
+        return heading.capitalize() if heading.isupper() else heading
+    return clause[:30].strip()
+
+
+def extract_events(text: str) -> list[dict]:
+    """Deadline events found by rules, in the LLM's event format."""
+    events = []
+    for clause, original, heading in _clauses(text or ""):
+        keyword = bool(DEADLINE_KEYWORDS.search(clause))
+        dates = _absolute_dates(clause)
+        relative = _relative(clause, dates)
+        title = _title(clause, heading)
+
+        if relative:
+            phrase, amount, unit, position = relative
+            anchors = [d for start, _, d in dates if start < position]
+            # "within 14 days after 1 March 2026": the anchor follows the phrase
+            after = position + len(phrase)
+            anchors = anchors or [d for start, _, d in dates if after <= start <= after + 12][:1]
+            if anchors and amount is not None and unit:
+                before = re.search(r"^前|(前|before|prior to)$", phrase, re.IGNORECASE)
+                due = _add(anchors[-1], -amount if before else amount, unit)
+                events.append(_event(title, due.isoformat(), original, 70))
+                dates = [entry for entry in dates if entry[2] != anchors[-1]]  # The anchor is a start, not a deadline
+            elif not dates:
+                # Kept as raw text (due_date_raw) with what it is relative to, e.g. "決標次日起14日內"
+                events.append(_event(title, _relative_context(clause, position, phrase), original, 45))
+
+        for _, _, due in dates:
+            events.append(_event(title, due.isoformat(), original, 85 if keyword else 60))
+    return merge_events([events])
+
+
+def _relative_context(clause: str, position: int, phrase: str) -> str:
+    """The phrase with the start of its sub-clause, trimmed to whole words."""
+    prefix = re.split(r"[，,、:：]", clause[:position])[-1]
+    if len(prefix) > 30:
+        prefix = prefix[-30:]
+        if " " in prefix:
+            prefix = prefix[prefix.index(" ") + 1:]
+    return (prefix + phrase).strip()
+
+
+def _event(title: str, due_date: str, clause: str, confidence: int) -> dict:
+    return {
+        "title": title,
+        "due_date": due_date,
+        "description": clause,
+        "confidence_score": confidence,
+        "source_text": clause,
+        "extraction_source": SOURCE,
+    }
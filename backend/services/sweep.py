@@ -0,0 +1,259 @@
+"""
+Set-based deadline sweep.
+
+Computes "which user needs which channel for which event today" with a fixed
+number of joined queries instead of walking events one at a time.
+
+A sweep can be limited to one shard, a contiguous range of project ids, so
+several workers can split the daily run (see services/sweep_leases.py).
+"""
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, or_, select, true, union
+from sqlalchemy.orm import Session
+from backend.models import (
+    DeadlineEvent, Project, Profile, Document,
+    NotificationLog, NotificationRule, ProjectMember,
+)
+from backend.services.dates import parse_date_text
+from backend.services.notification_log import claim_is_live
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNELS = ["line", "email"]
+UUID_SPACE = 1 << 128
+OVERDUE_NOTIFY_DAYS = 30  # Stop notifying once overdue longer than this
+
+
+@dataclass
+class PendingNotification:
+    """One user that needs a reminder for one event, and on which channels."""
+    user: Profile
+    event: DeadlineEvent
+    project: Project
+    days_left: int
+    channels: set[str] = field(default_factory=set)
+    digest: bool = False  # Fold into the user's daily digest instead of sending on its own
+
+
+def shard_bounds(shard: int, shard_count: int) -> tuple[uuid.UUID, uuid.UUID | None]:
+    """
+    Project-id range [low, high) covered by a shard. Project ids are random
+    UUIDs, so equal slices of the id space hold roughly equal work. The last
+    shard is open-ended.
+    """
+    low = uuid.UUID(int=shard * UUID_SPACE // shard_count)
+    high = uuid.UUID(int=(shard + 1) * UUID_SPACE // shard_count) if shard + 1 < shard_count else None
+    return low, high
+
+
+def in_shard(column, shard: tuple[uuid.UUID, uuid.UUID | None] = None):
+    """SQL criterion restricting a project-id column to a shard (None = everything)."""
+    if shard is None:
+        return true()
+    low, high = shard
+    return column >= low if high is None else and_(column >= low, column < high)
+
+
+def parse_due_date(event: DeadlineEvent) -> date | None:
+    """An event's due_date as a date. Returns None if missing or invalid."""
+    due_date = parse_date_text(event.due_date)
+    if due_date is None and event.due_date:
+        logger.warning(f"Invalid date for event {event.id}: {event.due_date}")
+    return due_date
+
+
+def notify_window_start(today: date) -> date:
+    """Earliest due_date that can still produce a reminder today."""
+    return today - timedelta(days=OVERDUE_NOTIFY_DAYS)
+
+
+def resolve_channels(rules: list[NotificationRule], days_left: int) -> set[str]:
+    """
+    Resolve which channels a user's active rules ask for, given days left.
+    The first rule whose days_before matches wins; overdue events (up to
+    OVERDUE_NOTIFY_DAYS) use the channels of every active rule.
+    """
+    channels = set()
+
+    for rule in rules:
+        if days_left == rule.days_before:
+            channels.update(rule.channels if rule.channels else DEFAULT_CHANNELS)
+            break
+
+    if days_left < 0:
+        if days_left < -OVERDUE_NOTIFY_DAYS:
+            return set()
+        for rule in rules:
+            channels.update(rule.channels if rule.channels else DEFAULT_CHANNELS)
+        if not channels:
+            channels = set(DEFAULT_CHANNELS)  # Default if no rules exist
+
+    return channels
+
+
+def wants_digest(rules: list[NotificationRule], days_left: int) -> bool:
+    """
+    Whether the rules behind resolve_channels opted into the daily digest:
+    the matching rule for upcoming events, any active rule for overdue ones.
+    """
+    if days_left < 0:
+        return any(rule.digest for rule in rules)
+    for rule in rules:
+        if days_left == rule.days_before:
+            return bool(rule.digest)
+    return False
+
+
+def claimed_on(today: date):
+    """Log rows that block another send today: sent, or claimed by a run that may still be sending."""
+    today_start = datetime.combine(today, datetime.min.time())
+    return and_(
+        NotificationLog.sent_at >= today_start,
+        or_(
+            NotificationLog.status == "sent",
+            claim_is_live(),
+        ),
+    )
+
+
+class DeadlineSweep:
+    """
+    Collects pending notifications for all open events in one pass.
+
+    Query count is independent of the number of events:
+      1. open events still inside the notify window ⨝ documents ⨝ projects
+      2. accepted project members of those projects
+      3. profiles of owners + members
+      4. active rules of those users
+      5. today's sent or in-flight logs for those events (anti-join)
+    """
+
+    def __init__(self, db: Session, shard: tuple[uuid.UUID, uuid.UUID | None] = None, scope=None):
+        self.db = db
+        self.shard = shard  # (low, high) project-id bounds from shard_bounds()
+        self.scope = scope  # Optional extra criterion on DeadlineEvent/Document
+
+    def _event_filter(self, due_from: date = None):
+        return and_(
+            DeadlineEvent.status != "completed",
+            DeadlineEvent.due_date >= due_from if due_from is not None else true(),
+            in_shard(Document.project_id, self.shard),
+            self.scope if self.scope is not None else true(),
+        )
+
+    def _open_events(self, due_from: date = None):
+        return (
+            select(DeadlineEvent.id, Document.project_id)
+            .join(Document, Document.id == DeadlineEvent.document_id)
+            .where(self._event_filter(due_from))
+        )
+
+    def recipients(self, due_from: date = None) -> list[tuple[DeadlineEvent, Project, Profile, list[NotificationRule]]]:
+        """
+        (event, project, user, active rules) for every recipient of every open
+        event in scope: the project owner first, then accepted members.
+        `due_from` skips events due before that date. Runs queries 1-4.
+        """
+        db = self.db
+        open_events = self._open_events(due_from).subquery()
+        project_ids = select(open_events.c.project_id).distinct()
+
+        # 1. Events with their project
+        rows = db.query(DeadlineEvent, Project) \
+            .join(Document, Document.id == DeadlineEvent.document_id) \
+            .join(Project, Project.id == Document.project_id) \
+            .filter(self._event_filter(due_from)) \
+            .all()
+
+        # 2. Accepted members per project
+        member_rows = db.query(ProjectMember.project_id, ProjectMember.user_id) \
+            .filter(
+                ProjectMember.project_id.in_(project_ids),
+                ProjectMember.status == "accepted",
+                ProjectMember.user_id.isnot(None),
+            ) \
+            .order_by(ProjectMember.invited_at, ProjectMember.id) \
+            .all()
+        members_by_project: dict = {}
+        for project_id, user_id in member_rows:
+            members_by_project.setdefault(project_id, []).append(user_id)
+
+        # 3. Profiles of everyone involved
+        recipient_ids = union(
+            select(Project.owner_id).where(Project.id.in_(project_ids)),
+            select(ProjectMember.user_id).where(
+                ProjectMember.project_id.in_(project_ids),
+                ProjectMember.status == "accepted",
+                ProjectMember.user_id.isnot(None),
+            ),
+        ).subquery()
+        profiles = {
+            p.id: p for p in db.query(Profile).filter(Profile.id.in_(select(recipient_ids)))
+        }
+
+        # 4. Active rules per user
+        rules_by_user: dict = {}
+        rules = db.query(NotificationRule) \
+            .filter(
+                NotificationRule.user_id.in_(select(recipient_ids)),
+                NotificationRule.is_active == True,
+            ) \
+            .order_by(NotificationRule.created_at, NotificationRule.id) \
+            .all()
+        for rule in rules:
+            rules_by_user.setdefault(rule.user_id, []).append(rule)
+
+        result = []
+        for event, project in rows:
+            # Owner first, then accepted members (deduplicated)
+            user_ids = [project.owner_id] + members_by_project.get(project.id, [])
+            seen = set()
+            for user_id in user_ids:
+                if user_id in seen or user_id not in profiles:
+                    continue
+                seen.add(user_id)
+                result.append((event, project, profiles[user_id], rules_by_user.get(user_id, [])))
+        return result
+
+    def collect(self, today: date = None) -> list[PendingNotification]:
+        today = today or datetime.now().date()
+        due_from = notify_window_start(today)
+        recipients = self.recipients(due_from)
+
+        # 5. Channels already sent today, or claimed by a run that may still be sending
+        open_events = self._open_events(due_from).subquery()
+        sent_rows = self.db.query(
+            NotificationLog.user_id,
+            NotificationLog.event_id,
+            NotificationLog.notification_type,
+        ).filter(
+            NotificationLog.event_id.in_(select(open_events.c.id)),
+            claimed_on(today),
+        ).all()
+        already_sent = {(u, e, ch) for u, e, ch in sent_rows}
+
+        pending = []
+        for event, project, user, user_rules in recipients:
+            due_date = parse_due_date(event)
+            if due_date is None:
+                continue
+            days_left = (due_date - today).days
+
+            channels = resolve_channels(user_rules, days_left)
+            remaining = {ch for ch in channels if (user.id, event.id, ch) not in already_sent}
+            if remaining:
+                pending.append(PendingNotification(
+                    user=user,
+                    event=event,
+                    project=project,
+                    days_left=days_left,
+                    channels=remaining,
+                    digest=wants_digest(user_rules, days_left),
+                ))
+
+        events = len({event.id for event, *_ in recipients})
+        logger.info(f"Sweep found {len(pending)} pending notifications across {events} open events")
+        return pending
@@ -0,0 +1,133 @@
+"""
+Shard leases for running the daily deadline sweep on several workers.
+
+Each run date is split into NOTIFICATION_SWEEP_SHARDS rows in
+sweep_shard_leases. A worker claims one unfinished shard at a time with
+SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers take disjoint
+shards without waiting on each other. The holder renews its lease while
+it sends; a lease that expires before its shard is completed (the worker
+crashed or hung) can be claimed again, and the previous holder stops once
+its next renewal fails.
+"""
+import logging
+import os
+import socket
+import time
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.models import SweepShardLease
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardLeases:
+    """Claims and completes sweep shards for one worker."""
+
+    def __init__(self, db: Session, worker_id: str = None, lease_seconds: float = None):
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds if lease_seconds is not None else settings.NOTIFICATION_SHARD_LEASE_SECONDS
+        self._renewed: dict[tuple[date, int], float] = {}  # Monotonic time of the last renewal per held shard
+
+    def ensure_run(self, run_date: date, shard_count: int):
+        """Create the shard rows for a run date unless another worker already did."""
+        exists = self.db.query(SweepShardLease.shard) \
+            .filter(SweepShardLease.run_date == run_date) \
+            .first()
+        if exists:
+            return
+        try:
+            self.db.add_all([
+                SweepShardLease(run_date=run_date, shard=shard, shard_count=shard_count, attempts=0)
+                for shard in range(shard_count)
+            ])
+            self.db.commit()
+            logger.info(f"Created {shard_count} sweep shards for {run_date}")
+        except IntegrityError:
+            self.db.rollback()  # Lost the race; the run already exists
+
+    def acquire(self, run_date: date) -> tuple[int, int] | None:
+        """
+        Lease the next unfinished shard that is free or whose lease expired.
+        Returns (shard, shard_count), or None when nothing is left to claim.
+        """
+        now = datetime.now(timezone.utc)
+        lease = self.db.query(SweepShardLease) \
+            .filter(
+                SweepShardLease.run_date == run_date,
+                SweepShardLease.completed_at.is_(None),
+                or_(
+                    SweepShardLease.lease_expires_at.is_(None),
+                    SweepShardLease.lease_expires_at < now,
+                ),
+            ) \
+            .order_by(SweepShardLease.shard) \
+            .with_for_update(skip_locked=True) \
+            .first()
+        if lease is None:
+            self.db.commit()
+            return None
+
+        if lease.worker_id:
+            logger.warning(f"Reclaiming sweep shard {lease.shard} from {lease.worker_id} (lease expired)")
+        lease.worker_id = self.worker_id
+        lease.lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+        lease.attempts += 1
+        claimed = (lease.shard, lease.shard_count)
+        self.db.commit()
+        self._renewed[(run_date, lease.shard)] = time.monotonic()
+        return claimed
+
+    def renew(self, run_date: date, shard: int) -> bool:
+        """
+        Extend this worker's lease on a shard. Returns False if the lease is
+        no longer ours (another worker reclaimed it) or cannot be renewed.
+        """
+        try:
+            renewed = self.db.query(SweepShardLease) \
+                .filter(
+                    SweepShardLease.run_date == run_date,
+                    SweepShardLease.shard == shard,
+                    SweepShardLease.worker_id == self.worker_id,
+                    SweepShardLease.completed_at.is_(None),
+                ) \
+                .update(
+                    {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)},
+                    synchronize_session=False,
+                )
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Failed to renew sweep shard {shard} lease: {e}")
+            self.db.rollback()
+            return False
+        if not renewed:
+            logger.warning(f"Lost the lease on sweep shard {shard}; another worker took it over")
+            return False
+        self._renewed[(run_date, shard)] = time.monotonic()
+        return True
+
+    def renew_if_due(self, run_date: date, shard: int) -> bool:
+        """renew() a few times per lease period; True while the lease is held."""
+        last = self._renewed.get((run_date, shard), 0.0)
+        if time.monotonic() - last < self.lease_seconds / 3:
+            return True
+        return self.renew(run_date, shard)
+
+    def complete(self, run_date: date, shard: int):
+        """Mark a shard done so no worker picks it up again."""
+        self.db.query(SweepShardLease) \
+            .filter(
+                SweepShardLease.run_date == run_date,
+                SweepShardLease.shard == shard,
+                SweepShardLease.worker_id == self.worker_id,
+            ) \
+            .update({"completed_at": datetime.now(timezone.utc)}, synchronize_session=False)
+        self.db.commit()
+        self._renewed.pop((run_date, shard), None)
@@ -0,0 +1,159 @@
+"""
+Text extraction from uploaded documents (PDF, DOCX, DOC).
+
+Kept free of API-side dependencies (LLM client, caches, database) so that
+extraction worker processes (services/extraction_pool.py) import only this
+module and the document libraries.
+"""
+import os
+from contextlib import contextmanager
+from io import BytesIO
+from typing import BinaryIO, Iterator, Union
+import docx2txt
+from docx import Document
+from pypdf import PdfReader
+from backend.services.chunking import PAGE_BREAK
+
+# File content as bytes, a filesystem path, or an open binary file (e.g. a spooled temp file)
+DocumentSource = Union[bytes, str, os.PathLike, BinaryIO]
+
+
+@contextmanager
+def _open_binary(source: DocumentSource):
+    """Seekable binary stream over a source. Caller-owned file objects are left open."""
+    if isinstance(source, (bytes, bytearray)):
+        yield BytesIO(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as stream:
+            yield stream
+    else:
+        source.seek(0)
+        yield source
+
+
+def iter_pdf_pages(source: DocumentSource, start: int = 0, stop: int = None) -> Iterator[str]:
+    """
+    Yield the text of each PDF page in order (pages start..stop-1 if given).
+
+    Paths and file objects are read lazily rather than loaded whole, and
+    pypdf's parsed-object cache is dropped after every page, so memory
+    stays flat regardless of page count (images on scanned pages are
+    never held for more than one page).
+    """
+    with _open_binary(source) as stream:
+        reader = PdfReader(stream)
+        pages = reader.pages
+        for i in range(start, len(pages) if stop is None else min(stop, len(pages))):
+            yield pages[i].extract_text() or ""
+            reader.resolved_objects.clear()
+
+
+def _join_pages(pages) -> str:
+    # Joined once; each page ends with a page boundary for chunking
+    return "".join(f"{page}\n{PAGE_BREAK}" for page in pages)
+
+
+def extract_text_from_pdf(source: DocumentSource) -> str:
+    """
+    Extract text from a PDF (bytes, path or binary file) using pypdf.
+    """
+    try:
+        return _join_pages(iter_pdf_pages(source))
+    except Exception as e:
+        print(f"PDF Extraction Error: {e}")
+        return ""
+
+
+def pdf_page_count(source: DocumentSource) -> int:
+    """Number of pages in a PDF, or 0 if it cannot be read."""
+    try:
+        with _open_binary(source) as stream:
+            return len(PdfReader(stream).pages)
+    except Exception as e:
+        print(f"PDF Extraction Error: {e}")
+        return 0
+
+
+def extract_pdf_page_range(source: DocumentSource, start: int, stop: int) -> str | None:
+    """
+    Text of pages start..stop-1, formatted like extract_text_from_pdf, so
+    concatenating consecutive ranges gives the whole document's text.
+    Returns None on error (unlike "" for a range without text).
+    """
+    try:
+        return _join_pages(iter_pdf_pages(source, start, stop))
+    except Exception as e:
+        print(f"PDF Extraction Error (pages {start}-{stop - 1}): {e}")
+        return None
+
+
+def extract_text_from_docx(source: DocumentSource) -> str:
+    """
+    Extract text from DOCX (bytes, path or binary file) using python-docx.
+    """
+    try:
+        # Method 1: Using python-docx (better for structured content)
+        with _open_binary(source) as stream:
+            doc = Document(stream)
+        parts = [paragraph.text + "\n" for paragraph in doc.paragraphs]
+
+        # Also extract text from tables
+        for table in doc.tables:
+            for row in table.rows:
+                parts.extend(cell.text + " " for cell in row.cells)
+                parts.append("\n")
+
+        return "".join(parts)
+    except Exception as e:
+        print(f"DOCX Extraction Error (python-docx): {e}")
+        # Fallback to docx2txt
+        try:
+            with _open_binary(source) as stream:
+                return docx2txt.process(stream)
+        except Exception as e2:
+            print(f"DOCX Extraction Error (docx2txt): {e2}")
+            return ""
+
+
+def extract_text_from_doc(source: DocumentSource) -> str:
+    """
+    Extract text from DOC (legacy Word format).
+    Note: .doc format is complex and requires external tools.
+    This is a basic implementation that may not work for all .doc files.
+    """
+    try:
+        # Try to use docx2txt (works for some .doc files)
+        with _open_binary(source) as stream:
+            text = docx2txt.process(stream)
+        if text:
+            return text
+
+        # For production, consider using:
+        # - LibreOffice (via subprocess)
+        # - antiword (via subprocess)
+        # - Online conversion service
+        print("Warning: .doc format support is limited. Consider converting to .docx for best results.")
+        return ""
+    except Exception as e:
+        print(f"DOC Extraction Error: {e}")
+        print("Note: .doc format requires external tools. Please convert to .docx or .pdf")
+        return ""
+
+
+def extract_text(source: DocumentSource, file_type: str) -> str:
+    """
+    Universal text extraction method that handles multiple formats.
+    `source` is the file content as bytes, a path, or a binary file
+    object such as a spooled temporary file.
+    """
+    file_type = file_type.lower()
+
+    if file_type == "pdf":
+        return extract_text_from_pdf(source)
+    elif file_type == "docx":
+        return extract_text_from_docx(source)
+    elif file_type == "doc":
+        return extract_text_from_doc(source)
+    else:
+        print(f"Unsupported file type: {file_type}")
+        return ""
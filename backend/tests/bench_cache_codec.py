@@ -0,0 +1,131 @@
+"""
+Benchmark: stored size and encode/decode time of cached dashboard payloads.
+
+    python -m backend.tests.bench_cache_codec --events 50 --projects 100 --repeat 2000
+
+Builds the entries the dashboard stats and project list endpoints cache
+(as get_or_compute stores them: value plus expiry metadata), with
+recent_events joined to their document and project, and runs every
+serializer/compression pair whose library is installed through
+CacheCodec. "legacy" is the plain json.dumps text RedisCache stored
+before codecs. Compression is forced on for every size here
+(--compress-min-bytes 0) to show what it costs; the codec only applies it
+above CACHE_COMPRESS_MIN_BYTES.
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/smart_doc_tracker_test")
+
+from backend.core.cache import ENTRY_MARKER  # noqa: E402
+from backend.core.cache_codec import COMPRESSORS, SERIALIZERS, CacheCodec, CodecError, _module  # noqa: E402
+
+TITLES = ["第一期款項支付", "Final Payment", "交貨期限", "保固期滿", "Insurance renewal", "驗收報告提交"]
+
+
+def entry(value) -> dict:
+    return {ENTRY_MARKER: 1, "value": value, "expires": time.time() + 60, "delta": 0.4321}
+
+
+def dashboard_payload(events: int, rng: random.Random) -> dict:
+    projects = [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"專案 {i} – 新建工程"} for i in range(8)]
+    today = date(2026, 10, 17)
+    recent = []
+    for i in range(events):
+        project = rng.choice(projects)
+        recent.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"{rng.choice(TITLES)} #{i}",
+            "due_date": (today + timedelta(days=rng.randint(-10, 90))).isoformat(),
+            "status": rng.choice(["pending", "in_progress"]),
+            "confidence_score": round(rng.random(), 2),
+            "document_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "documents": {
+                "original_filename": f"合約_{project['name']}_{i:03d}.pdf",
+                "project_id": project["id"],
+                "projects": project,
+            },
+        })
+    return entry({
+        "total_projects": len(projects), "total_documents": events * 2,
+        "overdue_tasks": 3, "upcoming_tasks": events, "recent_events": recent,
+    })
+
+
+def project_list_payload(count: int, rng: random.Random) -> dict:
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return entry([
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "owner_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"專案 {i}",
+            "description": "Construction contract deadlines and payment milestones" if i % 3 else None,
+            "created_at": (created + timedelta(days=i)).isoformat(),
+            "updated_at": None,
+            "doc_count": rng.randint(0, 40),
+            "event_count": rng.randint(0, 200),
+        }
+        for i in range(count)
+    ])
+
+
+def available(table: dict) -> list[str]:
+    names = []
+    for name, fmt in table.items():
+        try:
+            _module(fmt)
+            names.append(name)
+        except CodecError:
+            pass
+    return names
+
+
+def per_call_us(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--events", type=int, default=50, help="recent_events in the dashboard payload")
+    arg_parser.add_argument("--projects", type=int, default=100, help="Projects in the project list payload")
+    arg_parser.add_argument("--repeat", type=int, default=2000)
+    arg_parser.add_argument("--compress-min-bytes", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = {
+        f"dashboard ({args.events} events)": dashboard_payload(args.events, rng),
+        f"project list ({args.projects})": project_list_payload(args.projects, rng),
+    }
+    serializers, compressors = available(SERIALIZERS), available(COMPRESSORS)
+    missing = sorted(set(SERIALIZERS) - set(serializers) | set(COMPRESSORS) - set(compressors))
+    if missing:
+        print(f"Not installed, skipped: {', '.join(missing)}")
+
+    for label, payload in payloads.items():
+        legacy = json.dumps(payload, default=str)
+        print(f"\n{label}")
+        print(f"{'codec':>16} {'bytes':>8} {'encode µs':>10} {'decode µs':>10}")
+        print(f"{'legacy':>16} {len(legacy):>8} "
+              f"{per_call_us(lambda: json.dumps(payload, default=str), args.repeat):>10.1f} "
+              f"{per_call_us(lambda: json.loads(legacy), args.repeat):>10.1f}")
+        for serializer in serializers:
+            for compressor in compressors:
+                codec = CacheCodec(serializer, compressor, args.compress_min_bytes)
+                data = codec.encode(payload)
+                assert codec.decode(data) == json.loads(legacy)
+                encode = per_call_us(lambda: codec.encode(payload), args.repeat)
+                decode = per_call_us(lambda: codec.decode(data), args.repeat)
+                print(f"{serializer + '+' + compressor:>16} {len(data):>8} {encode:>10.1f} {decode:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: time-to-text of a large PDF vs. extraction pool size.
+
+    python -m backend.tests.bench_parallel_pdf --pages 400 --workers 1 2 4
+
+Writes a synthetic PDF (see bench_pdf_extraction.write_sample_pdf) and
+extracts it through ExtractionPool with each pool size. Pools are warmed up
+first, so worker start-up is not counted. Speedup is relative to the serial
+single-job extraction; it cannot exceed the number of free cores.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from backend.tests.bench_pdf_extraction import write_sample_pdf
+
+
+async def timed_extract(pool, path: str) -> tuple[float, str]:
+    await pool.run(pow, 2, 2)  # Start the workers before timing
+    start = time.perf_counter()
+    text = await pool.extract_text(path, "pdf")
+    return time.perf_counter() - start, text
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", type=int, default=400)
+    arg_parser.add_argument("--image-kb", type=int, default=0, help="Raw image size per page (0 = text only)")
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = arg_parser.parse_args()
+
+    from backend.core.config import settings
+    from backend.services.extraction_pool import ExtractionPool
+
+    settings.PDF_PARALLEL_MIN_PAGES = 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sample.pdf")
+        write_sample_pdf(path, args.pages, args.image_kb * 1024)
+        print(f"{args.pages} pages, {os.path.getsize(path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+        print(f"{'workers':>7} {'seconds':>8} {'speedup':>8}")
+
+        baseline = serial_text = None
+        for workers in args.workers:
+            pool = ExtractionPool(max_workers=workers, timeout=3600)
+            try:
+                seconds, text = asyncio.run(timed_extract(pool, path))
+            finally:
+                pool.shutdown()
+            if baseline is None:
+                baseline, serial_text = seconds, text
+            assert text == serial_text, "parallel extraction must match the serial text"
+            print(f"{workers:>7} {seconds:>8.2f} {baseline / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: page-at-a-time PDF extraction vs. the previous whole-blob method.
+
+    python -m backend.tests.bench_pdf_extraction --pages 500 --image-kb 200
+
+Writes a synthetic "scanned" PDF (one incompressible image plus a text
+layer per page) and extracts it with each method in a fresh process, so the
+reported peak RSS growth belongs to that method alone.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    DecodedStreamObject, DictionaryObject, EncodedStreamObject, NameObject, NumberObject,
+)
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/smart_doc_tracker_test")
+
+PAGE_BREAK = "\f"
+
+
+def write_sample_pdf(path: str, pages: int, image_bytes: int = 0):
+    """A PDF with 40 lines of Helvetica text per page and an optional raw image."""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for i in range(pages):
+        page = writer.add_blank_page(612, 792)
+        lines = [f"Page {i} clause {j}: payment due 2026-03-{1 + j % 28:02d}" for j in range(40)]
+        ops = ["BT /F1 10 Tf 50 750 Td 12 TL"] + [f"({line}) '" for line in lines] + ["ET"]
+        resources = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        if image_bytes:
+            image = EncodedStreamObject()
+            image._data = os.urandom(image_bytes)
+            image.update({
+                NameObject("/Type"): NameObject("/XObject"),
+                NameObject("/Subtype"): NameObject("/Image"),
+                NameObject("/Width"): NumberObject(image_bytes // 300 or 1),
+                NameObject("/Height"): NumberObject(100),
+                NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+                NameObject("/BitsPerComponent"): NumberObject(8),
+            })
+            resources[NameObject("/XObject")] = DictionaryObject({NameObject("/Im0"): writer._add_object(image)})
+            ops.insert(0, "q 100 0 0 100 0 0 cm /Im0 Do Q")
+        content = DecodedStreamObject()
+        content.set_data("\n".join(ops).encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = resources
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def legacy_extract(file_content: bytes) -> str:
+    """The previous implementation: whole file in memory, text built with +=."""
+    reader = PdfReader(BytesIO(file_content))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n" + PAGE_BREAK
+    return text
+
+
+def run_method(method: str, path: str):
+    """
+    Executed in a child process; prints seconds, peak RSS growth over the
+    post-import baseline (MB) and text length.
+    """
+    from backend.services.parser import parser_service
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if method == "legacy":
+        with open(path, "rb") as f:
+            text = legacy_extract(f.read())
+    else:
+        text = parser_service.extract_text_from_pdf(path)
+    elapsed = time.perf_counter() - start
+    growth_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+    print(f"{elapsed:.3f} {growth_mb:.1f} {len(text)}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", type=int, default=500)
+    arg_parser.add_argument("--image-kb", type=int, default=200, help="Raw image size per page (0 = text only)")
+    arg_parser.add_argument("--run", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run:
+        run_method(args.run, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sample.pdf")
+        write_sample_pdf(path, args.pages, args.image_kb * 1024)
+        print(f"{args.pages} pages, {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"{'method':<10} {'seconds':>8} {'+RSS MB':>8} {'chars':>10}")
+        for method in ("legacy", "streaming"):
+            out = subprocess.run(
+                [sys.executable, "-m", "backend.tests.bench_pdf_extraction", "--run", method, "--path", path],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()[-3:]
+            seconds, growth, chars = out
+            print(f"{method:<10} {seconds:>8} {growth:>8} {chars:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+# Add project root directory to python path
+# Current file: backend/tests/conftest.py
+# Root: ../../
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# The app engine is created at import time; give it a URL so imports work
+# without a .env. Tests never connect through it.
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/smart_doc_tracker_test")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import sessionmaker
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    # A column declared "UUID" gets NUMERIC affinity in SQLite, which turns
+    # all-digit hex ids into numbers and breaks range comparisons
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with the full schema."""
+    from backend.core.database import Base
+    import backend.models  # noqa: F401  (register tables)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements: list[str] = []
+
+    def _on_execute(self, conn, cursor, statement, *args, **kwargs):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.count = 0
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@pytest.fixture
+def count_queries(db):
+    """Context manager factory: `with count_queries() as q: ...; q.count`."""
+    return lambda: QueryCounter(db.get_bind())
@@ -0,0 +1,639 @@
+"""
+Local fake provider servers for tests: LINE Messaging API, SMTP, Resend,
+Azure OpenAI chat completions and Supabase Auth.
+Each server runs on 127.0.0.1 on a free port in a background thread.
+"""
+import json
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ConcurrencyTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.active -= 1
+
+
+class _BackgroundServer:
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeLineServer(_BackgroundServer):
+    """Accepts POST /v2/bot/message/push and records each push."""
+
+    def __init__(self, delay: float = 0.0, fail_for: set[str] = None):
+        self.delay = delay
+        self.fail_for = fail_for or set()
+        self.pushes: list[dict] = []
+        self.timestamps: list[float] = []
+        self.concurrency = _ConcurrencyTracker()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with fake.concurrency:
+                    time.sleep(fake.delay)
+                    fake.pushes.append(body)
+                    fake.timestamps.append(time.monotonic())
+                status = 400 if body.get("to") in fake.fail_for else 200
+                payload = json.dumps({"message": "bad request"} if status == 400 else {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+
+class FakeSmtpServer(_BackgroundServer):
+    """
+    Minimal ESMTP server (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT).
+    `connections` counts TCP sessions, i.e. connect + EHLO + AUTH handshakes.
+    `drop_after` closes a session after that many messages to simulate
+    server-side disconnects.
+    """
+
+    def __init__(self, delay: float = 0.0, drop_after: int = None):
+        self.delay = delay
+        self.drop_after = drop_after
+        self.connections = 0
+        self.logins = 0
+        self.resets = 0
+        self.messages: list[dict] = []
+        self.concurrency = _ConcurrencyTracker()
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write((line + "\r\n").encode())
+
+            def handle(self):
+                with fake._lock:
+                    fake.connections += 1
+                sent_here = 0
+                envelope = {"from": None, "to": []}
+                self.reply("220 fake ESMTP ready")
+                while True:
+                    raw = self.rfile.readline()
+                    if not raw:
+                        return
+                    line = raw.decode().rstrip("\r\n")
+                    verb = line.split(" ", 1)[0].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.wfile.write(b"250-fake\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+                    elif verb == "AUTH":
+                        with fake._lock:
+                            fake.logins += 1
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb == "MAIL":
+                        envelope = {"from": line[10:].strip("<> "), "to": []}
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        envelope["to"].append(line[8:].strip("<> "))
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        while True:
+                            chunk = self.rfile.readline()
+                            if chunk in (b".\r\n", b".\n", b""):
+                                break
+                            data.append(chunk)
+                        with fake.concurrency:
+                            time.sleep(fake.delay)
+                        with fake._lock:
+                            fake.messages.append({**envelope, "data": b"".join(data)})
+                        self.reply("250 OK queued")
+                        sent_here += 1
+                        if fake.drop_after and sent_here >= fake.drop_after:
+                            return  # Drop the connection without QUIT
+                    elif verb == "RSET":
+                        with fake._lock:
+                            fake.resets += 1
+                        self.reply("250 OK")
+                    elif verb == "NOOP":
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+
+class FakeResendServer(_BackgroundServer):
+    """
+    Stub of the Resend HTTP API: POST /emails and POST /emails/batch.
+    Recipients listed in `reject` come back as per-message validation errors.
+    """
+
+    def __init__(self, reject: set[str] = None):
+        self.reject = reject or set()
+        self.requests: list[tuple[str, object]] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.requests.append((self.path, body))
+                if self.path == "/emails/batch":
+                    data, errors = [], []
+                    for i, email in enumerate(body):
+                        if set(email["to"]) & fake.reject:
+                            errors.append({"index": i, "message": "Invalid `to` field."})
+                        else:
+                            data.append({"id": f"email-{len(fake.requests)}-{i}"})
+                    payload = {"data": data, "errors": errors}
+                else:
+                    payload = {"id": f"email-{len(fake.requests)}"}
+                raw = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+
+class FakeCompletionsServer(_BackgroundServer):
+    """
+    Stub of Azure OpenAI POST /openai/deployments/{name}/chat/completions.
+    `respond` maps the user message to the list of events returned as
+    {"events": [...]}, or to a string sent as the content verbatim; if it
+    raises, the request fails with a 500. Every request sleeps `delay`
+    seconds first. Requests with "stream": true get
+    the content as server-sent events of `stream_piece` characters,
+    `stream_delay` seconds apart.
+    """
+
+    def __init__(self, respond, delay: float = 0.0, stream_delay: float = 0.0, stream_piece: int = 16):
+        self.respond = respond
+        self.delay = delay
+        self.stream_delay = stream_delay
+        self.stream_piece = stream_piece
+        self.prompts: list[str] = []
+        self.concurrency = _ConcurrencyTracker()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                user_content = next(m["content"] for m in body["messages"] if m["role"] == "user")
+                with fake.concurrency:
+                    time.sleep(fake.delay)
+                    fake.prompts.append(user_content)
+                    try:
+                        events = fake.respond(user_content)
+                    except Exception as e:
+                        raw = json.dumps({"error": {"code": "server_error", "message": str(e)}}).encode()
+                        self.send_response(500)
+                        self.send_header("Content-Type", "application/json")
+                        self.send_header("Content-Length", str(len(raw)))
+                        self.end_headers()
+                        self.wfile.write(raw)
+                        return
+                content = events if isinstance(events, str) else json.dumps({"events": events})
+                if body.get("stream"):
+                    self.stream(body, content)
+                    return
+                payload = {
+                    "id": f"chatcmpl-{len(fake.prompts)}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }
+                raw = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def stream(self, body, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                pieces = [content[i:i + fake.stream_piece] for i in range(0, len(content), fake.stream_piece)]
+                for i, piece in enumerate(pieces + [None]):
+                    update = {
+                        "id": f"chatcmpl-{len(fake.prompts)}",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "gpt-4"),
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": piece} if piece is not None else {},
+                            "finish_reason": None if piece is not None else "stop",
+                        }],
+                    }
+                    if i:
+                        time.sleep(fake.stream_delay)
+                    self.wfile.write(f"data: {json.dumps(update)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+
+class FakeSupabaseAuthServer(_BackgroundServer):
+    """
+    Stub of the Supabase Auth API: GET /auth/v1/user and the JWKS at
+    /auth/v1/.well-known/jwks.json. `users` maps access tokens to user ids
+    and emails; tokens in `revoked` are rejected like signed-out sessions.
+    Every user request sleeps `delay` seconds first.
+    """
+
+    def __init__(self, users: dict[str, tuple[str, str]] = None, jwks: dict = None, delay: float = 0.0):
+        self.users = users if users is not None else {}
+        self.jwks = jwks or {"keys": []}
+        self.delay = delay
+        self.revoked: set[str] = set()
+        self.user_requests = 0
+        self.jwks_requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status: int, payload: dict):
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                if self.path == "/auth/v1/.well-known/jwks.json":
+                    fake.jwks_requests += 1
+                    self.reply(200, fake.jwks)
+                    return
+                fake.user_requests += 1
+                time.sleep(fake.delay)
+                token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+                if token in fake.revoked or token not in fake.users:
+                    self.reply(403, {"code": 403, "error_code": "session_not_found",
+                                     "msg": "Session from session_id claim in JWT does not exist"})
+                    return
+                user_id, email = fake.users[token]
+                self.reply(200, {
+                    "id": user_id, "aud": "authenticated", "role": "authenticated", "email": email,
+                    "phone": "", "app_metadata": {"provider": "email"}, "user_metadata": {},
+                    "created_at": "2026-01-01T00:00:00Z",
+                })
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+
+class _Simple(str):
+    """A RESP simple string reply (+OK)."""
+
+
+class _RespError(Exception):
+    pass
+
+
+class _Push(list):
+    """Out-of-band pub/sub message: a push in RESP3, an array in RESP2."""
+
+
+class _Set(list):
+    pass
+
+
+class FakeRedisServer(_BackgroundServer):
+    """
+    In-memory Redis speaking RESP2 and RESP3, enough for core/cache.py:
+    strings with expiry, INCR counters, sets, SCAN/KEYS, MULTI/EXEC pipelines with WATCH
+    and PUBLISH/SUBSCRIBE.
+    `commands` counts every command by name.
+    """
+
+    def __init__(self):
+        self.data: dict[bytes, object] = {}
+        self.expires: dict[bytes, float] = {}
+        self.commands: dict[str, int] = {}
+        self.subscribers: dict[bytes, list] = {}
+        self._lock = threading.RLock()
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                # Pipelined replies go out one by one; don't let Nagle hold them back
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.write_lock = threading.Lock()
+                self.channels: set[bytes] = set()
+                self.protocol = 2
+                self.watched: dict[bytes, tuple] = {}
+
+            def read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b"*"):
+                    return line.split()  # Inline command
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(size + 2)[:-2])
+                return args
+
+            def send(self, reply):
+                with self.write_lock:
+                    self.wfile.write(_encode(reply, self.protocol))
+                    self.wfile.flush()
+
+            def handle(self):
+                queued = None
+                try:
+                    while True:
+                        args = self.read_command()
+                        if args is None:
+                            return
+                        name = args[0].decode().upper()
+                        with fake._lock:
+                            fake.commands[name] = fake.commands.get(name, 0) + 1
+                        if name == "MULTI":
+                            queued = []
+                            self.send(_Simple("OK"))
+                        elif name == "EXEC":
+                            with fake._lock:
+                                if any(fake._snapshot(k) != v for k, v in self.watched.items()):
+                                    self.send(None)  # A watched key changed: abort
+                                else:
+                                    self.send([fake.run(self, cmd) for cmd in queued or []])
+                            queued = None
+                            self.watched = {}
+                        elif name == "DISCARD":
+                            queued = None
+                            self.watched = {}
+                            self.send(_Simple("OK"))
+                        elif name in ("WATCH", "UNWATCH"):
+                            with fake._lock:
+                                if name == "WATCH":
+                                    self.watched.update({k: fake._snapshot(k) for k in args[1:]})
+                                else:
+                                    self.watched = {}
+                            self.send(_Simple("OK"))
+                        elif queued is not None:
+                            queued.append(args)
+                            self.send(_Simple("QUEUED"))
+                        else:
+                            self.send(fake.run(self, args))
+                finally:
+                    with fake._lock:
+                        for channel in self.channels:
+                            fake.subscribers[channel].remove(self)
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.allow_reuse_address = True
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def _live(self, key: bytes):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def _snapshot(self, key: bytes) -> tuple:
+        value = self._live(key)
+        return (set(value) if isinstance(value, set) else value, self.expires.get(key))
+
+    def _keys(self, pattern: bytes) -> list[bytes]:
+        import fnmatch
+        return [k for k in list(self.data) if self._live(k) is not None and fnmatch.fnmatchcase(k, pattern)]
+
+    def run(self, conn, args):
+        name, args = args[0].decode().upper(), args[1:]
+        try:
+            with self._lock:
+                return self._run(conn, name, args)
+        except _RespError as e:
+            return e
+        except (ValueError, IndexError):
+            return _RespError(f"ERR wrong arguments for '{name.lower()}' command")
+
+    def _run(self, conn, name, args):
+        if name == "HELLO":
+            conn.protocol = int(args[0]) if args else conn.protocol
+            return {b"server": b"redis", b"version": b"7.2.0", b"proto": conn.protocol, b"mode": b"standalone"}
+        if name == "PING":
+            if conn.channels:
+                return _Push([b"pong", args[0] if args else b""])
+            return args[0] if args else _Simple("PONG")
+        if name in ("CLIENT", "SELECT", "AUTH"):
+            return _Simple("OK")
+        if name == "FLUSHDB":
+            self.data.clear()
+            self.expires.clear()
+            return _Simple("OK")
+        if name == "GET":
+            value = self._live(args[0])
+            if isinstance(value, set):
+                raise _RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+            return value
+        if name == "MGET":
+            return [v if isinstance(v, bytes) else None for v in map(self._live, args)]
+        if name in ("SET", "SETEX", "PSETEX"):
+            if name == "SET":
+                key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+            else:
+                key, value, options = args[0], args[2], [b"EX" if name == "SETEX" else b"PX", args[1]]
+            if b"NX" in options and self._live(key) is not None:
+                return None
+            if b"XX" in options and self._live(key) is None:
+                return None
+            self.data[key] = value
+            self.expires.pop(key, None)
+            for unit, scale in ((b"EX", 1), (b"PX", 1000)):
+                if unit in options:
+                    self.expires[key] = time.time() + int(options[options.index(unit) + 1]) / scale
+            return _Simple("OK")
+        if name in ("INCR", "INCRBY"):
+            value = int(self._live(args[0]) or 0) + (int(args[1]) if name == "INCRBY" else 1)
+            self.data[args[0]] = str(value).encode()
+            return value
+        if name in ("DEL", "UNLINK"):
+            deleted = 0
+            for key in args:
+                if self._live(key) is not None:
+                    deleted += 1
+                self.data.pop(key, None)
+                self.expires.pop(key, None)
+            return deleted
+        if name == "EXISTS":
+            return sum(self._live(key) is not None for key in args)
+        if name in ("EXPIRE", "PEXPIRE"):
+            if self._live(args[0]) is None:
+                return 0
+            expires = time.time() + int(args[1]) / (1 if name == "EXPIRE" else 1000)
+            current = self.expires.get(args[0])
+            condition = args[2].upper() if len(args) > 2 else None
+            if (condition == b"NX" and current is not None) or (condition == b"XX" and current is None) \
+                    or (condition == b"GT" and (current is None or expires <= current)) \
+                    or (condition == b"LT" and current is not None and expires >= current):
+                return 0
+            self.expires[args[0]] = expires
+            return 1
+        if name in ("TTL", "PTTL"):
+            if self._live(args[0]) is None:
+                return -2
+            if args[0] not in self.expires:
+                return -1
+            remaining = self.expires[args[0]] - time.time()
+            return int(remaining) if name == "TTL" else int(remaining * 1000)
+        if name == "KEYS":
+            return self._keys(args[0])
+        if name == "SCAN":
+            options = [a.upper() for a in args]
+            pattern = args[options.index(b"MATCH") + 1] if b"MATCH" in options else b"*"
+            return [b"0", self._keys(pattern)]
+        if name in ("SADD", "SREM"):
+            members = self._live(args[0])
+            if members is None:
+                if name == "SREM":
+                    return 0
+                members = self.data[args[0]] = set()
+            before = len(members)
+            if name == "SADD":
+                members.update(args[1:])
+            else:
+                members.difference_update(args[1:])
+            if not members:
+                self.data.pop(args[0], None)
+                self.expires.pop(args[0], None)
+            return abs(len(members) - before)
+        if name == "SMEMBERS":
+            return _Set(sorted(self._live(args[0]) or ()))
+        if name == "SCARD":
+            return len(self._live(args[0]) or ())
+        if name == "PUBLISH":
+            receivers = list(self.subscribers.get(args[0], []))
+            for subscriber in receivers:
+                subscriber.send(_Push([b"message", args[0], args[1]]))
+            return len(receivers)
+        if name == "SUBSCRIBE":
+            for channel in args:
+                conn.channels.add(channel)
+                self.subscribers.setdefault(channel, []).append(conn)
+                conn.send(_Push([b"subscribe", channel, len(conn.channels)]))
+            return _NO_REPLY
+        if name == "UNSUBSCRIBE":
+            for channel in args or list(conn.channels):
+                conn.channels.discard(channel)
+                if conn in self.subscribers.get(channel, []):
+                    self.subscribers[channel].remove(conn)
+                conn.send(_Push([b"unsubscribe", channel, len(conn.channels)]))
+            return _NO_REPLY
+        raise _RespError(f"ERR unknown command '{name.lower()}'")
+
+
+_NO_REPLY = object()
+
+
+def _encode(reply, protocol: int = 2) -> bytes:
+    if reply is _NO_REPLY:
+        return b""
+    if reply is None:
+        return b"_\r\n" if protocol == 3 else b"$-1\r\n"
+    if isinstance(reply, _Simple):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, _RespError):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, bool) or isinstance(reply, int):
+        return f":{int(reply)}\r\n".encode()
+    if isinstance(reply, str):
+        reply = reply.encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, dict):
+        if protocol == 3:
+            return b"%%%d\r\n" % len(reply) + b"".join(
+                _encode(k, protocol) + _encode(v, protocol) for k, v in reply.items()
+            )
+        reply = [item for pair in reply.items() for item in pair]
+    kind = b"*"
+    if protocol == 3:
+        kind = b">" if isinstance(reply, _Push) else b"~" if isinstance(reply, _Set) else b"*"
+    return kind + b"%d\r\n" % len(reply) + b"".join(_encode(item, protocol) for item in reply)
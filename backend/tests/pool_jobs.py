@@ -0,0 +1,23 @@
+"""
+Jobs for ExtractionPool tests. They live apart from the test module so
+spawned workers can unpickle them without importing the whole backend.
+"""
+import os
+import time
+
+
+def wait_for_file(started: str, release: str, limit: float = 10) -> bool:
+    """Worker job: announce itself, then wait until the event loop side creates `release`."""
+    open(started, "w").close()
+    deadline = time.monotonic() + limit
+    while not os.path.exists(release):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def sleep_with_pid(pid_file: str, seconds: float):
+    with open(pid_file, "w") as f:
+        f.write(str(os.getpid()))
+    time.sleep(seconds)
@@ -0,0 +1,103 @@
+import asyncio
+import time
+import uuid
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import HTTPException
+from supabase import create_client
+
+from backend.core import deps
+from backend.core.auth_tokens import RevocationCache, TokenVerifier
+from backend.core.config import settings
+from backend.tests.fake_servers import FakeSupabaseAuthServer
+
+SECRET = "test-jwt-secret-with-at-least-32-bytes"
+USER_ID = str(uuid.uuid4())
+
+
+def make_token(key=SECRET, algorithm="HS256", headers=None, **claims) -> str:
+    now = int(time.time())
+    payload = {
+        "sub": USER_ID, "email": "owner@example.com", "phone": "", "aud": "authenticated",
+        "role": "authenticated", "session_id": str(uuid.uuid4()), "iat": now, "exp": now + 3600,
+    }
+    payload.update(claims)
+    return jwt.encode(payload, key, algorithm=algorithm, headers=headers)
+
+
+def authenticate(token: str):
+    return asyncio.run(deps.get_current_user(token))
+
+
+def rejected(token: str) -> bool:
+    with pytest.raises(HTTPException) as excinfo:
+        authenticate(token)
+    return excinfo.value.status_code == 401
+
+
+@pytest.fixture
+def auth_server(monkeypatch):
+    with FakeSupabaseAuthServer() as fake:
+        monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "local")
+        monkeypatch.setattr(deps, "supabase", create_client(fake.endpoint, "anon-key"))
+        monkeypatch.setattr(deps, "token_verifier", TokenVerifier(
+            secret=SECRET, audience="authenticated", jwks_url=f"{fake.endpoint}/auth/v1/.well-known/jwks.json",
+        ))
+        monkeypatch.setattr(deps, "revocation_cache", RevocationCache(ttl=0))
+        yield fake
+
+
+def test_local_mode_checks_signature_expiry_and_audience(auth_server):
+    user = authenticate(make_token())
+    assert (user.user_id, user.email, user.phone) == (USER_ID, "owner@example.com", None)
+
+    assert rejected(make_token(exp=int(time.time()) - 120))
+    assert rejected(make_token(aud="anon-but-not-authenticated"))
+    assert rejected(make_token(key="another-secret-with-at-least-32-bytes"))
+    assert rejected(make_token()[:-4] + "AAAA")
+    assert rejected(jwt.encode({"sub": USER_ID, "aud": "authenticated", "exp": time.time() + 60}, None, algorithm="none"))
+    assert rejected("not-a-jwt")
+    assert auth_server.user_requests == 0  # Revocation checks are off
+
+
+def test_sessions_are_rechecked_with_supabase_after_the_ttl(auth_server, monkeypatch):
+    monkeypatch.setattr(deps, "revocation_cache", RevocationCache(ttl=0.3))
+    token = make_token()
+    auth_server.users[token] = (USER_ID, "owner@example.com")
+
+    for _ in range(5):
+        assert authenticate(token).user_id == USER_ID
+    assert auth_server.user_requests == 1
+
+    auth_server.revoked.add(token)  # Signed out: trusted until the TTL runs out
+    assert authenticate(token).user_id == USER_ID
+    time.sleep(0.35)
+    assert rejected(token)
+    assert rejected(token)
+    assert auth_server.user_requests == 3
+
+
+def test_asymmetric_tokens_are_verified_with_the_cached_jwks(auth_server):
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    jwk = jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    auth_server.jwks = {"keys": [{**jwk, "kid": "key-1", "alg": "ES256", "use": "sig"}]}
+
+    for _ in range(3):
+        token = make_token(key=private_key, algorithm="ES256", headers={"kid": "key-1"})
+        assert authenticate(token).user_id == USER_ID
+    assert auth_server.jwks_requests == 1
+
+    other_key = ec.generate_private_key(ec.SECP256R1())
+    assert rejected(make_token(key=other_key, algorithm="ES256", headers={"kid": "key-1"}))
+
+
+def test_remote_mode_asks_supabase_every_time(auth_server, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "remote")
+    auth_server.users["opaque-token"] = (USER_ID, "owner@example.com")
+
+    assert authenticate("opaque-token").user_id == USER_ID
+    assert authenticate("opaque-token").email == "owner@example.com"
+    assert rejected("unknown-token")
+    assert auth_server.user_requests == 3
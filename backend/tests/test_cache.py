@@ -0,0 +1,299 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.core import cache as cache_module
+from backend.core.cache import _MISSING, LocalCache, RedisCache, Tagged
+from backend.core.cache_codec import CacheCodec, CodecError
+from backend.core.config import settings
+from backend.tests.fake_servers import FakeRedisServer
+
+
+def wait_until(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def redis_server():
+    with FakeRedisServer() as fake:
+        yield fake
+
+
+@pytest.fixture
+def workers(redis_server):
+    """Two RedisCache instances with L1, like two API worker processes."""
+    caches = [RedisCache("127.0.0.1", redis_server.port, local_cache=True) for _ in range(2)]
+    assert all(wait_until(cache._listening.is_set) for cache in caches)
+    yield caches
+    for cache in caches:
+        cache.close()
+
+
+def test_local_cache_is_bounded_by_entries_bytes_and_ttl():
+    local = LocalCache(max_entries=3, max_bytes=100, max_ttl=60)
+    for key in "abc":
+        local.set(key, key.upper(), ttl=60, size=10)
+    local.get("a")  # Now the most recently used
+    local.set("d", "D", ttl=60, size=10)
+    assert local.get("b") is _MISSING
+    assert [local.get(k) for k in "acd"] == ["A", "C", "D"]
+
+    local.set("big", "x" * 70, ttl=60, size=70)
+    assert local.bytes <= 100 and local.get("big") == "x" * 70
+    local.set("huge", "x", ttl=60, size=101)  # Larger than the whole cache
+    assert local.get("huge") is _MISSING
+
+    local.set("short", 1, ttl=0.05, size=1)
+    time.sleep(0.06)
+    assert local.get("short") is _MISSING
+
+    # A value fetched before an invalidation is not stored after it
+    generation = local.generation
+    local.delete(["a"])
+    local.set("a", "stale", ttl=60, size=1, generation=generation)
+    assert local.get("a") is _MISSING
+    assert local.stats()["evictions"] >= 2
+
+
+def test_hot_reads_skip_redis(redis_server, workers):
+    api, _ = workers
+    api.set("dashboard:stats:u1", {"total_projects": 3}, ttl=60)
+    gets = redis_server.commands.get("GET", 0)
+    for _ in range(100):
+        assert api.get("dashboard:stats:u1") == {"total_projects": 3}
+    assert redis_server.commands.get("GET", 0) == gets
+    assert api.local.stats()["hits"] == 100
+
+
+def test_writes_in_one_worker_evict_local_entries_everywhere(redis_server, workers):
+    first, second = workers
+    first.set("projects:list:u1:0:100", [{"name": "A"}], ttl=120)
+    first.set("projects:list:u2:0:100", [{"name": "B"}], ttl=120)
+    assert second.get("projects:list:u1:0:100") == [{"name": "A"}]  # Fills second's L1
+    assert second.get("projects:list:u2:0:100") == [{"name": "B"}]
+
+    first.set("projects:list:u1:0:100", [{"name": "A2"}], ttl=120)
+    assert wait_until(lambda: second.get("projects:list:u1:0:100") == [{"name": "A2"}])
+
+    first.delete_pattern("projects:list:u1:*")
+    assert wait_until(lambda: second.get("projects:list:u1:0:100") is None)
+    assert second.get("projects:list:u2:0:100") == [{"name": "B"}]
+
+    second.delete("projects:list:u2:0:100")
+    assert wait_until(lambda: first.get("projects:list:u2:0:100") is None)
+
+
+def test_local_cache_is_off_without_redis():
+    cache = RedisCache("127.0.0.1", 1, local_cache=True)  # Nothing listens on port 1
+    assert cache.client is None and cache.local is None
+    assert cache.get("k") is None and cache.set("k", 1) is False
+
+
+def test_tag_invalidation_deletes_only_tagged_entries(redis_server):
+    cache = RedisCache("127.0.0.1", redis_server.port, local_cache=False)
+    for user in range(200):  # Unrelated entries that a pattern delete would scan
+        cache.set(f"dashboard:stats:other{user}", {"n": user}, ttl=60, tags=[f"user:other{user}"])
+    cache.set("dashboard:stats:u1", {"n": 1}, ttl=60, tags=["user:u1", "project:p1"])
+    cache.set("projects:list:u1:0:100", [1], ttl=120, tags=["user:u1", "project:p1"])
+    cache.set("projects:list:u2:0:100", [2], ttl=120, tags=["user:u2", "project:p1", "project:p2"])
+    cache.set("dashboard:stats:u2", {"n": 2}, ttl=60, tags=["user:u2", "project:p2"])
+
+    # The index outlives its longest entry
+    assert 119 <= cache.client.ttl("tag:project:p1") <= 120
+    assert 59 <= cache.client.ttl("tag:project:p2") <= 120
+
+    deleted_before = redis_server.commands.get("DEL", 0)
+    assert cache.invalidate_tags("project:p1") == 3
+    assert redis_server.commands.get("SCAN", 0) == 0
+    assert redis_server.commands.get("DEL", 0) == deleted_before + 2  # The index, then its entries
+    assert [cache.get(k) for k in ("dashboard:stats:u1", "projects:list:u1:0:100", "projects:list:u2:0:100")] == [None] * 3
+    assert cache.get("dashboard:stats:u2") == {"n": 2}
+    assert cache.get("dashboard:stats:other7") == {"n": 7}
+    assert not cache.client.exists("tag:project:p1")
+
+    # Entries set afterwards start a fresh index
+    cache.set("dashboard:stats:u1", {"n": 10}, ttl=60, tags=["user:u1", "project:p1"])
+    cache.clear_user_cache("u1")
+    assert cache.get("dashboard:stats:u1") is None
+    assert cache.invalidate_tags("user:nobody") == 0
+
+
+def test_tag_invalidation_reaches_other_workers_l1(workers):
+    first, second = workers
+    first.set("dashboard:stats:u1", {"n": 1}, ttl=60, tags=["project:p1"])
+    assert second.get("dashboard:stats:u1") == {"n": 1}
+    first.invalidate_tags("project:p1")
+    assert wait_until(lambda: second.get("dashboard:stats:u1") is None)
+
+
+class SlowComputation:
+    def __init__(self, seconds: float = 0.2):
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.seconds)
+        return Tagged({"version": calls}, ["project:p1"])
+
+
+def test_concurrent_misses_compute_once_across_processes(redis_server):
+    # Two caches stand in for two worker processes, eight request threads each
+    caches = [RedisCache("127.0.0.1", redis_server.port, local_cache=False) for _ in range(2)]
+    compute = SlowComputation()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(
+            lambda i: caches[i % 2].get_or_compute("dashboard:stats:u1", compute, ttl=60), range(16),
+        ))
+    assert compute.calls == 1
+    assert all(result == {"version": 1} for result in results)
+    assert not redis_server.data.get(b"lock:dashboard:stats:u1")  # Released
+
+    # Tags returned by the computation are registered
+    caches[0].invalidate_tags("project:p1")
+    assert caches[1].get_or_compute("dashboard:stats:u1", compute, ttl=60) == {"version": 2}
+
+
+def test_expired_entries_are_served_stale_while_one_refresh_runs(redis_server, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_XFETCH_BETA", 0)
+    cache = RedisCache("127.0.0.1", redis_server.port, local_cache=False)
+    compute = SlowComputation(0.3)
+    assert cache.get_or_compute("projects:list:u1:0:100", compute, ttl=1, stale_ttl=10) == {"version": 1}
+
+    time.sleep(1.1)
+    start = time.monotonic()
+    served = [cache.get_or_compute("projects:list:u1:0:100", compute, ttl=1, stale_ttl=10) for _ in range(5)]
+    assert time.monotonic() - start < 0.2  # Nobody waited for the refresh
+    assert served == [{"version": 1}] * 5
+    assert wait_until(lambda: cache.get_or_compute("projects:list:u1:0:100", compute, ttl=1) == {"version": 2})
+    assert compute.calls == 2
+
+
+def test_entries_are_refreshed_early_with_rising_probability(redis_server, monkeypatch):
+    cache = RedisCache("127.0.0.1", redis_server.port, local_cache=False)
+    compute = SlowComputation(0.2)
+    cache.get_or_compute("dashboard:stats:u1", compute, ttl=60)
+
+    # Even an unlikely draw does not refresh well before expiry...
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.999)  # -log(0.001) ~ 6.9
+    cache.get_or_compute("dashboard:stats:u1", compute, ttl=60)
+    time.sleep(0.3)
+    assert compute.calls == 1
+
+    # ...but 0.2 s of compute x 6.9 reaches past an expiry 0.5 s away
+    cache.set("dashboard:stats:u1", {**cache.get("dashboard:stats:u1"), "expires": time.time() + 0.5}, ttl=60)
+    assert cache.get_or_compute("dashboard:stats:u1", compute, ttl=60) == {"version": 1}
+    assert wait_until(lambda: compute.calls == 2)
+
+
+def test_failed_computations_are_not_cached(redis_server):
+    cache = RedisCache("127.0.0.1", redis_server.port, local_cache=False)
+
+    def broken():
+        time.sleep(0.1)
+        raise RuntimeError("Supabase unavailable")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.get_or_compute, "dashboard:stats:u1", broken, 60) for _ in range(4)]
+    assert all(isinstance(f.exception(), RuntimeError) for f in futures)
+    assert cache.get("dashboard:stats:u1") is None
+    assert cache.get_or_compute("dashboard:stats:u1", lambda: {"ok": True}, ttl=60) == {"ok": True}
+
+
+def test_codec_round_trips_and_tags_its_format():
+    value = {"recent_events": [{"title": "第一期款項", "due_date": "2026-03-01", "score": 0.9}] * 50, 1: None}
+    plain = CacheCodec("orjson", "zlib", compress_min_bytes=10**6)
+    packed = CacheCodec("orjson", "zlib", compress_min_bytes=100)
+    expected = json.loads(json.dumps(value))  # Keys become strings, as before codecs
+
+    small, large = plain.encode(value), packed.encode(value)
+    assert small[:4] == b"\x00\x01\x01\x00" and large[:4] == b"\x00\x01\x01\x01"
+    assert len(large) < len(small) / 4
+    # Any codec reads any format, and plain JSON written before codecs existed
+    reader = CacheCodec("json", "none")
+    assert reader.decode(small) == reader.decode(large) == expected
+    assert reader.decode(json.dumps(value).encode()) == expected
+
+    moment = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert plain.decode(plain.encode({"at": moment})) == {"at": "2026-01-01T00:00:00+00:00"}
+    with pytest.raises(TypeError):
+        plain.encode({"n": 2 ** 70})
+    for corrupt in (b"\x00\x09\x01\x00{}", b"\x00\x01\x07\x00{}", b"\x00\x01\x01\x01not zlib"):
+        with pytest.raises(CodecError):
+            plain.decode(corrupt)
+
+
+def test_entries_survive_a_codec_change(redis_server, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SERIALIZER", "json")
+    old = RedisCache("127.0.0.1", redis_server.port, local_cache=False)
+    old.set("dashboard:stats:u1", {"total_projects": 3}, ttl=60)
+    old.client.set("projects:list:u1:0:100", json.dumps([{"name": "A"}]))  # Before codecs
+
+    monkeypatch.setattr(settings, "CACHE_SERIALIZER", "orjson")
+    monkeypatch.setattr(settings, "CACHE_COMPRESSION", "zlib")
+    monkeypatch.setattr(settings, "CACHE_COMPRESS_MIN_BYTES", 0)
+    new = RedisCache("127.0.0.1", redis_server.port, local_cache=False)
+    assert new.get("dashboard:stats:u1") == {"total_projects": 3}
+    assert new.get("projects:list:u1:0:100") == [{"name": "A"}]
+
+    new.set("dashboard:stats:u2", {"total_projects": 5}, ttl=60)
+    assert redis_server.data[b"dashboard:stats:u2"][:4] == b"\x00\x01\x01\x01"
+    assert old.get("dashboard:stats:u2") == {"total_projects": 5}
+
+    new.client.set("dashboard:stats:u3", b"\x00\x01\x02\x00garbage")
+    assert new.get("dashboard:stats:u3") is None  # A miss, not an error
+
+
+def dashboard_stats(events: int = 50) -> dict:
+    """Shaped like compute_dashboard_stats() output for Supabase rows, wrapped as get_or_compute stores it."""
+    project = {"id": "0b6f0c5e-3c1e-4e0b-9a53-2f1d7a9e6c11", "name": "新建工程 – Phase 2"}
+    recent = [
+        {
+            "id": f"8c1d2e3f-0000-4000-8000-{i:012d}",
+            "title": f"第{i}期款項支付 \"final\"",
+            "due_date": f"2026-11-{1 + i % 28:02d}",
+            "status": "pending" if i % 3 else "in_progress",
+            "confidence_score": [0.95, 0.5, 1, None][i % 4],
+            "document_id": "5a0c9b7e-1f2d-4c3b-8e4f-6a7b8c9d0e1f",
+            "documents": {"original_filename": f"合約_{i:03d}.pdf", "project_id": project["id"], "projects": project},
+        }
+        for i in range(events)
+    ]
+    value = {"total_projects": 3, "total_documents": 12, "overdue_tasks": 2, "upcoming_tasks": 9, "recent_events": recent}
+    return {"__cache_entry__": 1, "value": value, "expires": 1792220400.123456, "delta": 0.4321}
+
+
+def test_serializers_give_identical_api_responses_for_dashboard_payloads():
+    entry = dashboard_stats()
+    before_codecs = json.loads(json.dumps(entry, default=str))
+    bodies = set()
+    for serializer in ("json", "orjson"):
+        for compressor, threshold in (("none", 0), ("zlib", 0)):
+            codec = CacheCodec(serializer, compressor, threshold)
+            assert codec.serializer == serializer
+            decoded = codec.decode(codec.encode(entry))
+            assert decoded == before_codecs
+            bodies.add(JSONResponse(jsonable_encoder(decoded["value"])).body)
+    assert len(bodies) == 1
+    assert bodies == {JSONResponse(jsonable_encoder(entry["value"])).body}
+
+
+def test_json_is_the_default_serializer():
+    assert settings.CACHE_SERIALIZER == "json"
+    assert CacheCodec().serializer == "json"
+    moment = datetime(2026, 10, 17, 9, 0)
+    assert CacheCodec().decode(CacheCodec().encode({"at": moment})) == {"at": "2026-10-17 09:00:00"}
@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from backend.core.config import settings
+from backend.models import DeadlineEvent, Document, NotificationLog, NotificationRule, Profile, Project
+from backend.services.dispatcher import DispatchJob, NotificationDispatcher, ProviderLimit, TokenBucket
+from backend.services.email import EmailService
+from backend.services.notification import NotificationService
+from backend.tests.fake_servers import FakeLineServer, FakeSmtpServer, _ConcurrencyTracker
+
+
+def smtp_email_service(smtp: FakeSmtpServer) -> EmailService:
+    service = EmailService()
+    service.provider = "smtp"
+    service._smtp_host = "127.0.0.1"
+    service._smtp_port = smtp.port
+    service._smtp_user = "bot@example.com"
+    service._smtp_password = "secret"
+    service._smtp_use_tls = False
+    service.enabled = True
+    return service
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.45
+
+
+def test_dispatcher_respects_per_provider_limits():
+    limits = {"line": 4, "email": 2}
+    dispatcher = NotificationDispatcher({
+        provider: ProviderLimit(concurrency=n, rate=0) for provider, n in limits.items()
+    })
+    trackers = {provider: _ConcurrencyTracker() for provider in limits}
+    # Each lane only gets past its barrier with a full set of workers in flight
+    barriers = {provider: threading.Barrier(n, timeout=5) for provider, n in limits.items()}
+
+    def work(provider):
+        with trackers[provider]:
+            barriers[provider].wait()
+        return provider
+
+    jobs = [DispatchJob("line", lambda: work("line")) for _ in range(12)]
+    jobs += [DispatchJob("email", lambda: work("email")) for _ in range(6)]
+    jobs.append(DispatchJob("email", lambda: 1 / 0))
+
+    results = dispatcher.run(jobs)
+
+    assert [r.error for r in results[:18]] == [None] * 18
+    assert [r.value for r in results[:18]] == ["line"] * 12 + ["email"] * 6
+    assert isinstance(results[-1].error, ZeroDivisionError)
+    assert {provider: t.max_active for provider, t in trackers.items()} == limits
+
+
+def test_sweep_fans_out_to_fake_line_and_smtp(db, monkeypatch):
+    today = datetime.now().date()
+    users = [
+        Profile(id=uuid.uuid4(), email=f"u{i}@example.com", line_user_id=f"U{i}")
+        for i in range(6)
+    ]
+    db.add_all(users)
+    project = Project(id=uuid.uuid4(), name="Tender", owner_id=users[0].id)
+    db.add(project)
+    for user in users:
+        db.add(NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=3, channels=["line", "email"]))
+        # Each user owns one project with one event due in 3 days
+        p = Project(id=uuid.uuid4(), name=f"P-{user.email}", owner_id=user.id)
+        doc = Document(id=uuid.uuid4(), project_id=p.id, filename="a.pdf", file_path="x", file_type="pdf")
+        db.add_all([p, doc, DeadlineEvent(
+            id=uuid.uuid4(), document_id=doc.id, title="Submit bid",
+            due_date=today + timedelta(days=3),
+        )])
+    db.commit()
+
+    with FakeLineServer(delay=0.1, fail_for={"U5"}) as line, FakeSmtpServer(delay=0.1) as smtp:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        service = NotificationService(NotificationDispatcher({
+            "line": ProviderLimit(concurrency=3, rate=50),
+            "email": ProviderLimit(concurrency=2, rate=50),
+        }))
+        service.email_service = smtp_email_service(smtp)
+
+        service._check_sweep(db)
+
+        assert len(line.pushes) == 6
+        assert len(smtp.messages) == 6
+        assert 1 < line.concurrency.max_active <= 3
+        assert 1 < smtp.concurrency.max_active <= 2
+
+    logs = db.query(NotificationLog).all()
+    statuses = sorted((log.notification_type, log.status) for log in logs)
+    assert statuses.count(("line", "sent")) == 5
+    assert statuses.count(("line", "failed")) == 1
+    assert statuses.count(("email", "sent")) == 6
+
+
+def test_digest_rules_send_one_reminder_per_user(db, monkeypatch, count_queries):
+    today = datetime.now().date()
+    user = Profile(id=uuid.uuid4(), email="digest@example.com", line_user_id="Udigest")
+    other = Profile(id=uuid.uuid4(), email="single@example.com", line_user_id="Usingle")
+    db.add_all([user, other])
+    db.add(NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=3, channels=["line", "email"], digest=True))
+    db.add(NotificationRule(id=uuid.uuid4(), user_id=other.id, days_before=3, channels=["line", "email"]))
+    for owner in (user, other):
+        project = Project(id=uuid.uuid4(), name=f"P-{owner.email}", owner_id=owner.id)
+        doc = Document(id=uuid.uuid4(), project_id=project.id, filename="a.pdf", file_path="x", file_type="pdf")
+        db.add_all([project, doc])
+        for i in range(15):
+            offset = 3 if i < 10 else -2  # 10 due in 3 days, 5 overdue
+            db.add(DeadlineEvent(
+                id=uuid.uuid4(), document_id=doc.id, title=f"Task {i:02d}",
+                due_date=today + timedelta(days=offset),
+            ))
+    db.commit()
+
+    with FakeLineServer() as line, FakeSmtpServer() as smtp:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+        monkeypatch.setattr(settings, "NOTIFICATION_LOG_FLUSH_INTERVAL", 60)
+        service = NotificationService()
+        service.email_service = smtp_email_service(smtp)
+        with count_queries() as q:
+            service._check_sweep(db)
+
+        digest_pushes = [p for p in line.pushes if p["to"] == "Udigest"]
+        assert len(digest_pushes) == 1
+        carousel = digest_pushes[0]["messages"][0]["contents"]
+        assert carousel["type"] == "carousel"
+        assert len(carousel["contents"]) == 12  # 11 events + "還有 4 項"
+        # Most urgent (overdue) first
+        assert "已逾期" in json.dumps(carousel["contents"][0], ensure_ascii=False)
+
+        assert len([p for p in line.pushes if p["to"] == "Usingle"]) == 15
+        assert sum("digest@example.com" in m["to"] for m in smtp.messages) == 1
+        assert sum("single@example.com" in m["to"] for m in smtp.messages) == 15
+
+    digest_logs = db.query(NotificationLog).filter(NotificationLog.user_id == user.id).all()
+    assert len(digest_logs) == 30
+    assert {log.status for log in digest_logs} == {"sent"}
+    # Reap + 5 sweep queries + one pending-claim insert + one confirm flush
+    assert q.count == 1 + 5 + 1 + 1
@@ -0,0 +1,153 @@
+import asyncio
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.config import settings
+from backend.core.database import Base
+from backend.models import Document, DocumentJob
+from backend.services.document_jobs import DocumentJobQueue, PermanentJobError
+from backend.worker import DocumentWorker
+
+
+def add_document(db) -> Document:
+    doc = Document(
+        id=uuid.uuid4(), project_id=uuid.uuid4(), filename="a.pdf",
+        file_path="u/p/a.pdf", file_type="pdf", status="processing",
+    )
+    db.add(doc)
+    db.commit()
+    return doc
+
+
+def make_due(db, job_id):
+    """Skip the rest of a job's retry backoff."""
+    job = db.get(DocumentJob, job_id)
+    job.run_after = job.created_at
+    db.commit()
+
+
+def test_job_success_completes_document(db):
+    doc = add_document(db)
+    queue = DocumentJobQueue(db, worker_id="worker-a")
+    job_id = queue.enqueue(doc.id, doc.file_path, "pdf")
+
+    job = queue.claim()
+    assert job.id == job_id and job.document_id == doc.id and job.attempts == 1
+    assert queue.claim() is None  # Leased, so invisible to other claims
+
+    assert queue.complete(job.id)
+    db.expire_all()
+    assert db.get(DocumentJob, job_id).status == "succeeded"
+    assert db.get(Document, doc.id).status == "completed"
+
+
+def test_failed_job_retries_with_backoff_then_fails(db, monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_JOB_MAX_ATTEMPTS", 2)
+    doc = add_document(db)
+    queue = DocumentJobQueue(db, worker_id="worker-a")
+    job_id = queue.enqueue(doc.id, doc.file_path, "pdf")
+
+    assert queue.fail(queue.claim().id, "LLM timeout")
+    db.expire_all()
+    job = db.get(DocumentJob, job_id)
+    assert job.status == "queued" and job.last_error == "LLM timeout"
+    assert db.get(Document, doc.id).status == "processing"
+    assert queue.claim() is None  # Still backing off
+
+    make_due(db, job_id)
+    retry = queue.claim()
+    assert retry.attempts == 2
+    queue.fail(retry.id, "LLM timeout again")
+    db.expire_all()
+    assert db.get(DocumentJob, job_id).status == "failed"
+    doc = db.get(Document, doc.id)
+    assert doc.status == "error" and "LLM timeout again" in doc.raw_content
+
+
+def test_permanent_failure_is_not_retried(db):
+    doc = add_document(db)
+    queue = DocumentJobQueue(db, worker_id="worker-a")
+    job_id = queue.enqueue(doc.id, doc.file_path, "pdf")
+
+    queue.fail(queue.claim().id, "No text", retry=False)
+    db.expire_all()
+    assert db.get(DocumentJob, job_id).status == "failed"
+    assert db.get(Document, doc.id).status == "error"
+
+
+def test_expired_lease_is_reclaimed(db):
+    doc = add_document(db)
+    DocumentJobQueue(db).enqueue(doc.id, doc.file_path, "pdf")
+
+    # Worker A claims with a lease that has already run out, then goes silent
+    crashed = DocumentJobQueue(db, worker_id="worker-a", visibility_timeout=-1)
+    first = crashed.claim()
+
+    other = DocumentJobQueue(db, worker_id="worker-b")
+    second = other.claim()
+    assert second.id == first.id and second.attempts == 2
+
+    # The stale holder can no longer settle the job
+    assert not crashed.heartbeat(first.id)
+    assert not crashed.complete(first.id)
+    assert other.complete(second.id)
+
+
+def worker_sessions(path):
+    # A file, so each worker thread gets its own connection
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine, autoflush=False)
+
+
+def test_worker_retries_and_limits_concurrency(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "DOCUMENT_JOB_RETRY_BASE_SECONDS", 0)
+    engine, Session = worker_sessions(tmp_path / "jobs.db")
+    db = Session()
+    docs = [add_document(db) for _ in range(6)]
+    queue = DocumentJobQueue(db)
+    for doc in docs:
+        queue.enqueue(doc.id, doc.file_path, "pdf")
+    doc_ids = [doc.id for doc in docs]
+    flaky, broken = doc_ids[0], doc_ids[1]
+
+    attempts = {}
+    running = {"now": 0, "max": 0}
+
+    async def handler(job):
+        attempts[job.document_id] = job.attempts
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        try:
+            await asyncio.sleep(0.05)
+            if job.document_id == broken:
+                raise PermanentJobError("Failed to extract text from document")
+            if job.document_id == flaky and job.attempts == 1:
+                raise RuntimeError("storage unavailable")
+        finally:
+            running["now"] -= 1
+
+    async def main():
+        worker = DocumentWorker(handler=handler, concurrency=3, session_factory=Session, poll_interval=0.01)
+        stop = asyncio.Event()
+        run = asyncio.create_task(worker.run(stop))
+        for _ in range(300):
+            await asyncio.sleep(0.01)
+            if db.query(DocumentJob).filter(DocumentJob.status.in_(["queued", "running"])).count() == 0:
+                break
+            db.rollback()
+        stop.set()
+        await run
+
+    asyncio.run(main())
+
+    db.expire_all()
+    assert running["max"] == 3
+    assert attempts[flaky] == 2 and attempts[broken] == 1
+    statuses = {doc_id: db.get(Document, doc_id).status for doc_id in doc_ids}
+    assert statuses.pop(broken) == "error"
+    assert set(statuses.values()) == {"completed"}
+    db.close()
+    engine.dispose()
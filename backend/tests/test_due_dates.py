@@ -0,0 +1,62 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from backend.models import DeadlineEvent, Document, NotificationRule, Profile, Project
+from backend.schemas.document import EventUpdate
+from backend.services.dates import normalize_due_date
+from backend.services.sweep import DeadlineSweep
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2026-03-01", (date(2026, 3, 1), None)),
+    ("2026/3/1", (date(2026, 3, 1), None)),
+    ("2026-03-01T09:00:00Z", (date(2026, 3, 1), None)),
+    (date(2026, 3, 1), (date(2026, 3, 1), None)),
+    ("2026-02-30", (None, "2026-02-30")),
+    ("下週五前", (None, "下週五前")),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_normalize_due_date(value, expected):
+    assert normalize_due_date(value) == expected
+
+
+def test_event_update_rejects_invalid_dates():
+    assert EventUpdate(due_date="2026-03-01").model_dump(mode="json")["due_date"] == "2026-03-01"
+    with pytest.raises(ValidationError):
+        EventUpdate(due_date="next friday")
+
+
+def test_event_update_treats_blank_dates_as_no_date():
+    # The event editor sends "" when saving an event that has no date
+    for blank in ("", "  "):
+        assert EventUpdate(title="Kickoff", due_date=blank).model_dump(mode="json", exclude_unset=True) == {
+            "title": "Kickoff", "due_date": None,
+        }
+
+
+def test_sweep_skips_undated_and_expired_events(db):
+    today = datetime.now().date()
+    user = Profile(id=uuid.uuid4(), email="owner@example.com")
+    project = Project(id=uuid.uuid4(), name="P", owner_id=user.id)
+    doc = Document(id=uuid.uuid4(), project_id=project.id, filename="a.pdf", file_path="x", file_type="pdf")
+    rule = NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=1, channels=["email"])
+    db.add_all([user, project, doc, rule])
+    due = {
+        "soon": today + timedelta(days=1),
+        "overdue": today - timedelta(days=30),
+        "expired": today - timedelta(days=31),
+        "undated": None,
+    }
+    for title, due_date in due.items():
+        db.add(DeadlineEvent(
+            id=uuid.uuid4(), document_id=doc.id, title=title, due_date=due_date,
+            due_date_raw=None if due_date else "下週五前",
+        ))
+    db.commit()
+
+    pending = DeadlineSweep(db).collect(today)
+    assert sorted(p.event.title for p in pending) == ["overdue", "soon"]
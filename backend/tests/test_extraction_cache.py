@@ -0,0 +1,158 @@
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.cache import RedisCache
+from backend.core.config import settings
+from backend.models import LLMExtractionCache
+from backend.services.extraction_cache import ExtractionCache, extraction_key
+from backend.services.parser import PROMPT_VERSION
+from backend.tests.fake_servers import FakeCompletionsServer, FakeRedisServer
+from backend.tests.test_llm_chunking import find_deadlines, long_document, parser_for
+
+
+class MemoryCache:
+    """Same get/set surface as core.cache.RedisCache, backed by a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+        return True
+
+    def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+        return self.data[key]
+
+    def counters(self, *keys):
+        return {key: self.data.get(key, 0) for key in keys}
+
+
+class DisconnectedCache(MemoryCache):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        return False
+
+    def incr(self, key):
+        return None
+
+    def counters(self, *keys):
+        return None
+
+
+def test_key_ignores_whitespace_but_not_prompt_or_deployment():
+    key = extraction_key("付款期限  2026-03-01\n\n驗收", "v1", "gpt-4")
+    assert key == extraction_key(" 付款期限 2026-03-01 驗收 ", "v1", "gpt-4")
+    assert key != extraction_key("付款期限 2026-03-01 驗收", "v2", "gpt-4")
+    assert key != extraction_key("付款期限 2026-03-01 驗收", "v1", "gpt-4.1")
+
+
+def test_duplicate_upload_is_served_from_cache(db):
+    extraction = ExtractionCache(redis=MemoryCache(), session_factory=sessionmaker(bind=db.get_bind()))
+    text = long_document(10)
+
+    with FakeCompletionsServer(find_deadlines, delay=0.2) as fake:
+        service = parser_for(fake)
+        service.cache = extraction
+        first = service.analyze_text_with_llm(text)
+        calls = len(fake.prompts)
+
+        start = time.monotonic()
+        again = service.analyze_text_with_llm(text.replace("\n", "\n\n"))
+        elapsed = time.monotonic() - start
+
+    assert len(first) == 10
+    assert again == first
+    assert len(fake.prompts) == calls
+    assert elapsed < 0.05
+    assert extraction.stats() == {
+        "redis_hits": 1, "db_hits": 0, "misses": 1, "stores": 1, "hits": 1, "hit_rate": 0.5,
+    }
+
+
+def test_database_backs_up_redis(db, monkeypatch):
+    factory = sessionmaker(bind=db.get_bind())
+    text = long_document(3)
+    key = extraction_key(text, PROMPT_VERSION, settings.AZURE_OPENAI_DEPLOYMENT)
+
+    with FakeCompletionsServer(find_deadlines) as fake:
+        service = parser_for(fake)
+        service.cache = ExtractionCache(redis=DisconnectedCache(), session_factory=factory)
+        service.analyze_text_with_llm(text)
+        assert db.get(LLMExtractionCache, key).prompt_version == PROMPT_VERSION
+
+        # A fresh Redis (e.g. after a flush) is refilled from the table
+        redis = MemoryCache()
+        service.cache = ExtractionCache(redis=redis, session_factory=factory)
+        events = service.analyze_text_with_llm(text)
+        assert len(fake.prompts) == 1
+        assert service.cache.stats()["db_hits"] == 1
+        assert [v for k, v in redis.data.items() if ":stats:" not in k] == [events]
+
+
+def test_partial_results_are_not_cached(db):
+    extraction = ExtractionCache(redis=MemoryCache(), session_factory=sessionmaker(bind=db.get_bind()))
+
+    def flaky(content):
+        if "Task0 " in content:
+            raise RuntimeError("model overloaded")
+        return find_deadlines(content)
+
+    with FakeCompletionsServer(flaky) as fake:
+        service = parser_for(fake)
+        service.cache = extraction
+        service.analyze_text_with_llm(long_document(3))
+
+    assert extraction.stats()["stores"] == 0
+    assert db.query(LLMExtractionCache).count() == 0
+
+
+def test_revision_only_reanalyzes_changed_chunks(db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CHUNK_CHARS", 6000)
+    factory = sessionmaker(bind=db.get_bind())
+    v1 = long_document(40)
+    # v2 amends one deadline on page 25
+    v2 = v1.replace("DEADLINE Task25 ", "DEADLINE Task25-amended ")
+
+    with FakeCompletionsServer(find_deadlines) as fake:
+        service = parser_for(fake)
+        service.cache = ExtractionCache(redis=MemoryCache(), session_factory=factory)
+        service.chunk_cache = ExtractionCache(key_prefix="llm:chunk", redis=MemoryCache(), session_factory=factory)
+        service.analyze_text_with_llm(v1)
+        first_run = len(fake.prompts)
+        events = service.analyze_text_with_llm(v2)
+        second_run = len(fake.prompts) - first_run
+
+    assert first_run >= 6
+    assert 1 <= second_run <= 2
+    assert "Task25-amended" in {e["title"] for e in events}
+    assert "Task25" not in {e["title"] for e in events}
+    assert len(events) == 40
+
+
+def test_stats_are_shared_across_processes(db):
+    factory = sessionmaker(bind=db.get_bind())
+    text = long_document(3)
+
+    with FakeRedisServer() as redis_server:
+        # Two RedisCache clients, like the API process and the extraction worker
+        clients = [RedisCache("127.0.0.1", redis_server.port, local_cache=False) for _ in range(2)]
+        api, worker = (ExtractionCache(redis=client, session_factory=factory) for client in clients)
+        with FakeCompletionsServer(find_deadlines) as fake:
+            service = parser_for(fake)
+            service.cache = worker
+            service.analyze_text_with_llm(text)
+            service.analyze_text_with_llm(text)
+
+        assert api.stats() == {
+            "redis_hits": 1, "db_hits": 0, "misses": 1, "stores": 1, "hits": 1, "hit_rate": 0.5,
+        }
+        assert ExtractionCache(key_prefix="llm:chunk", redis=clients[0]).stats()["misses"] == 0
+
+    assert ExtractionCache(redis=DisconnectedCache(), session_factory=factory).stats() is None
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from backend.core.config import settings
+from backend.services.extraction_pool import ExtractionPool
+from backend.services.parser import DocumentParserService
+from backend.tests.bench_pdf_extraction import write_sample_pdf
+from backend.tests.pool_jobs import sleep_with_pid, wait_for_file
+
+
+def process_exited(pid: int, limit: float = 10) -> bool:
+    deadline = time.monotonic() + limit
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_extraction_runs_off_the_event_loop(tmp_path):
+    path = tmp_path / "big.pdf"
+    write_sample_pdf(str(path), pages=150)
+    expected = DocumentParserService().extract_text(str(path), "pdf")
+    started, release = tmp_path / "started", tmp_path / "release"
+
+    async def release_when_started():
+        # Only reachable while the job is running if awaiting it leaves the loop free
+        while not started.exists():
+            await asyncio.sleep(0.01)
+        release.touch()
+
+    async def scenario(pool):
+        return await asyncio.gather(
+            pool.extract_text(str(path), "pdf"),
+            pool.run(wait_for_file, str(started), str(release)),
+            release_when_started(),
+        )
+
+    pool = ExtractionPool(max_workers=2, timeout=60)
+    try:
+        text, released, _ = asyncio.run(scenario(pool))
+    finally:
+        pool.shutdown()
+
+    assert text == expected
+    assert released
+
+
+def test_large_pdf_is_split_into_page_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_PARALLEL_MIN_PAGES", 50)
+    big, small = tmp_path / "big.pdf", tmp_path / "small.pdf"
+    write_sample_pdf(str(big), pages=120)
+    write_sample_pdf(str(small), pages=20)
+    service = DocumentParserService()
+
+    pool = ExtractionPool(max_workers=2, timeout=60)
+    jobs = []
+    run = pool.run
+
+    async def recording_run(fn, *args):
+        jobs.append((fn.__name__, args[1:]))
+        return await run(fn, *args)
+
+    monkeypatch.setattr(pool, "run", recording_run)
+    try:
+        assert asyncio.run(pool.extract_text(str(big), "pdf")) == service.extract_text(str(big), "pdf")
+        ranges = [args for name, args in jobs if name == "extract_pdf_page_range"]
+        assert ranges == [(0, 30), (30, 60), (60, 90), (90, 120)]
+
+        jobs.clear()
+        assert asyncio.run(pool.extract_text(str(small), "pdf")) == service.extract_text(str(small), "pdf")
+        assert [name for name, _ in jobs] == ["pdf_page_count", "extract_text"]
+    finally:
+        pool.shutdown()
+
+
+def test_timed_out_job_is_killed_and_pool_recovers(tmp_path):
+    pid_file = tmp_path / "pid"
+    pool = ExtractionPool(max_workers=1, timeout=0.5)
+    try:
+        # Start the worker first, so the timeout only covers the sleep
+        pool.timeout = 60
+        asyncio.run(pool.run(sleep_with_pid, str(pid_file), 0))
+        pool.timeout = 0.5
+        with pytest.raises(TimeoutError):
+            asyncio.run(pool.run(sleep_with_pid, str(pid_file), 30))
+        # The stuck worker is killed rather than left to finish its 30s sleep
+        assert process_exited(int(pid_file.read_text()))
+        # ...and the next job gets a fresh one
+        assert asyncio.run(pool.run(pow, 2, 10)) == 1024
+    finally:
+        pool.shutdown()
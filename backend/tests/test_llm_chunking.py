@@ -0,0 +1,115 @@
+import itertools
+import re
+import threading
+
+from openai import AzureOpenAI
+
+from backend.core.config import settings
+from backend.services.chunking import PAGE_BREAK, merge_events, split_text
+from backend.services.parser import DocumentParserService
+from backend.tests.fake_servers import FakeCompletionsServer
+
+FILLER = "本合約之條款依雙方協議辦理，乙方應依約履行各項義務。\n" * 30
+
+
+def long_document(pages: int) -> str:
+    # One deadline at the end of every page, right where chunks overlap
+    return "".join(
+        f"第 {i} 頁\n{FILLER}DEADLINE Task{i} 2026-{1 + i % 12:02d}-{1 + i % 28:02d}\n{PAGE_BREAK}"
+        for i in range(pages)
+    )
+
+
+def find_deadlines(content: str) -> list[dict]:
+    return [
+        {"title": title, "due_date": due, "source_text": f"DEADLINE {title} {due}", "confidence_score": 90}
+        for title, due in re.findall(r"DEADLINE (\S+) (\d{4}-\d{2}-\d{2})", content)
+    ]
+
+
+def parser_for(fake: FakeCompletionsServer) -> DocumentParserService:
+    service = DocumentParserService()
+    service.cache = None
+    service.chunk_cache = None
+    service.prefilter = False  # These tests are about chunking the full text
+    service.client = AzureOpenAI(
+        api_key="test", api_version="2024-02-15-preview", azure_endpoint=fake.endpoint, max_retries=0,
+    )
+    return service
+
+
+def test_split_text_prefers_page_boundaries_and_overlaps():
+    text = long_document(12)
+    chunks = split_text(text, max_chars=3000, overlap=300)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 3000 for chunk in chunks)
+    assert all(chunk[-1] in "\n" + PAGE_BREAK for chunk in chunks)
+    # Every deadline line survives whole in some chunk
+    for i in range(12):
+        assert any(f"DEADLINE Task{i} " in chunk for chunk in chunks)
+    # Each chunk starts with a line from the tail of the previous one
+    assert all(b[:b.index("\n") + 1] in a[-300:] for a, b in zip(chunks, chunks[1:]))
+    assert split_text("short text", max_chars=3000) == ["short text"]
+    assert split_text("  \n ", max_chars=3000) == []
+
+
+def test_chunk_boundaries_survive_insertions():
+    v1 = long_document(40)
+    page = v1.index("第 3 頁")
+    v2 = v1[:page] + f"第 2a 頁\n{FILLER[:400]}DEADLINE Extra 2026-05-05\n{PAGE_BREAK}" + v1[page:]
+
+    before = split_text(v1, max_chars=6000, overlap=500)
+    after = split_text(v2, max_chars=6000, overlap=500)
+    # Only the chunk holding the new page differs; later chunks do not shift
+    assert len(set(after) - set(before)) == 1
+    assert len(after) == len(before)
+
+
+def test_merge_events_dedupes_by_title_date_and_source():
+    merged = merge_events([
+        [{"title": "Pay Invoice", "due_date": "2026-03-01", "source_text": "pay by 3/1", "confidence_score": 60}],
+        [
+            {"title": "pay  invoice!", "due_date": "2026/03/01", "source_text": "other", "confidence_score": 80},
+            {"title": "Payment", "due_date": "2026-03-01", "source_text": "Pay by 3/1", "confidence_score": 10},
+            {"title": "Pay Invoice", "due_date": "2026-04-01", "source_text": "pay by 4/1"},
+        ],
+    ])
+    assert [(e["title"], e["due_date"]) for e in merged] == [
+        ("pay  invoice!", "2026/03/01"),
+        ("Pay Invoice", "2026-04-01"),
+    ]
+
+
+def test_chunks_are_analyzed_concurrently(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CHUNK_CHARS", 6000)
+    monkeypatch.setattr(settings, "LLM_CHUNK_OVERLAP", 500)
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 16)
+    # The first requests only get answered once all of them are in flight;
+    # analyzed one at a time, the barrier times out and they fail with a 500
+    in_flight = threading.Barrier(4, timeout=5)
+    arrivals = itertools.count()
+
+    def respond(content):
+        if next(arrivals) < in_flight.parties:
+            in_flight.wait()
+        return find_deadlines(content)
+
+    with FakeCompletionsServer(respond) as fake:
+        events = parser_for(fake).analyze_text_with_llm(long_document(40))
+
+    assert len(fake.prompts) >= 6
+    assert sorted(e["title"] for e in events) == sorted(f"Task{i}" for i in range(40))
+    assert fake.concurrency.max_active >= in_flight.parties
+
+
+def test_chunk_concurrency_is_limited(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CHUNK_CHARS", 6000)
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 2)
+
+    with FakeCompletionsServer(find_deadlines, delay=0.05) as fake:
+        events = parser_for(fake).analyze_text_with_llm(long_document(20))
+
+    assert len(fake.prompts) > 2
+    assert fake.concurrency.max_active <= 2
+    assert len(events) == 20
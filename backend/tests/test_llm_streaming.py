@@ -0,0 +1,85 @@
+import json
+import time
+import uuid
+
+from backend.services.document_processing import EventWriter
+from backend.services.json_stream import JsonArrayStream
+from backend.tests.fake_servers import FakeCompletionsServer
+from backend.tests.test_llm_chunking import find_deadlines, parser_for
+
+
+def feed_in_pieces(text: str, size: int) -> list[list[dict]]:
+    stream = JsonArrayStream()
+    return [stream.feed(text[i:i + size]) for i in range(0, len(text), size)]
+
+
+def test_array_elements_are_returned_as_they_close():
+    events = [
+        {"title": "付款 {第一期}", "due_date": "2026-03-01", "source_text": 'He said "due [soon]"\\'},
+        {"title": "Delivery", "due_date": None, "nested": {"list": [1, {"a": "}"}]}},
+    ]
+    text = json.dumps({"events": events}, ensure_ascii=False)
+    for size in (1, 3, 16, len(text)):
+        assert sum(feed_in_pieces(text, size), []) == events
+
+    # The first event is complete before the second one starts arriving
+    head = text.index('{"title": "Delivery"')
+    stream = JsonArrayStream()
+    assert stream.feed(text[:head]) == events[:1]
+    assert stream.feed(text[head:]) == events[1:]
+    assert stream.done
+
+    # A bare array works too; non-objects and text after the array are ignored
+    stream = JsonArrayStream()
+    assert stream.feed('[1, "x", {"title": "A"}] [{"title": "B"}]') == [{"title": "A"}]
+
+
+def test_replies_without_a_leading_array_do_not_break_the_stream():
+    wrapped = json.dumps({"meta": {"model": {"name": "gpt"}}, "events": [{"title": "A"}, {"title": "B"}]})
+    for text in ("{}", "", '{"events": []}', '{"note": "none found"}'):
+        for size in (1, 4, max(len(text), 1)):
+            assert sum(feed_in_pieces(text, size), []) == []
+    for size in (1, 5, len(wrapped)):
+        assert sum(feed_in_pieces(wrapped, size), []) == [{"title": "A"}, {"title": "B"}]
+
+
+def test_streamed_replies_in_other_shapes_fall_back_to_the_full_parse():
+    replies = {
+        "EMPTY": "{}",
+        "WRAPPED": json.dumps({"meta": {"pages": {"count": 1}}, "events": [{"title": "Pay", "due_date": "2026-01-05"}]}),
+    }
+    with FakeCompletionsServer(lambda content: replies[content.split()[-1]], stream_piece=3) as fake:
+        streamed = []
+        assert parser_for(fake).analyze_text_with_llm("EMPTY", on_event=streamed.append) == []
+        events = parser_for(fake).analyze_text_with_llm("WRAPPED", on_event=streamed.append)
+        assert len(fake.prompts) == 2
+    assert [e["title"] for e in events] == ["Pay"]
+    assert streamed == [{"title": "Pay", "due_date": "2026-01-05"}]
+
+
+def test_streamed_events_arrive_before_the_completion_finishes():
+    content = "".join(f"DEADLINE Task{i} 2026-01-{i + 1:02d}\n" for i in range(5))
+    with FakeCompletionsServer(find_deadlines) as fake:
+        expected = parser_for(fake).analyze_text_with_llm(content)
+
+    arrivals = []
+    with FakeCompletionsServer(find_deadlines, stream_delay=0.02) as fake:
+        started = time.monotonic()
+        events = parser_for(fake).analyze_text_with_llm(content, on_event=lambda e: arrivals.append((time.monotonic(), e)))
+        total = time.monotonic() - started
+
+    assert events == expected
+    assert [e for _, e in arrivals] == expected
+    # ~45 pieces of 16 characters, 20 ms apart; the first event closes after ~7
+    assert arrivals[0][0] - started < total / 2
+
+
+def test_event_ids_are_stable_per_document_and_source():
+    document_id = str(uuid.uuid4())
+    writer = EventWriter(document_id)
+    event = {"title": "Final Payment", "due_date": "2026-04-30"}
+
+    assert writer.event_id(event) == EventWriter(document_id).event_id(dict(event, title="final payment "))
+    assert writer.event_id(event) != writer.event_id(dict(event, due_date="2026-05-01"))
+    assert writer.event_id(event) != writer.event_id(dict(event, extraction_source="rules"))
+    assert writer.event_id(event) != EventWriter(str(uuid.uuid4())).event_id(event)
@@ -0,0 +1,171 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.core.config import settings
+from backend.models import DeadlineEvent, Document, NotificationLog, NotificationRule, Profile, Project
+from backend.services.dispatcher import NotificationDispatcher
+from backend.services.notification import NotificationService
+from backend.services.notification_log import NotificationLogWriter
+from backend.tests.fake_servers import FakeLineServer
+
+
+class CrashingDispatcher(NotificationDispatcher):
+    """Delivers the first `crash_after` results, then dies like a killed worker."""
+
+    def __init__(self, crash_after: int):
+        super().__init__()
+        self.crash_after = crash_after
+
+    def iter_results(self, jobs):
+        for i, result in enumerate(super().iter_results(jobs)):
+            if i == self.crash_after:
+                raise RuntimeError("worker killed")
+            yield result
+
+
+class SlowDispatcher(NotificationDispatcher):
+    """Yields results `interval` seconds apart, running `between` after each (another worker's recovery pass)."""
+
+    def __init__(self, interval: float, between):
+        super().__init__()
+        self.interval = interval
+        self.between = between
+
+    def iter_results(self, jobs):
+        for result in super().iter_results(jobs):
+            time.sleep(self.interval)
+            yield result
+            self.between()
+
+
+def seed_events(db, n: int) -> Profile:
+    today = datetime.now().date()
+    user = Profile(id=uuid.uuid4(), email="owner@example.com", line_user_id="Uowner")
+    project = Project(id=uuid.uuid4(), name="Tender", owner_id=user.id)
+    doc = Document(id=uuid.uuid4(), project_id=project.id, filename="a.pdf", file_path="x", file_type="pdf")
+    db.add_all([user, project, doc])
+    db.add(NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=3, channels=["line"]))
+    for i in range(n):
+        db.add(DeadlineEvent(
+            id=uuid.uuid4(), document_id=doc.id, title=f"Task {i}",
+            due_date=today + timedelta(days=3),
+        ))
+    db.commit()
+    return user
+
+
+def statuses(db) -> list[str]:
+    return sorted(status for (status,) in db.query(NotificationLog.status))
+
+
+def test_writer_flushes_on_size_and_on_exit(db):
+    user = seed_events(db, 7)
+    event_ids = [event_id for (event_id,) in db.query(DeadlineEvent.id)]
+
+    with pytest.raises(RuntimeError):
+        with NotificationLogWriter(db, batch_size=3, flush_interval=60) as writer:
+            ids = writer.claim([(user.id, event_id, "line", "m") for event_id in event_ids])
+            assert statuses(db) == ["pending"] * 7
+            for log_id in ids:
+                writer.confirm(log_id, "sent")
+            assert writer.flushes == 2  # 6 rows flushed by size, 1 still buffered
+            raise RuntimeError("sweep failed")
+
+    # The buffered confirmation is written on the way out
+    assert writer.flushes == 3
+    assert statuses(db) == ["sent"] * 7
+
+
+def test_crash_mid_run_does_not_resend(db, monkeypatch):
+    seed_events(db, 6)
+
+    with FakeLineServer() as line:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        service = NotificationService(CrashingDispatcher(crash_after=2))
+        with pytest.raises(RuntimeError):
+            service._check_sweep(db)
+        pushed = len(line.pushes)
+
+        # Two confirmed, the rest left as in-flight claims
+        assert statuses(db).count("sent") == 2
+        assert statuses(db).count("pending") == 4
+
+        # A rerun while the claims are fresh sends nothing new
+        NotificationService()._check_sweep(db)
+        assert len(line.pushes) == pushed
+        assert len(db.query(NotificationLog).all()) == 6
+
+        # Once the claims go stale they are abandoned and retried
+        monkeypatch.setattr(settings, "NOTIFICATION_PENDING_TIMEOUT", -60)
+        NotificationService()._check_sweep(db)
+        assert len(line.pushes) == pushed + 4
+        assert statuses(db) == ["abandoned"] * 4 + ["sent"] * 6
+
+
+def test_claims_of_a_run_outliving_the_timeout_are_not_reaped(db, monkeypatch):
+    seed_events(db, 8)
+    monkeypatch.setattr(settings, "NOTIFICATION_PENDING_TIMEOUT", 0.3)
+    reaped = []
+
+    with FakeLineServer() as line:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        # 8 sends 0.1 s apart: the run takes well over the 0.3 s timeout
+        service = NotificationService(SlowDispatcher(0.1, lambda: reaped.append(NotificationLogWriter.reap_abandoned(db))))
+        started = time.monotonic()
+        service._check_sweep(db)
+        assert time.monotonic() - started > 2 * settings.NOTIFICATION_PENDING_TIMEOUT
+        assert len(line.pushes) == 8
+
+    assert sum(reaped) == 0
+    assert statuses(db) == ["sent"] * 8
+
+    # A run that stops renewing is reaped once the timeout passes
+    user = db.query(Profile).one()
+    event_id = db.query(DeadlineEvent.id).first()[0]
+    NotificationLogWriter(db).claim([(user.id, event_id, "email", "m")])
+    time.sleep(0.35)
+    assert NotificationLogWriter.reap_abandoned(db) == 1
+
+
+def test_send_key_claims_are_exclusive(db):
+    user = seed_events(db, 1)
+    event_id = db.query(DeadlineEvent.id).scalar()
+    rows = [(user.id, event_id, "line", "m"), (user.id, event_id, "email", "m")]
+
+    first = NotificationLogWriter(db).claim(rows)
+    second = NotificationLogWriter(db).claim(rows)
+    assert all(first) and second == [None, None]
+
+    # A failed send frees the key for a retry; a sent one keeps it
+    with NotificationLogWriter(db) as writer:
+        writer.confirm(first[0], "sent")
+        writer.confirm(first[1], "failed", "smtp down")
+    retry = NotificationLogWriter(db).claim(rows)
+    assert retry[0] is None and retry[1] is not None
+
+    # Tomorrow is a new key
+    tomorrow = datetime.now().date() + timedelta(days=1)
+    assert all(NotificationLogWriter(db).claim(rows, day=tomorrow))
+
+
+def test_per_event_path_claims_instead_of_looking_up(db, monkeypatch, count_queries):
+    seed_events(db, 1)
+    with FakeLineServer() as line:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        NotificationService()._check_per_event(db)
+        with count_queries() as q:
+            NotificationService()._check_per_event(db)
+
+        assert len(line.pushes) == 1
+    assert statuses(db) == ["sent"]
+    # No per-channel "sent today?" lookups: the conflicting claim is the check
+    assert not any("notification_logs.notification_type = " in sql for sql in q.statements)
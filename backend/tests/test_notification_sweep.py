@@ -0,0 +1,123 @@
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from backend.core.config import settings
+from backend.models import (
+    DeadlineEvent, Project, Profile, Document,
+    NotificationLog, NotificationRule, ProjectMember,
+)
+from backend.services.notification import NotificationService
+from backend.services.notification_log import send_key
+from backend.services.sweep import DeadlineSweep
+
+
+def seed(db, n_events: int, rng_seed: int = 7):
+    """Projects with owners, accepted/pending members, rules and open events."""
+    rng = random.Random(rng_seed)
+    today = datetime.now().date()
+
+    users = [
+        Profile(id=uuid.uuid4(), email=f"user{i}@example.com", line_user_id=f"U{i}" if i % 2 else None)
+        for i in range(12)
+    ]
+    db.add_all(users)
+    for i, user in enumerate(users):
+        if i % 4 == 3:
+            continue  # some users have no rules
+        for days, channels in [(7, ["email"]), (3, ["line", "email"]), (0, ["line"])]:
+            db.add(NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=days, channels=channels))
+
+    projects = []
+    for i in range(max(1, n_events // 10)):
+        project = Project(id=uuid.uuid4(), name=f"Project {i}", owner_id=rng.choice(users).id)
+        projects.append(project)
+        db.add(project)
+        for member in rng.sample(users, 3):
+            db.add(ProjectMember(
+                id=uuid.uuid4(), project_id=project.id, user_id=member.id, email=member.email,
+                status=rng.choice(["accepted", "accepted", "pending"]), invited_by=project.owner_id,
+            ))
+
+    events = []
+    for i in range(n_events):
+        project = rng.choice(projects)
+        doc = Document(id=uuid.uuid4(), project_id=project.id, filename="a.pdf", file_path="x", file_type="pdf")
+        db.add(doc)
+        offset = rng.choice([-40, -5, -1, 0, 1, 3, 7, 10])
+        event = DeadlineEvent(
+            id=uuid.uuid4(), document_id=doc.id, title=f"Event {i}",
+            due_date=today + timedelta(days=offset),
+            status=rng.choice(["pending", "pending", "completed"]),
+        )
+        events.append(event)
+        db.add(event)
+    db.flush()
+
+    # Some channels already sent today, plus a failed one that must be retried
+    for event in rng.sample(events, max(1, n_events // 5)):
+        project = next(p for p in projects if p.id == db.get(Document, event.document_id).project_id)
+        for channel, status in [("email", "sent"), ("line", "failed")]:
+            db.add(NotificationLog(
+                id=uuid.uuid4(), user_id=project.owner_id, event_id=event.id,
+                notification_type=channel, status=status, sent_at=datetime.now(),
+                send_key=send_key(project.owner_id, event.id, channel),
+            ))
+    db.commit()
+
+
+def per_event_results(db):
+    service = NotificationService()
+    calls = []
+    service._send_to_user = lambda db, user, event, project, days_left, channels=None: calls.append(
+        (user.id, event.id, days_left, frozenset(channels))
+    )
+    for event in db.query(DeadlineEvent).filter(DeadlineEvent.status != "completed").all():
+        service._process_event(db, event)
+    return calls
+
+
+def sweep_results(db):
+    """Sweep output narrowed to channels the user is reachable on, like the per-event claims."""
+    service = NotificationService()
+    results = []
+    for p in DeadlineSweep(db).collect():
+        channels = service._deliverable_channels(p.user, p.channels)
+        if channels:
+            results.append((p.user.id, p.event.id, p.days_left, frozenset(channels)))
+    return results
+
+
+def test_sweep_matches_per_event_path(db, monkeypatch):
+    monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+    seed(db, 200)
+    # Sweep first: the per-event path claims today's send keys as it goes
+    actual = sweep_results(db)
+    expected = per_event_results(db)
+
+    assert expected, "fixture should produce some notifications"
+    assert sorted(actual, key=str) == sorted(expected, key=str)
+
+
+def test_sweep_query_count_is_flat(db, count_queries):
+    print("\nevents | sweep queries | per-event queries | sweep ms")
+    sweep_counts = []
+    total = 0
+    for n in (20, 200, 1000):
+        seed(db, n - total, rng_seed=n)
+        total = n
+
+        with count_queries() as q:
+            start = time.perf_counter()
+            DeadlineSweep(db).collect()
+            elapsed = (time.perf_counter() - start) * 1000
+        sweep_counts.append(q.count)
+
+        with count_queries() as q_per_event:
+            per_event_results(db)
+
+        print(f"{n:6d} | {q.count:13d} | {q_per_event.count:17d} | {elapsed:8.1f}")
+
+    assert len(set(sweep_counts)) == 1
+    assert q_per_event.count > sweep_counts[-1] * 10
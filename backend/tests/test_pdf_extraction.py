@@ -0,0 +1,54 @@
+import tempfile
+import tracemalloc
+
+import pytest
+
+from backend.services.parser import DocumentParserService
+from backend.tests.bench_pdf_extraction import legacy_extract, write_sample_pdf
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    path = tmp_path / "sample.pdf"
+    write_sample_pdf(str(path), pages=30, image_bytes=100 * 1024)
+    return path
+
+
+def test_sources_extract_the_same_text(sample_pdf):
+    service = DocumentParserService()
+    data = sample_pdf.read_bytes()
+    expected = legacy_extract(data)
+
+    with tempfile.SpooledTemporaryFile(max_size=1024) as spooled:
+        spooled.write(data)
+        from_spooled = service.extract_text(spooled, "pdf")
+
+    assert "Page 29 clause 39" in expected
+    assert service.extract_text(data, "pdf") == expected
+    assert service.extract_text(str(sample_pdf), "pdf") == expected
+    assert service.extract_text(sample_pdf, "pdf") == expected
+    assert from_spooled == expected
+
+
+def test_pages_are_yielded_lazily(sample_pdf):
+    pages = DocumentParserService().iter_pdf_pages(sample_pdf)
+    assert next(pages).startswith("Page 0 clause 0")
+    assert next(pages).startswith("Page 1 clause 0")
+    pages.close()
+
+
+def test_streaming_from_path_keeps_memory_flat(sample_pdf):
+    service = DocumentParserService()
+
+    def peak(fn) -> int:
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    legacy = peak(lambda: legacy_extract(sample_pdf.read_bytes()))
+    streaming = peak(lambda: service.extract_text_from_pdf(sample_pdf))
+    # ~3 MB of page images: the legacy path holds them all, streaming one page at a time
+    assert streaming < legacy / 4
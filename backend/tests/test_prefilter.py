@@ -0,0 +1,77 @@
+import os
+import re
+
+import pytest
+
+from backend.services.prefilter import OMITTED, select_candidates
+from backend.tests.fake_servers import FakeCompletionsServer
+from backend.tests.test_llm_chunking import find_deadlines, long_document, parser_for
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "deadline_corpus")
+ANNOTATION = re.compile(r"\[\[(.+?)\]\]")
+
+
+def load_corpus() -> list[tuple[str, str, list[str]]]:
+    """(name, text, annotated deadline spans) for every corpus document."""
+    corpus = []
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith(".txt"):
+            with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+                annotated = f.read()
+            corpus.append((name, ANNOTATION.sub(r"\1", annotated), ANNOTATION.findall(annotated)))
+    return corpus
+
+
+@pytest.mark.parametrize("context_lines", [0, 2])
+def test_prefilter_recall_on_annotated_corpus(context_lines):
+    kept_chars = total_chars = found = expected = 0
+    missed = []
+    for name, text, spans in load_corpus():
+        candidates = select_candidates(text, context_lines)
+        kept_chars += len(candidates)
+        total_chars += len(text)
+        expected += len(spans)
+        for span in spans:
+            if span in candidates:
+                found += 1
+            else:
+                missed.append(f"{name}: {span}")
+
+    assert expected >= 30
+    assert found / expected == 1.0, missed
+    # Even these short documents are mostly non-deadline text
+    assert kept_chars / total_chars < (0.4 if context_lines == 0 else 0.6)
+
+
+def test_prefilter_drops_filler_and_marks_gaps():
+    text = "\n".join(["Definitions and general obligations of the parties."] * 50 + [
+        "Payment is due within 30 days of the invoice.",
+    ] + ["Governing law and venue."] * 50)
+
+    candidates = select_candidates(text, context_lines=1)
+    assert candidates.split("\n") == [
+        OMITTED,
+        "Definitions and general obligations of the parties.",
+        "Payment is due within 30 days of the invoice.",
+        "Governing law and venue.",
+        OMITTED,
+    ]
+    assert select_candidates("Nothing to see here.\nJust boilerplate.") == ""
+
+
+def test_long_document_prompts_shrink():
+    text = long_document(40)
+
+    def analyze(prefilter: bool) -> tuple[list[dict], int]:
+        with FakeCompletionsServer(find_deadlines) as fake:
+            service = parser_for(fake)
+            service.prefilter = prefilter
+            events = service.analyze_text_with_llm(text)
+        return events, sum(len(p) for p in fake.prompts)
+
+    full_events, full_chars = analyze(False)
+    filtered_events, filtered_chars = analyze(True)
+
+    key = lambda e: (e["title"], e["due_date"])
+    assert sorted(map(key, filtered_events)) == sorted(map(key, full_events))
+    assert filtered_chars < full_chars / 4
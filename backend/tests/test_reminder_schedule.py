@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.core.config import settings
+from backend.models import DeadlineEvent, NotificationRule, Profile, ProjectMember, ReminderSchedule
+from backend.services.reminder_schedule import ReminderScheduler, ScheduledSweep, refresh_reminders
+from backend.services.sweep import DeadlineSweep
+from backend.tests.test_notification_sweep import seed
+
+
+def pending_key(items):
+    return sorted(
+        (p.user.id, p.event.id, p.days_left, frozenset(p.channels), p.digest) for p in items
+    )
+
+
+def test_schedule_matches_rule_evaluation(db):
+    seed(db, 300)
+    today = datetime.now().date()
+    ReminderScheduler(db, today).rebuild()
+
+    for offset in range(0, 10):
+        day = today + timedelta(days=offset)
+        assert pending_key(ScheduledSweep(db).collect(day)) == pending_key(DeadlineSweep(db).collect(day)), day
+
+
+def test_daily_read_is_one_query(db, count_queries):
+    seed(db, 300)
+    ReminderScheduler(db).rebuild()
+    with count_queries() as q:
+        items = ScheduledSweep(db).collect()
+    assert items
+    assert q.count == 1
+
+
+@pytest.fixture
+def schedule_source(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_SWEEP_SOURCE", "schedule")
+
+
+def test_rule_and_event_changes_update_the_schedule(db, schedule_source):
+    seed(db, 50)
+    today = datetime.now().date()
+    ReminderScheduler(db, today).rebuild()
+
+    # A user adds a 10-day rule: their reminders for events due in 10 days appear
+    user = db.query(Profile).filter(Profile.email == "user0@example.com").one()
+    before = pending_key(ScheduledSweep(db).collect(today))
+    db.add(NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=10, channels=["email"]))
+    db.commit()
+    refresh_reminders(user_ids=[str(user.id)], db=db)
+    after = pending_key(ScheduledSweep(db).collect(today))
+    assert after == pending_key(DeadlineSweep(db).collect(today))
+    assert after != before
+
+    # Moving a due date or completing an event rewrites only that event's rows
+    event = db.query(DeadlineEvent).filter(DeadlineEvent.status != "completed").first()
+    event.due_date = today + timedelta(days=3)
+    db.commit()
+    refresh_reminders(event_ids=[str(event.id)], db=db)
+    assert pending_key(ScheduledSweep(db).collect(today)) == pending_key(DeadlineSweep(db).collect(today))
+
+    event.status = "completed"
+    db.commit()
+    refresh_reminders(event_ids=[event.id], db=db)
+    assert db.query(ReminderSchedule).filter(ReminderSchedule.event_id == event.id).count() == 0
+
+
+def test_prune_drops_past_days(db):
+    seed(db, 50)
+    today = datetime.now().date()
+    ReminderScheduler(db, today - timedelta(days=5)).rebuild()
+    assert db.query(ReminderSchedule).filter(ReminderSchedule.fire_date < today).count()
+
+    ReminderScheduler(db, today).prune()
+    assert db.query(ReminderSchedule).filter(ReminderSchedule.fire_date < today).count() == 0
+
+
+def test_membership_changes_update_the_schedule(db, schedule_source):
+    seed(db, 50)
+    today = datetime.now().date()
+    ReminderScheduler(db, today).rebuild()
+
+    # Accepting an invite (members.py, auth.py) refreshes the project's events
+    member = db.query(ProjectMember).filter(ProjectMember.status == "pending").first()
+    member.status = "accepted"
+    db.commit()
+    refresh_reminders(project_ids=[str(member.project_id)], db=db)
+    assert pending_key(ScheduledSweep(db).collect(today)) == pending_key(DeadlineSweep(db).collect(today))
+
+    # Removing a member drops their reminders for that project
+    db.delete(member)
+    db.commit()
+    refresh_reminders(project_ids=[member.project_id], db=db)
+    for day in (today, today + timedelta(days=3)):
+        assert pending_key(ScheduledSweep(db).collect(day)) == pending_key(DeadlineSweep(db).collect(day))
+
+
+def test_writes_skip_the_schedule_when_the_sweep_does_not_read_it(db, count_queries):
+    seed(db, 50)
+    user = db.query(Profile).first()
+    with count_queries() as q:
+        refresh_reminders(user_ids=[user.id], db=db)
+        refresh_reminders(event_ids=[uuid.uuid4()], project_ids=[uuid.uuid4()], db=db)
+    assert q.count == 0
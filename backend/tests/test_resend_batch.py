@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime, timedelta
+
+import resend
+
+from backend.models import DeadlineEvent, Document, NotificationLog, NotificationRule, Profile, Project
+from backend.services.dispatcher import NotificationDispatcher, ProviderLimit
+from backend.services.email import EmailService
+from backend.services.notification import NotificationService
+from backend.tests.fake_servers import FakeResendServer
+
+
+def resend_email_service() -> EmailService:
+    service = EmailService()
+    service.provider = "resend"
+    service._resend_from_email = "bot@example.com"
+    service.enabled = True
+    return service
+
+
+def test_sweep_sends_reminders_in_resend_batches(db, monkeypatch):
+    today = datetime.now().date()
+    users = [Profile(id=uuid.uuid4(), email=f"user{i}@example.com") for i in range(230)]
+    db.add_all(users)
+    for user in users:
+        db.add(NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=1, channels=["email"]))
+        project = Project(id=uuid.uuid4(), name="P", owner_id=user.id)
+        doc = Document(id=uuid.uuid4(), project_id=project.id, filename="a.pdf", file_path="x", file_type="pdf")
+        db.add_all([project, doc, DeadlineEvent(
+            id=uuid.uuid4(), document_id=doc.id, title="Pay invoice",
+            due_date=today + timedelta(days=1),
+        )])
+    db.commit()
+
+    with FakeResendServer(reject={"user7@example.com", "user150@example.com"}) as stub:
+        monkeypatch.setattr(resend, "api_url", stub.endpoint)
+        monkeypatch.setattr(resend, "api_key", "re_test")
+
+        service = NotificationService(NotificationDispatcher({"email": ProviderLimit(concurrency=2)}))
+        service.email_service = resend_email_service()
+        service._check_sweep(db)
+
+        # 230 reminders -> 3 HTTP calls instead of 230
+        assert [path for path, _ in stub.requests] == ["/emails/batch"] * 3
+        assert sorted(len(body) for _, body in stub.requests) == [30, 100, 100]
+
+    logs = {log.user_id: log for log in db.query(NotificationLog).all()}
+    assert len(logs) == 230
+    failed = {log.user.email for log in logs.values() if log.status == "failed"}
+    assert failed == {"user7@example.com", "user150@example.com"}
+    assert all(log.error_message for log in logs.values() if log.status == "failed")
+    assert sum(log.status == "sent" for log in logs.values()) == 228
+
+
+def test_batch_call_failure_marks_every_message_failed(monkeypatch):
+    monkeypatch.setattr(resend, "api_url", "http://127.0.0.1:9")  # nothing listening
+    service = resend_email_service()
+    results = service.send_batch([("a@example.com", "s", "h"), ("b@example.com", "s", "h")])
+    assert [sent for sent, _ in results] == [False, False]
+    assert all(error for _, error in results)
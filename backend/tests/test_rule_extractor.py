@@ -0,0 +1,79 @@
+from datetime import date
+
+from backend.core.config import settings
+from backend.services.dates import normalize_due_date
+from backend.services.rule_extractor import extract_events
+from backend.tests.fake_servers import FakeCompletionsServer
+from backend.tests.test_llm_chunking import find_deadlines, long_document, parser_for
+from backend.tests.test_prefilter import load_corpus
+
+
+def due_dates(text: str) -> list:
+    return [event["due_date"] for event in extract_events(text)]
+
+
+def test_absolute_dates_in_every_notation():
+    assert due_dates("截止收件時間為民國113年5月20日下午5時。") == ["2024-05-20"]
+    assert due_dates("開標時間訂於中華民國一一三年五月二十一日上午十時。") == ["2024-05-21"]
+    assert due_dates("租賃期間至２０２８年３月３１日止。") == ["2028-03-31"]
+    assert due_dates("結構體完成日期為 2026.12.15，預定竣工日期：2027/05/31") == ["2026-12-15", "2027-05-31"]
+    assert due_dates("審查期限 113.06.30 止") == ["2024-06-30"]
+    assert due_dates("The report is due on May 5, 2026. Fees are payable on or before 1 July 2026.") == [
+        "2026-05-05", "2026-07-01",
+    ]
+    # Not a calendar date: kept as raw text for someone to fix
+    assert [normalize_due_date(d)[0] for d in due_dates("應於2026年2月30日前付款。")] == [None]
+
+
+def test_relative_periods_resolve_against_a_date_in_the_clause():
+    assert due_dates("本契約自2026年3月1日起30日內完成交付。") == ["2026-03-31"]
+    assert due_dates("Delivery within 14 days after 1 March 2026.") == ["2026-03-15"]
+    assert due_dates("自2026年1月31日起一個月內驗收。") == ["2026-02-28"]
+
+    # No anchor: the phrase with its context becomes the raw due date
+    [event] = extract_events("得標廠商應於決標次日起14日內繳納履約保證金，未依限繳納者視同放棄得標。")
+    assert normalize_due_date(event["due_date"]) == (None, "得標廠商應於決標次日起14日內")
+    assert event["source_text"] == "得標廠商應於決標次日起14日內繳納履約保證金，未依限繳納者視同放棄得標。"
+    assert event["confidence_score"] < 50
+
+
+def test_events_carry_titles_clauses_and_source():
+    text = "第四條 截止收件\n本案截止收件時間為民國113年5月20日下午5時，逾時送達者不予受理。\n開工日期：２０２６-０６-０１"
+    first, second = extract_events(text)
+    assert first["title"] == "截止收件"
+    assert first["source_text"] == "本案截止收件時間為民國113年5月20日下午5時，逾時送達者不予受理。"
+    assert first["confidence_score"] > second["confidence_score"]  # Has a deadline keyword
+    assert second["title"] == "開工日期" and second["due_date"] == "2026-06-01"
+    assert second["source_text"] == "開工日期：２０２６-０６-０１"  # Original full-width text
+    assert {first["extraction_source"], second["extraction_source"]} == {"rules"}
+
+
+def test_rules_cover_annotated_corpus():
+    covered = total = 0
+    for _, text, spans in load_corpus():
+        events = extract_events(text)
+        for span in spans:
+            total += 1
+            covered += any(e["source_text"] in span or span in e["source_text"] for e in events)
+    assert covered / total >= 0.85
+
+
+def test_rules_stand_in_for_the_llm(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CHUNK_CHARS", 6000)
+    monkeypatch.setattr(settings, "LLM_CHUNK_OVERLAP", 500)
+    service = parser_for(FakeCompletionsServer(find_deadlines))
+    service.client = None
+    events = service.analyze_text_with_llm("Payment is due on 2026-04-30.")
+    assert [(e["due_date"], e["extraction_source"]) for e in events] == [("2026-04-30", "rules")]
+
+    def flaky(content):
+        if "Task0 " in content:
+            raise RuntimeError("model overloaded")
+        return find_deadlines(content)
+
+    with FakeCompletionsServer(flaky) as fake:
+        events = parser_for(fake).analyze_text_with_llm(long_document(20))
+    sources = {e["due_date"]: e.get("extraction_source", "llm") for e in events}
+    assert len(fake.prompts) > 1
+    assert sources[date(2026, 1, 1).isoformat()] == "rules"  # Task0's chunk failed
+    assert sources[date(2026, 12, 12).isoformat()] == "llm"  # Task11, in another chunk
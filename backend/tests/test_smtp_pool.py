@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.email import EmailService, SmtpConnectionPool
+from backend.tests.fake_servers import FakeSmtpServer
+
+
+def make_pool(smtp: FakeSmtpServer, **kwargs) -> SmtpConnectionPool:
+    return SmtpConnectionPool("127.0.0.1", smtp.port, "bot@example.com", "secret", use_tls=False, **kwargs)
+
+
+def send_batch(pool: SmtpConnectionPool, n: int, workers: int = 1):
+    def send(i):
+        pool.sendmail("bot@example.com", [f"user{i}@example.com"], f"Subject: {i}\r\n\r\nhello")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(send, range(n)))
+
+
+def test_sessions_are_reused_across_messages():
+    with FakeSmtpServer() as smtp:
+        pool = make_pool(smtp, max_size=2)
+        send_batch(pool, 50)
+        print(f"\nsequential: 50 messages, {smtp.connections} handshakes")
+        assert len(smtp.messages) == 50
+        assert smtp.connections == 1
+        assert pool.handshakes == 1
+
+        send_batch(pool, 50, workers=4)
+        print(f"4 threads: 100 messages, {smtp.connections} handshakes")
+        assert len(smtp.messages) == 100
+        assert smtp.connections <= 2
+        pool.close()
+
+
+def test_reconnects_after_server_disconnect():
+    with FakeSmtpServer(drop_after=5) as smtp:
+        pool = make_pool(smtp)
+        send_batch(pool, 20)
+        assert len(smtp.messages) == 20
+        assert smtp.connections == 4
+        pool.close()
+
+
+def test_idle_sessions_are_closed():
+    with FakeSmtpServer() as smtp:
+        pool = make_pool(smtp, idle_timeout=0.1)
+        send_batch(pool, 3)
+        time.sleep(0.4)
+        assert pool._idle == []
+
+        send_batch(pool, 3)
+        assert smtp.connections == 2
+        pool.close()
+
+
+def test_email_service_uses_shared_pool():
+    with FakeSmtpServer() as smtp:
+        for _ in range(3):
+            service = EmailService()
+            service.provider = "smtp"
+            service._smtp_host = "127.0.0.1"
+            service._smtp_port = smtp.port
+            service._smtp_user = "pool-test@example.com"
+            service._smtp_password = "secret"
+            service._smtp_use_tls = False
+            service.enabled = True
+            assert service.send_deadline_reminder("a@example.com", "P", "Task", "2026-01-01", 3)
+        assert len(smtp.messages) == 3
+        assert smtp.connections == 1
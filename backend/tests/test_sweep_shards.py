@@ -0,0 +1,189 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from backend.core.config import settings
+from backend.models import DeadlineEvent, Document, NotificationRule, Profile, Project, SweepShardLease
+from backend.services.dispatcher import NotificationDispatcher, ProviderLimit
+from backend.services import notification as notification_module
+from backend.services.notification import NotificationService
+from backend.services.sweep import DeadlineSweep, shard_bounds
+from backend.services.sweep_leases import ShardLeases
+from backend.tests.fake_servers import FakeLineServer
+from backend.tests.test_notification_sweep import seed
+
+
+def test_shards_partition_the_sweep(db):
+    seed(db, 200)
+    key = lambda p: (p.user.id, p.event.id)
+    everything = sorted(map(key, DeadlineSweep(db).collect()))
+
+    shards = [
+        sorted(map(key, DeadlineSweep(db, shard=shard_bounds(i, 8)).collect()))
+        for i in range(8)
+    ]
+    assert sum(len(s) for s in shards) == len(everything)
+    assert sorted(k for s in shards for k in s) == everything
+    assert sum(1 for s in shards if s) > 1
+
+
+def seed_projects(db, n: int) -> list[Project]:
+    today = datetime.now().date()
+    user = Profile(id=uuid.uuid4(), email="owner@example.com", line_user_id="Uowner")
+    db.add(user)
+    db.add(NotificationRule(id=uuid.uuid4(), user_id=user.id, days_before=3, channels=["line"]))
+    projects = []
+    for i in range(n):
+        project = Project(id=uuid.uuid4(), name=f"P{i}", owner_id=user.id)
+        doc = Document(id=uuid.uuid4(), project_id=project.id, filename="a.pdf", file_path="x", file_type="pdf")
+        db.add_all([project, doc, DeadlineEvent(
+            id=uuid.uuid4(), document_id=doc.id, title=f"Task {i}",
+            due_date=today + timedelta(days=3),
+        )])
+        projects.append(project)
+    db.commit()
+    return projects
+
+
+def in_shard(project_id, shard, count):
+    low, high = shard_bounds(shard, count)
+    return project_id >= low and (high is None or project_id < high)
+
+
+def test_crashed_worker_shard_is_retried(db, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_SWEEP_SHARDS", 4)
+    project_ids = [p.id for p in seed_projects(db, 24)]
+    today = datetime.now().date()
+
+    with FakeLineServer() as line:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        # Worker A creates the run, leases the first shard and dies
+        crashed = ShardLeases(db, worker_id="worker-a")
+        crashed.ensure_run(today, 4)
+        shard, count = crashed.acquire(today)
+        lost = sum(in_shard(pid, shard, count) for pid in project_ids)
+
+        # Worker B sweeps everything else and leaves A's live lease alone
+        worker_b = ShardLeases(db, worker_id="worker-b")
+        NotificationService()._run_shards(db, create=True, today=today, leases=worker_b)
+        assert len(line.pushes) == len(project_ids) - lost
+
+        # Nothing to do while A's lease is still valid
+        NotificationService()._run_shards(db, create=False, today=today, leases=worker_b)
+        assert len(line.pushes) == len(project_ids) - lost
+
+        # Once it expires, the recovery pass picks the shard up
+        db.query(SweepShardLease).filter(SweepShardLease.shard == shard).update(
+            {"lease_expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+        )
+        db.commit()
+        NotificationService()._run_shards(db, create=False, today=today, leases=worker_b)
+        assert len(line.pushes) == len(project_ids)
+
+    leases = db.query(SweepShardLease).order_by(SweepShardLease.shard).all()
+    assert all(lease.completed_at is not None for lease in leases)
+    assert {lease.worker_id for lease in leases} == {"worker-b"}
+    assert next(lease for lease in leases if lease.shard == shard).attempts == 2
+
+
+class SlowLineDispatcher(NotificationDispatcher):
+    """One LINE send at a time, each taking `seconds`; runs `after_result` after each result."""
+
+    def __init__(self, seconds: float, after_result):
+        super().__init__({"line": ProviderLimit(concurrency=1)})
+        self.seconds = seconds
+        self.after_result = after_result
+
+    def _run_one(self, job):
+        time.sleep(self.seconds)
+        return super()._run_one(job)
+
+    def iter_results(self, jobs):
+        for result in super().iter_results(jobs):
+            yield result
+            self.after_result()
+
+
+def test_leases_are_renewed_while_a_shard_runs_past_them(db, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_SWEEP_SHARDS", 1)
+    seed_projects(db, 8)
+    today = datetime.now().date()
+    other = ShardLeases(db, worker_id="worker-b")
+    taken = []
+
+    with FakeLineServer() as line:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        # 8 sends of 0.1 s against a 0.3 s lease; worker B keeps trying to take it over
+        service = NotificationService(SlowLineDispatcher(0.1, lambda: taken.append(other.acquire(today))))
+        service._run_shards(db, create=True, today=today, leases=ShardLeases(db, worker_id="worker-a", lease_seconds=0.3))
+        assert len(line.pushes) == 8
+
+    assert taken == [None] * 8
+    lease = db.query(SweepShardLease).one()
+    assert (lease.worker_id, lease.attempts) == ("worker-a", 1) and lease.completed_at is not None
+
+
+def test_worker_stops_a_shard_whose_lease_was_taken_over(db, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_SWEEP_SHARDS", 1)
+    seed_projects(db, 8)
+    today = datetime.now().date()
+    worker_a = ShardLeases(db, worker_id="worker-a", lease_seconds=0.3)
+    worker_b = ShardLeases(db, worker_id="worker-b")
+    results = 0
+
+    def stall_then_lose_lease():
+        # After two sends worker A stalls past its lease and B reclaims the shard
+        nonlocal results
+        results += 1
+        if results == 2:
+            time.sleep(0.35)
+            assert worker_b.acquire(today) == (0, 1)
+
+    with FakeLineServer() as line:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        service = NotificationService(SlowLineDispatcher(0.2, stall_then_lose_lease))
+        service._run_shards(db, create=True, today=today, leases=worker_a)
+        assert 2 <= len(line.pushes) < 8  # The send in flight may finish; the rest are cancelled
+        assert results == 2
+
+    lease = db.query(SweepShardLease).one()
+    assert (lease.worker_id, lease.completed_at) == ("worker-b", None)  # Left for B to finish
+
+
+def test_manual_trigger_after_the_daily_run_sends_new_reminders(db, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_SWEEP_SHARDS", 4)
+    monkeypatch.setattr(notification_module, "SessionLocal", lambda: db)
+    seed_projects(db, 6)
+
+    with FakeLineServer() as line:
+        monkeypatch.setattr(settings, "LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+        monkeypatch.setattr(settings, "LINE_API_ENDPOINT", line.endpoint)
+
+        NotificationService().check_deadlines()  # The 09:00 run completes every shard
+        assert len(line.pushes) == 6
+
+        # An event due in 3 days is added after the daily run
+        owner = db.query(Profile).one()
+        project = Project(id=uuid.uuid4(), name="Late", owner_id=owner.id)
+        doc = Document(id=uuid.uuid4(), project_id=project.id, filename="b.pdf", file_path="y", file_type="pdf")
+        db.add_all([project, doc, DeadlineEvent(
+            id=uuid.uuid4(), document_id=doc.id, title="Added later",
+            due_date=datetime.now().date() + timedelta(days=3),
+        )])
+        db.commit()
+
+        NotificationService().check_deadlines()  # Another leased run finds nothing left to claim
+        assert len(line.pushes) == 6
+
+        NotificationService().check_deadlines(leased=False)  # The admin trigger
+        assert len(line.pushes) == 7
+        assert "Added later" in line.pushes[-1]["messages"][0]["altText"]
+
+        NotificationService().check_deadlines(leased=False)  # Send keys prevent repeats
+        assert len(line.pushes) == 7
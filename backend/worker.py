@@ -0,0 +1,118 @@
+"""
+Document processing worker.
+
+    python -m backend.worker
+
+Runs DOCUMENT_WORKER_CONCURRENCY slots. Each slot claims a job from
+document_jobs, processes it (services/document_processing.py) and records
+the outcome, renewing the job's lease while it works. Run more processes,
+or scale the worker service, to parse more documents at once.
+"""
+import asyncio
+import logging
+import signal
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.services.document_jobs import DocumentJobQueue, PermanentJobError
+from backend.services.document_processing import process_document
+from backend.services.extraction_pool import extraction_pool
+from backend.services.sweep_leases import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentWorker:
+    """Drains document_jobs with a fixed number of concurrent slots."""
+
+    def __init__(self, handler=process_document, concurrency: int = None, session_factory=SessionLocal,
+                 worker_id: str = None, poll_interval: float = None, visibility_timeout: float = None):
+        self.handler = handler
+        self.concurrency = concurrency if concurrency is not None else settings.DOCUMENT_WORKER_CONCURRENCY
+        self.session_factory = session_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval if poll_interval is not None else settings.DOCUMENT_JOB_POLL_INTERVAL
+        self.visibility_timeout = visibility_timeout if visibility_timeout is not None else settings.DOCUMENT_JOB_VISIBILITY_TIMEOUT
+
+    def _queue(self, slot_id: str, method: str, *args):
+        """Run one queue operation in its own session (called from a thread)."""
+        db = self.session_factory()
+        try:
+            queue = DocumentJobQueue(db, worker_id=slot_id, visibility_timeout=self.visibility_timeout)
+            return getattr(queue, method)(*args)
+        finally:
+            db.close()
+
+    async def _heartbeat(self, slot_id: str, job_id):
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                if not await asyncio.to_thread(self._queue, slot_id, "heartbeat", job_id):
+                    logger.warning(f"Lost the lease on document job {job_id}; another worker may retry it")
+                    return
+            except Exception as e:
+                logger.error(f"Heartbeat for document job {job_id} failed: {e}")
+
+    async def run_once(self, slot_id: str = None) -> bool:
+        """Claim and process one job. Returns False when the queue had nothing due."""
+        slot_id = slot_id or f"{self.worker_id}/0"
+        job = await asyncio.to_thread(self._queue, slot_id, "claim")
+        if job is None:
+            return False
+
+        heartbeat = asyncio.create_task(self._heartbeat(slot_id, job.id))
+        try:
+            await self.handler(job)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back now instead of after the lease expires
+            await asyncio.to_thread(self._queue, slot_id, "fail", job.id, "Worker shut down")
+            raise
+        except PermanentJobError as e:
+            await asyncio.to_thread(self._queue, slot_id, "fail", job.id, str(e), False)
+        except Exception as e:
+            logger.error(f"Error processing document {job.document_id}: {e}")
+            await asyncio.to_thread(self._queue, slot_id, "fail", job.id, str(e))
+        else:
+            await asyncio.to_thread(self._queue, slot_id, "complete", job.id)
+            logger.info(f"Successfully completed processing for doc {job.document_id}")
+        finally:
+            heartbeat.cancel()
+        return True
+
+    async def _slot(self, slot_id: str, stop: asyncio.Event):
+        while not stop.is_set():
+            try:
+                busy = await self.run_once(slot_id)
+            except Exception as e:  # e.g. the database is unreachable
+                logger.error(f"Document worker slot {slot_id} error: {e}")
+                busy = False
+            if not busy:
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run(self, stop: asyncio.Event):
+        """Process jobs until `stop` is set; in-flight jobs are finished first."""
+        await asyncio.gather(*(
+            self._slot(f"{self.worker_id}/{slot}", stop) for slot in range(self.concurrency)
+        ))
+
+
+async def serve():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = DocumentWorker()
+    logger.info(f"Document worker {worker.worker_id} started with {worker.concurrency} slots")
+    try:
+        await worker.run(stop)
+    finally:
+        extraction_pool.shutdown()
+        logger.info("Document worker stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve())